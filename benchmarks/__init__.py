@@ -0,0 +1,2 @@
+"""Benchmarks of the Tute engines and the rlcard environment.
+"""
@@ -0,0 +1,456 @@
+"""Benchmark the Tute engines and the rlcard environment.
+
+Measures, for each engine, number of players and Tute Habanero on or off:
+    - games and decisions per second of Tute.play_turn, TuteGame.step and
+      TuteEnv.run with RandomAgent
+    - latency per call of get_possible_cards (get_possible_mask with the fast
+      engine), do_trick, get_state and _extract_state
+    - peak memory per game
+    - time to construct an engine, a TuteGame and a TuteEnv
+And the time to import tute (in a new interpreter).
+
+Example:
+    python -m benchmarks.run --output benchmarks.json
+    python -m benchmarks.run --baseline benchmarks.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from importlib.metadata import version
+from typing import Callable
+
+import numpy as np
+from rlcard import make
+from rlcard.agents import RandomAgent
+
+from tute import Tute, FastTute
+from tute import rlcard  # pylint: disable=unused-import
+from tute.rlcard.game import TuteGame
+
+ENGINES = {'pandas': Tute, 'fast': FastTute}
+
+
+def random_card(context, hand, possible_cards):  # pylint: disable=unused-argument
+    """Choose a random card (see Tute.choose_card).
+    """
+    card = random.choice(possible_cards)
+    return hand[card] if isinstance(hand, np.ndarray) else hand.iloc[card]
+
+
+def play_turns(tute: Tute) -> int:
+    """Deal and play a game with Tute.play_turn.
+
+    Args:
+        tute (Tute): engine
+
+    Returns:
+        int: number of decisions
+    """
+    tute.deal()
+    player = 0
+    num_decisions = 0
+    while len(tute.get_hand(player)) > 0:
+        winning_player = tute.play_turn(player=player, choose_card=random_card)
+        num_decisions += 1
+        if winning_player is not None:
+            player = winning_player
+        else:
+            player = (player + 1) % tute.num_players
+    tute.retreive_messages()
+    return num_decisions
+
+
+def play_steps(game: TuteGame) -> int:
+    """Deal and play a game with TuteGame.step.
+
+    Args:
+        game (TuteGame): game
+
+    Returns:
+        int: number of decisions
+    """
+    game.init_game()
+    num_decisions = 0
+    while not game.is_over():
+        game.step(game.decode_action(random.choice(game.get_legal_actions())))
+        num_decisions += 1
+    game.retreive_messages()
+    return num_decisions
+
+
+def run_env(env) -> int:
+    """Play a game with TuteEnv.run.
+
+    Args:
+        env (TuteEnv): environment with agents set
+
+    Returns:
+        int: number of decisions
+    """
+    env.run(is_training=False)
+    return len(env.action_recorder)
+
+
+def measure_rate(play: Callable, min_time: float) -> dict:
+    """Play games for at least min_time seconds.
+
+    Args:
+        play (function): plays a game and returns the number of decisions
+        min_time (float): minimum time in seconds
+
+    Returns:
+        dict: games and decisions per second
+    """
+    num_games = 0
+    num_decisions = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time or num_games == 0:
+        num_decisions += play()
+        num_games += 1
+        elapsed = time.perf_counter() - start
+    return {
+        'games': num_games,
+        'games_per_sec': num_games / elapsed,
+        'decisions_per_sec': num_decisions / elapsed
+    }
+
+
+def measure_latency(obj, names: dict, play: Callable, num_games: int) -> dict:
+    """Time each call of methods of an object while playing games.
+
+    Args:
+        obj (object): object whose methods are timed
+        names (dict): names of methods indexed by the names to report them as
+                      (such as Tute.profiled_phases, as each engine implements
+                      a phase with its own method)
+        play (function): plays a game
+        num_games (int): number of games
+
+    Returns:
+        dict: number of calls and mean, median and 99th percentile latency in
+              microseconds, indexed by reported name
+    """
+    timings = {name: [] for name in names}
+    for name, method_name in names.items():
+
+        def timed(*args,
+                  method=getattr(obj, method_name),
+                  times=timings[name]):
+            start = time.perf_counter()
+            result = method(*args)
+            times.append(time.perf_counter() - start)
+            return result
+
+        setattr(obj, method_name, timed)
+
+    try:
+        for _ in range(num_games):
+            play()
+    finally:
+        for method_name in names.values():
+            delattr(obj, method_name)
+
+    latencies = {}
+    for name, times in timings.items():
+        assert len(times) > 0, f'{names[name]} was never called'
+        times = np.array(times) * 1e6
+        latencies[name] = {
+            'calls': len(times),
+            'mean_us': float(times.mean()),
+            'median_us': float(np.median(times)),
+            'p99_us': float(np.percentile(times, 99))
+        }
+    return latencies
+
+
+def measure_memory(play: Callable, num_games: int) -> int:
+    """Measure the mean peak memory allocated while playing a game.
+
+    Args:
+        play (function): plays a game
+        num_games (int): number of games
+
+    Returns:
+        int: peak memory in bytes
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(num_games):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            play()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return int(np.mean(peaks))
+
+
+def measure_import(module: str = 'tute', repeat: int = 5) -> dict:
+    """Measure the time to import a module in a new interpreter.
+
+    Args:
+        module (str): name of module
+        repeat (int): number of times to import it (the fastest is taken)
+
+    Returns:
+        dict: import time in seconds and whether pandas was imported too
+    """
+    code = ('import sys, time\n'
+            'start = time.perf_counter()\n'
+            f'import {module}\n'
+            'print(time.perf_counter() - start, "pandas" in sys.modules)')
+    times = []
+    for _ in range(repeat):
+        seconds, pandas = subprocess.run([sys.executable, '-c', code],
+                                         capture_output=True,
+                                         check=True,
+                                         text=True).stdout.split()
+        times.append(float(seconds))
+    return {'seconds': min(times), 'imports_pandas': pandas == 'True'}
+
+
+def measure_construction(construct: Callable, num_instances: int) -> float:
+    """Measure the mean time to construct an object.
+
+    Args:
+        construct (function): constructs an object
+        num_instances (int): number of objects to construct
+
+    Returns:
+        float: time in microseconds
+    """
+    construct()  # warm up any caches
+    start = time.perf_counter()
+    for _ in range(num_instances):
+        construct()
+    return (time.perf_counter() - start) / num_instances * 1e6
+
+
+def benchmark(engine: str,
+              num_players: int,
+              habanero: bool,
+              min_time: float,
+              latency_games: int,
+              memory_games: int,
+              construction_instances: int = 100) -> dict:
+    """Run all the benchmarks for one configuration.
+
+    Args:
+        engine (str): 'pandas' or 'fast'
+        num_players (int): number of players
+        habanero (bool): if True, play Tute Habanero
+        min_time (float): minimum time in seconds to measure each rate
+        latency_games (int): number of games to measure latencies
+        memory_games (int): number of games to measure peak memory
+        construction_instances (int): number of objects to construct to
+                                      measure construction time
+
+    Returns:
+        dict: results
+    """
+    tute = ENGINES[engine](num_players=num_players, habanero=habanero)
+    game = TuteGame(num_players=num_players,
+                    habanero=habanero,
+                    fast=engine == 'fast')
+    env = make(
+        'tute', {
+            'game_num_players': num_players,
+            'game_habanero': habanero,
+            'game_fast': engine == 'fast'
+        })
+    env.set_agents(
+        [RandomAgent(num_actions=env.num_actions) for _ in range(num_players)])
+
+    latency = measure_latency(
+        tute, {
+            phase: tute.profiled_phases[phase]
+            for phase in ['get_possible_cards', 'do_trick']
+        }, lambda: play_turns(tute), latency_games)
+    latency.update(
+        measure_latency(env.game, {'get_state': 'get_state'},
+                        lambda: run_env(env), latency_games))
+    latency.update(
+        measure_latency(env, {'_extract_state': '_extract_state'},
+                        lambda: run_env(env), latency_games))
+
+    config = {
+        'game_num_players': num_players,
+        'game_habanero': habanero,
+        'game_fast': engine == 'fast'
+    }
+    return {
+        'engine': engine,
+        'num_players': num_players,
+        'habanero': habanero,
+        'construction_us': {
+            'engine':
+                measure_construction(
+                    lambda: ENGINES[engine](num_players=num_players,
+                                            habanero=habanero),
+                    construction_instances),
+            'game':
+                measure_construction(
+                    lambda: TuteGame(num_players=num_players,
+                                     habanero=habanero,
+                                     fast=engine == 'fast'),
+                    construction_instances),
+            'env':
+                measure_construction(lambda: make('tute', config),
+                                     construction_instances)
+        },
+        'play_turn': measure_rate(lambda: play_turns(tute), min_time),
+        'step': measure_rate(lambda: play_steps(game), min_time),
+        'env_run': measure_rate(lambda: run_env(env), min_time),
+        'latency': latency,
+        'peak_memory_bytes': {
+            'play_turn': measure_memory(lambda: play_turns(tute),
+                                        memory_games),
+            'env_run': measure_memory(lambda: run_env(env), memory_games)
+        }
+    }
+
+
+def get_metadata() -> dict:
+    """Describe the environment the benchmarks were run in.
+
+    Returns:
+        dict: metadata
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                capture_output=True,
+                                check=True,
+                                text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'packages': {
+            package: version(package)
+            for package in ['numpy', 'pandas', 'rlcard']
+        }
+    }
+
+
+def compare(results: list, baseline: list) -> list:
+    """Compare results with a baseline.
+
+    Args:
+        results (list): results of benchmarks
+        baseline (list): results of baseline benchmarks
+
+    Returns:
+        list: lines describing the speedup of each rate, latency and
+              construction time
+    """
+
+    def _key(result):
+        return result['engine'], result['num_players'], result['habanero']
+
+    baseline = {_key(result): result for result in baseline}
+    lines = []
+    for result in results:
+        if _key(result) not in baseline:
+            continue
+        other = baseline[_key(result)]
+        speedups = [
+            f'{name} {result[name]["games_per_sec"] / other[name]["games_per_sec"]:.2f}x'
+            for name in ['play_turn', 'step', 'env_run']
+        ] + [
+            f'{name} {other["latency"][name]["mean_us"] / latency["mean_us"]:.2f}x'
+            for name, latency in result['latency'].items()
+            if latency['mean_us'] and other['latency'].get(name, {}).get(
+                'mean_us')
+        ] + [
+            f'construct {name} {other["construction_us"][name] / micros:.2f}x'
+            for name, micros in result.get('construction_us', {}).items()
+            if other.get('construction_us', {}).get(name)
+        ]
+        engine, num_players, habanero = _key(result)
+        lines.append(f'{engine} num_players={num_players} '
+                     f'habanero={habanero}: ' + ', '.join(speedups))
+    return lines
+
+
+def main():
+    """Run benchmarks and write results as JSON.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark Tute.')
+    parser.add_argument('--engines',
+                        nargs='+',
+                        choices=list(ENGINES),
+                        default=list(ENGINES))
+    parser.add_argument('--num_players',
+                        nargs='+',
+                        type=int,
+                        default=[2, 3, 4])
+    parser.add_argument('--habanero',
+                        nargs='+',
+                        choices=['on', 'off'],
+                        default=['on', 'off'])
+    parser.add_argument('--min_time',
+                        type=float,
+                        default=1.0,
+                        help='minimum time in seconds to measure each rate')
+    parser.add_argument('--latency_games', type=int, default=5)
+    parser.add_argument('--memory_games', type=int, default=3)
+    parser.add_argument('--construction_instances', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None)
+    parser.add_argument('--baseline',
+                        type=str,
+                        default=None,
+                        help='JSON output of a previous run to compare with')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    results = []
+    for engine in args.engines:
+        for num_players in args.num_players:
+            for habanero in args.habanero:
+                results.append(
+                    benchmark(engine, num_players, habanero == 'on',
+                              args.min_time, args.latency_games,
+                              args.memory_games,
+                              args.construction_instances))
+                print(f'{engine} num_players={num_players} '
+                      f'habanero={habanero}: '
+                      f'{results[-1]["env_run"]["games_per_sec"]:.1f} games/s',
+                      file=sys.stderr)
+
+    startup = {'import': measure_import('tute')}
+    print(f'import tute: {startup["import"]["seconds"]:.3f}s', file=sys.stderr)
+    output = json.dumps(
+        {
+            'metadata': get_metadata(),
+            'startup': startup,
+            'results': results
+        },
+        indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        for line in compare(results, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
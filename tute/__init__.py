@@ -1,3 +1,4 @@
 """Tute module
 """
 from .tute import *
+from .fast import *
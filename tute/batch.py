@@ -0,0 +1,384 @@
+"""Many games of Tute played in lockstep with NumPy.
+"""
+from typing import Union
+
+import numpy as np
+
+from .seeding import Seed, deal_order, get_rng
+from .tute import Tute, get_card_table
+
+
+class TuteBatch:
+    """Many independent games of Tute played in lockstep.
+
+    The state of every game is a row of 2-D arrays and each call to step plays
+    one card (an action, given by its card id as in FastTute) in every game at
+    once. The rules are those of Tute, with the player after the dealer (player
+    0) leading the first trick.
+    """
+
+    def __init__(self,
+                 num_games: int,
+                 num_players: int = 2,
+                 habanero: bool = True):
+        """Initialize games. Call reset to deal.
+
+        Args:
+            num_games (int): number of games
+            num_players (int): number of players
+            habanero (bool): if True, play Tute Habanero
+        """
+        self.num_games = num_games
+        self.num_players = max(2, min(num_players, 4))
+        self.num_cards_per_player = [8, 12, 10][self.num_players - 2]
+        self.habanero = habanero
+
+        self.locations = Tute.build_locations(self.num_players)
+        card_table = get_card_table(self.num_players)
+        deck = card_table.deck
+        self.num_cards = len(deck)
+        self.card_suits = card_table.suits
+        self.card_values = card_table.values
+        self.card_rankings = card_table.rankings
+        self.card_points = card_table.points
+
+        # card ids indexed by suit and value (-1 if discarded)
+        self._card_ids = np.full((len(Tute.suits), max(Tute.cards) + 1),
+                                 -1,
+                                 dtype=np.int64)
+        for card_id, card in deck.items():
+            self._card_ids[card['suit'], card['value']] = card_id
+
+        num_locations = max(self.locations.values()) + 1
+        self._hands = np.array([
+            self.locations[f'player {player + 1} hand']
+            for player in range(self.num_players)
+        ],
+                               dtype=np.int8)
+        self._tricks = np.array([
+            self.locations[f'player {player + 1} tricks']
+            for player in range(self.num_players)
+        ],
+                                dtype=np.int8)
+        self._face_ups = np.array([
+            self.locations[f'player {player + 1} face up']
+            for player in range(self.num_players)
+        ],
+                                  dtype=np.int8)
+        self._is_hand = np.zeros(num_locations, dtype=bool)
+        self._is_hand[self._hands] = True
+        self._is_face_up = np.zeros(num_locations, dtype=bool)
+        self._is_face_up[self._face_ups] = True
+        self._players = np.full(num_locations, -1, dtype=np.int8)
+        for player in range(self.num_players):
+            self._players[[
+                self._hands[player], self._tricks[player],
+                self._face_ups[player]
+            ]] = player
+
+        shape = (num_games, self.num_cards)
+        self.card_locations = np.full(shape,
+                                      self.locations['pile'],
+                                      dtype=np.int8)
+        self.order = np.tile(np.arange(self.num_cards), (num_games, 1))
+        self.shown = np.zeros(shape, dtype=bool)
+        self.pile_index = np.full(num_games, self.num_cards, dtype=np.int64)
+        self.trump_suits = np.zeros(num_games, dtype=np.int8)
+        self.suits = np.full(num_games, -1, dtype=np.int8)
+        self.current_players = np.zeros(num_games, dtype=np.int64)
+        self.num_face_up = np.zeros(num_games, dtype=np.int8)
+        self.cantes = np.full((num_games, len(Tute.suits)), -1, dtype=np.int8)
+        self.scores = np.zeros((num_games, self.num_players), dtype=np.int16)
+        self.last_trick_winners = np.full(num_games, -1, dtype=np.int8)
+        self.done = np.ones(num_games, dtype=bool)
+
+    def reset(self,
+              games: np.ndarray = None,
+              seed: Union[Seed, list] = None):
+        """Shuffle and deal new games.
+
+        Args:
+            games (array): indices or mask of games to reset (all if None)
+            seed (int, Generator, RandomState or list): seed or random number
+                generator to shuffle with (NumPy's global one if None), or a
+                seed for each game, which deals the same cards as
+                Tute.deal(0, seed)
+        """
+        games = np.arange(
+            self.num_games) if games is None else np.asarray(games)
+        if games.dtype == bool:
+            games = np.flatnonzero(games)
+        if isinstance(seed, (list, tuple, np.ndarray)):
+            assert len(seed) == len(games)
+            orders = np.array([
+                deal_order(self.num_cards, game) for game in seed
+            ]).reshape(len(games), self.num_cards)
+        else:
+            rng = get_rng(seed)
+            orders = np.argsort(rng.random((len(games), self.num_cards)),
+                                axis=1)
+        self.deal(orders, games)
+
+    def deal(self, orders: np.ndarray, games: np.ndarray = None):
+        """Deal games from shuffled decks.
+
+        Args:
+            orders (array): card ids in the order they are dealt, for each game
+            games (array): indices of games to deal (all if None)
+        """
+        games = np.arange(self.num_games) if games is None else games
+        rows = np.arange(len(games))[:, np.newaxis]
+        num_dealt = self.num_cards_per_player * self.num_players
+
+        card_locations = np.full((len(games), self.num_cards),
+                                 self.locations['pile'],
+                                 dtype=np.int8)
+        card_locations[rows, orders[:, :num_dealt]] = self._hands[
+            (1 + np.arange(num_dealt)) % self.num_players]
+        self.shown[games] = False
+        if num_dealt < self.num_cards:
+            trumps = orders[:, num_dealt]
+            card_locations[rows[:, 0], trumps] = self.locations['trump']
+            self.pile_index[games] = num_dealt + 1
+        else:
+            trumps = orders[:, num_dealt - 1]
+            self.shown[games, trumps] = True
+            self.pile_index[games] = self.num_cards
+
+        self.card_locations[games] = card_locations
+        self.order[games] = orders
+        self.trump_suits[games] = self.card_suits[trumps]
+        self.suits[games] = -1
+        self.current_players[games] = 1 % self.num_players
+        self.num_face_up[games] = 0
+        self.cantes[games] = -1
+        self.scores[games] = 0
+        self.last_trick_winners[games] = -1
+        self.done[games] = False
+
+        if self.habanero:
+            self._swap_trump(games)
+
+    def get_follow_suit(self) -> np.ndarray:
+        """Determines whether players have to follow suit or not.
+
+        Returns:
+            array: for each game, if True, suit must be followed
+        """
+        if not self.habanero:
+            return np.ones(self.num_games, dtype=bool)
+
+        to_deal = self.num_cards - self.pile_index + (
+            self.card_locations == self.locations['trump']).any(axis=1)
+        return to_deal < self.num_players
+
+    def legal_actions(self) -> np.ndarray:
+        """Determine which cards can be played by the current players.
+
+        Returns:
+            array: for each game, mask of legal card ids (none if game is over)
+        """
+        hands = self.card_locations == self._hands[self.current_players,
+                                                   np.newaxis]
+        face_up = self._is_face_up[self.card_locations]
+        same_suit = self.card_suits == self.suits[:, np.newaxis]
+        trump = self.card_suits == self.trump_suits[:, np.newaxis]
+
+        # highest rankings in play (0 if there are none, as nothing beats that)
+        highest_ranking = np.where(face_up & same_suit, self.card_rankings,
+                                   99).min(axis=1, keepdims=True)
+        highest_ranking[highest_ranking == 99] = 0
+        highest_ranking_trump = np.where(face_up & trump, self.card_rankings,
+                                         99).min(axis=1, keepdims=True)
+        highest_ranking_trump[highest_ranking_trump == 99] = 0
+        same_suit &= hands
+        trump &= hands
+
+        # in reverse order of preference, as in Tute.get_possible_cards
+        follow_suit = self.get_follow_suit() & (self.num_face_up > 0)
+        legal_actions = hands
+        for cards in [
+                trump, trump & (self.card_rankings < highest_ranking_trump),
+                same_suit, same_suit & (self.card_rankings < highest_ranking)
+        ]:
+            legal_actions = np.where(
+                (follow_suit & cards.any(axis=1))[:, np.newaxis], cards,
+                legal_actions)
+        legal_actions[self.done] = False
+        return legal_actions
+
+    def get_locations(self, players: np.ndarray = None) -> np.ndarray:
+        """Returns the locations of cards as known by each player.
+
+        Args:
+            players (array): number of player for each game (current player if None)
+
+        Returns:
+            array: for each game, locations of cards indexed by card id
+        """
+        players = self.current_players if players is None else players
+        card_locations = self.card_locations.copy()
+        hidden = (card_locations == self.locations['pile']) | (
+            self._is_hand[card_locations] &
+            (card_locations != self._hands[players][:, np.newaxis])
+            & ~self.shown)
+        card_locations[hidden] = self.locations['unknown']
+        return card_locations
+
+    def step(self, actions: np.ndarray) -> np.ndarray:
+        """Play a card in each game that is not over.
+
+        Args:
+            actions (array): id of card to play in each game (ignored if game is over)
+
+        Returns:
+            array: mask of games that finished with this step
+        """
+        games = np.flatnonzero(~self.done)
+        cards = np.asarray(actions)[games]
+        players = self.current_players[games]
+        assert (self.card_locations[games, cards] == self._hands[players]).all()
+
+        self.card_locations[games, cards] = self._face_ups[players]
+        self.num_face_up[games] += 1
+        leads = self.num_face_up[games] == 1
+        self.suits[games[leads]] = self.card_suits[cards[leads]]
+        self.current_players[games] = (players + 1) % self.num_players
+
+        finished = np.zeros(self.num_games, dtype=bool)
+        tricks = games[self.num_face_up[games] == self.num_players]
+        if len(tricks) > 0:
+            finished[self._do_trick(tricks)] = True
+        if self.habanero:
+            self._swap_trump(games[~finished[games]])
+        return finished
+
+    def get_payoffs(self) -> np.ndarray:
+        """Points of each player so far (see Tute.calc_points).
+
+        Returns:
+            array: for each game, points of each player
+        """
+        return self.scores.copy()
+
+    def _do_trick(self, games: np.ndarray) -> np.ndarray:
+        """Process tricks, "cantar" and deal new cards.
+
+        Args:
+            games (array): indices of games with a complete trick
+
+        Returns:
+            array: indices of games which are over
+        """
+        rows = np.arange(len(games))
+        card_locations = self.card_locations[games]
+        face_up = self._is_face_up[card_locations]
+
+        # trumps beat the suit of the trick, which beats the rest
+        order = np.where(
+            self.card_suits == self.trump_suits[games, np.newaxis],
+            self.card_rankings,
+            np.where(self.card_suits == self.suits[games, np.newaxis],
+                     self.card_rankings + 20, 99))
+        winning_cards = np.where(face_up, order, 127).argmin(axis=1)
+        winning_players = self._players[card_locations[rows, winning_cards]]
+
+        self.card_locations[games] = np.where(
+            face_up, self._tricks[winning_players][:, np.newaxis],
+            card_locations)
+        self.scores[games, winning_players] += (face_up *
+                                                self.card_points).sum(axis=1)
+        self.num_face_up[games] = 0
+        self.current_players[games] = winning_players
+
+        cantar = np.full(len(games), self.num_players != 2) | (
+            self.pile_index[games] < self.num_cards)
+        self._cantar(games[cantar], winning_players[cantar])
+        self._deal_new_cards(games, winning_players)
+
+        over = ~(self.card_locations[games] ==
+                 self._hands[winning_players][:, np.newaxis]).any(axis=1)
+        games = games[over]
+        self.last_trick_winners[games] = winning_players[over]
+        self.scores[games, winning_players[over]] += 10
+        self.done[games] = True
+        return games
+
+    def _cantar(self, games: np.ndarray, players: np.ndarray):
+        """Automatically "cantar", greedily (see Tute.cantar).
+
+        Args:
+            games (array): indices of games
+            players (array): number of player who is "cantando" in each game
+        """
+        rows = np.arange(len(games))
+        caballos = self._card_ids[:, 11]
+        reyes = self._card_ids[:, 12]
+        hands = self._hands[players][:, np.newaxis]
+        card_locations = self.card_locations[games]
+        available = (card_locations[:, caballos] == hands) & (
+            card_locations[:, reyes] == hands) & (self.cantes[games] < 0)
+
+        trump_suits = self.trump_suits[games].astype(np.int64)
+        trump = available[rows, trump_suits] & (self.cantes[games] < 0).all(
+            axis=1)
+        available[rows, trump_suits] = False
+        cante = trump | available.any(axis=1)
+        suits = np.where(trump, trump_suits, available.argmax(axis=1))[cante]
+        games, players = games[cante], players[cante]
+
+        self.cantes[games, suits] = players
+        self.scores[games, players] += np.where(
+            suits == trump_suits[cante], 40, 20).astype(np.int16)
+        self.shown[games, caballos[suits]] = True
+        self.shown[games, reyes[suits]] = True
+
+    def _deal_new_cards(self, games: np.ndarray, winning_players: np.ndarray):
+        """Deal cards from pile, then trump, starting with trick winners.
+
+        Args:
+            games (array): indices of games
+            winning_players (array): number of player who won the last trick in each game
+        """
+        to_deal = self.num_cards - self.pile_index[games] + (
+            self.card_locations[games] == self.locations['trump']).any(axis=1)
+        deal = to_deal >= self.num_players
+        games, winning_players = games[deal], winning_players[deal]
+
+        for dealt in range(self.num_players):
+            from_pile = self.pile_index[games] < self.num_cards
+            cards = np.where(
+                from_pile,
+                self.order[games,
+                           np.minimum(self.pile_index[games],
+                                      self.num_cards - 1)],
+                (self.card_locations[games] == self.locations['trump']).argmax(
+                    axis=1))
+            self.card_locations[games, cards] = self._hands[
+                (winning_players + dealt) % self.num_players]
+            self.pile_index[games] += from_pile
+
+    def _swap_trump(self, games: np.ndarray):
+        """Automatically swap trump cards if possible (see Tute.swap_trump).
+
+        Args:
+            games (array): indices of games
+        """
+        games = games[(self.card_locations[games] == self.locations['trump']
+                       ).any(axis=1)]
+        trump_suits = self.trump_suits[games]
+        for value in [7, 2]:
+            trumps = (self.card_locations[games] == self.locations['trump']
+                      ).argmax(axis=1)
+            trump_swaps = self._card_ids[trump_suits, value]
+            # the seven can only be swapped for a face card, the two for the rest
+            swap = ((self.card_values[trumps] >= 10) == (value == 7)) & (
+                trump_swaps >= 0)
+            hands = self.card_locations[games, trump_swaps]
+            swap &= self._is_hand[hands]
+
+            swapped = games[swap]
+            self.card_locations[swapped,
+                                trump_swaps[swap]] = self.locations['trump']
+            self.card_locations[swapped, trumps[swap]] = hands[swap]
+            self.shown[swapped, trumps[swap]] = True
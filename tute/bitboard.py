@@ -0,0 +1,242 @@
+"""Bitboard representation of sets of Tute cards.
+
+Bit i of a bitboard is set if the card with id i (its index in Tute.deck) is in
+the set, so the cards in any location (hand, tricks, face up, pile) fit in a
+single int.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .tute import Tute, get_card_table
+
+
+class Bitboards:
+    """Precomputed masks and the rules of the game as mask operations.
+    """
+
+    def __init__(self, num_players: int = 2):
+        """Precompute masks for the deck used with this number of players.
+
+        Args:
+            num_players (int): number of players
+        """
+        deck = get_card_table(num_players).deck
+        self.num_players = num_players
+        self.num_cards = len(deck)
+        self.all = (1 << self.num_cards) - 1
+
+        self.suit_masks = [0] * len(Tute.suits)
+        self.value_masks = {value: 0 for value in Tute.cards}
+        self.card_masks = {}
+        for card_id, card in deck.items():
+            self.suit_masks[card['suit']] |= 1 << card_id
+            self.value_masks[card['value']] |= 1 << card_id
+            self.card_masks[(card['suit'], card['value'])] = 1 << card_id
+        self.card_points = [card['points'] for card in deck.values()]
+        # bitboard of each card id, to build bitboards from arrays of card ids
+        # with np.bitwise_or.reduce
+        self.card_bits = np.left_shift(1, np.arange(self.num_cards,
+                                                    dtype=np.int64))
+        self.card_bits.flags.writeable = False
+
+        # cards of each suit are consecutive, so a suit can be shifted down to
+        # index a table with one entry per subset of the suit
+        self.suit_size = self.num_cards // len(Tute.suits)
+        self.suit_shifts = [
+            (mask & -mask).bit_length() - 1 for mask in self.suit_masks
+        ]
+
+        # better[card] are the cards of the same suit with a higher ranking
+        better = [
+            sum(1 << other_id
+                for other_id, other in deck.items()
+                if other['suit'] == card['suit']
+                and other['ranking'] < card['ranking'])
+            for card in deck.values()
+        ]
+
+        # beats[suit][subset] are the cards of the suit with a higher ranking
+        # than all of the cards in the subset (none if the subset is empty)
+        self.beats = []
+        for suit, mask in enumerate(self.suit_masks):
+            beats = [0] * (1 << self.suit_size)
+            for subset in range(1, 1 << self.suit_size):
+                lowest = subset & -subset
+                card_id = lowest.bit_length() - 1 + self.suit_shifts[suit]
+                beats[subset] = better[card_id] & (beats[subset ^ lowest]
+                                                   if subset != lowest else
+                                                   mask)
+            self.beats.append(beats)
+
+        self.faces = (self.value_masks[10] | self.value_masks[11]
+                      | self.value_masks[12])
+        self.caballo_and_rey = [
+            self.card_masks[(suit, 11)] | self.card_masks[(suit, 12)]
+            for suit, _ in enumerate(Tute.suits)
+        ]
+
+    @staticmethod
+    def count(mask: int) -> int:
+        """Count cards in bitboard.
+
+        Args:
+            mask (int): bitboard
+
+        Returns:
+            int: number of cards
+        """
+        return bin(mask).count('1')
+
+    @staticmethod
+    def to_cards(mask: int) -> list:
+        """Convert bitboard to card ids.
+
+        Args:
+            mask (int): bitboard
+
+        Returns:
+            list: card ids in ascending order
+        """
+        cards = []
+        while mask:
+            lowest = mask & -mask
+            cards.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return cards
+
+    @staticmethod
+    def from_cards(cards) -> int:
+        """Convert card ids to bitboard.
+
+        Args:
+            cards (iterable): card ids
+
+        Returns:
+            int: bitboard
+        """
+        mask = 0
+        for card in cards:
+            mask |= 1 << int(card)
+        return mask
+
+    def points(self, mask: int) -> int:
+        """Tot up points of cards in bitboard.
+
+        Args:
+            mask (int): bitboard
+
+        Returns:
+            int: points
+        """
+        return sum(self.card_points[card] for card in self.to_cards(mask))
+
+    def get_follow_suit(self, to_deal: int, habanero: bool = True) -> bool:
+        """Determines whether player has to follow suit or not.
+
+        Args:
+            to_deal (int): bitboard of cards in pile and trump
+            habanero (bool): if True, play Tute Habanero
+
+        Returns:
+            bool: if True, suit must be followed
+        """
+        return not habanero or self.count(to_deal) < self.num_players
+
+    def get_possible_cards(self, hand: int, face_up: int, suit: int,
+                           trump_suit: int, follow_suit: bool) -> int:
+        """Determine which cards can be played from the hand.
+
+        Args:
+            hand (int): bitboard of cards in hand
+            face_up (int): bitboard of cards in play
+            suit (int): suit of trick
+            trump_suit (int): trump suit
+            follow_suit (bool): if True, suit must be followed
+
+        Returns:
+            int: bitboard of possible cards
+        """
+        if not follow_suit or not face_up:
+            return hand
+
+        same_suit = hand & self.suit_masks[suit]
+        if same_suit:
+            return same_suit & self.beats[suit][
+                (face_up >> self.suit_shifts[suit])
+                & ((1 << self.suit_size) - 1)] or same_suit
+
+        trump = hand & self.suit_masks[trump_suit]
+        if trump:
+            return trump & self.beats[trump_suit][
+                (face_up >> self.suit_shifts[trump_suit])
+                & ((1 << self.suit_size) - 1)] or trump
+
+        return hand
+
+    def swap_trump(self, trump: int, hands: list, trump_suit: int) -> list:
+        """Determine which cards are swapped for the trump card.
+
+        Args:
+            trump (int): bitboard of trump card
+            hands (list): bitboards of each player's hand
+            trump_suit (int): trump suit
+
+        Returns:
+            list: (player, card from trump, card to trump) bitboard swaps
+        """
+        swaps = []
+        if not trump:
+            return swaps
+
+        for trump_swap in [
+                self.card_masks[(trump_suit, 7)],
+                self.card_masks.get((trump_suit, 2), 0)
+        ]:
+            # the seven can only be swapped for a face card, the two for the rest
+            if (trump_swap == self.card_masks[(trump_suit, 7)]) != bool(
+                    trump & self.faces):
+                continue
+            for player, hand in enumerate(hands):
+                if hand & trump_swap:
+                    swaps.append((player, trump, trump_swap))
+                    trump = trump_swap
+                    break
+
+        return swaps
+
+    def cantar(self, hand: int, trump_suit: int, cantes: dict) -> int:
+        """Determine which suit to "cantar", greedily.
+
+        Args:
+            hand (int): bitboard of cards in hand
+            trump_suit (int): trump suit
+            cantes (dict): players who have "cantado" indexed by suit
+
+        Returns:
+            int: suit to "cantar" (or None)
+        """
+        caballo_and_rey = self.caballo_and_rey[trump_suit]
+        if len(cantes) == 0 and hand & caballo_and_rey == caballo_and_rey:
+            return trump_suit
+
+        for suit, caballo_and_rey in enumerate(self.caballo_and_rey):
+            if suit == trump_suit or suit in cantes:
+                continue
+            if hand & caballo_and_rey == caballo_and_rey:
+                return suit
+
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_bitboards(num_players: int) -> Bitboards:
+    """Get shared precomputed masks for the deck used with this number of players.
+
+    Args:
+        num_players (int): number of players
+
+    Returns:
+        Bitboards: precomputed masks
+    """
+    return Bitboards(num_players)
@@ -0,0 +1,332 @@
+"""Streaming export of finished games to columnar files, for analytics.
+
+Each game is a row of a table with a column for each of its attributes (see
+GAME_SCHEMA), built from its log of events. GameWriter buffers rows as lists
+of values and writes them to Parquet (or Arrow IPC) files, one row group at a
+time, so memory is bounded by the size of a row group whatever the number of
+games. Files are partitioned in directories by number of players and whether
+Tute Habanero is played (as num_players=2/habanero=true/part-00000.parquet),
+and read_games scans them back with column projection and predicate filters,
+without reading the columns or files that are not needed.
+
+This requires pyarrow, which is only imported when games are written or read.
+"""
+import os
+
+from .tute import Tute
+
+# name and type of each column: card ids in the order they were dealt, trump
+# card (-1 if the last card dealt was shown instead), player who played each
+# card, winner of each trick, cantes, trump swaps (card taken from the trump
+# and card given for it) and points of each player (see Tute.calc_points)
+GAME_SCHEMA = [
+    ('game_id', 'int64'),
+    ('num_players', 'int8'),
+    ('habanero', 'bool'),
+    ('dealer', 'int8'),
+    ('deal', 'list<int8>'),
+    ('trump_card', 'int8'),
+    ('trump_suit', 'int8'),
+    ('plays', 'list<int8>'),
+    ('play_players', 'list<int8>'),
+    ('trick_winners', 'list<int8>'),
+    ('cante_players', 'list<int8>'),
+    ('cante_suits', 'list<int8>'),
+    ('swap_players', 'list<int8>'),
+    ('swap_taken', 'list<int8>'),
+    ('swap_given', 'list<int8>'),
+    ('points', 'list<int16>'),
+]
+
+# columns that files are partitioned by
+PARTITIONS = ['num_players', 'habanero']
+
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+
+def get_schema():
+    """Get the schema of the table of games.
+
+    Returns:
+        Schema: pyarrow schema
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    types = {
+        'int8': pa.int8(),
+        'int16': pa.int16(),
+        'int64': pa.int64(),
+        'bool': pa.bool_(),
+    }
+    return pa.schema([
+        (name, pa.list_(types[kind[5:-1]]) if kind.startswith('list') else
+         types[kind]) for name, kind in GAME_SCHEMA
+    ])
+
+
+def record_game(game: Tute, game_id: int = 0, dealer: int = 0) -> dict:
+    """Record a finished game as a row of the table of games.
+
+    Args:
+        game (Tute): game with a log of events (see Tute.events)
+        game_id (int): id of game
+        dealer (int): number of player who dealt
+
+    Returns:
+        dict: value of each column
+    """
+    if game.events is None:
+        raise ValueError('Recording a game requires the log of events')
+
+    row = {name: [] for name, kind in GAME_SCHEMA if kind.startswith('list')}
+    row.update(game_id=game_id,
+               num_players=game.num_players,
+               habanero=game.habanero,
+               dealer=dealer,
+               deal=[int(card) for card in game.order],
+               trump_card=-1,
+               trump_suit=int(game.trump_suit),
+               points=[
+                   int(game.calc_points(player))
+                   for player in range(game.num_players)
+               ])
+    for event_type, player, card, other_card in game.events:
+        if event_type == Tute.PLAYED:
+            row['plays'].append(card)
+            row['play_players'].append(player)
+        elif event_type == Tute.TRICK_WON:
+            row['trick_winners'].append(player)
+        elif event_type == Tute.CANTE:
+            row['cante_players'].append(player)
+            row['cante_suits'].append(card)
+        elif event_type == Tute.SWAPPED_TRUMP:
+            row['swap_players'].append(player)
+            row['swap_taken'].append(card)
+            row['swap_given'].append(other_card)
+        elif event_type == Tute.DEALT and player == -1:
+            row['trump_card'] = card
+    return row
+
+
+class GameWriter:
+    """Writes rows of games to partitioned columnar files in row groups of
+    bounded size.
+    """
+
+    def __init__(self,
+                 path: str,
+                 file_format: str = 'parquet',
+                 row_group_size: int = 65536,
+                 max_rows_per_file: int = 2**22,
+                 prefix: str = 'part'):
+        """Initialize writer.
+
+        Args:
+            path (str): root directory of files
+            file_format (str): 'parquet' or 'arrow' (Arrow IPC)
+            row_group_size (int): number of rows to buffer before writing them
+                                  as a row group (or record batch)
+            max_rows_per_file (int): number of rows after which a new file is
+                                     started
+            prefix (str): prefix of file names (such as the id of the process,
+                          to write to the same directory from many processes)
+        """
+        assert file_format in EXTENSIONS
+        self.path = path
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.max_rows_per_file = max_rows_per_file
+        self.prefix = prefix
+        # the columns that files are partitioned by are in their paths
+        self.schema = get_schema()
+        for name in PARTITIONS:
+            self.schema = self.schema.remove(
+                self.schema.get_field_index(name))
+        self.num_rows = 0
+        # buffered columns, file writer, number of rows in file and number of
+        # files of each partition
+        self._partitions = {}
+
+    def write(self, row: dict):
+        """Write a row (see record_game).
+
+        Args:
+            row (dict): value of each column
+        """
+        key = tuple(row[name] for name in PARTITIONS)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = [
+                {name: [] for name in self.schema.names}, None, 0, 0
+            ]
+        columns = partition[0]
+        for name, values in columns.items():
+            values.append(row[name])
+        self.num_rows += 1
+        if len(columns['game_id']) >= self.row_group_size:
+            self._flush(key)
+
+    def write_game(self, game: Tute, game_id: int = 0, dealer: int = 0):
+        """Write a finished game.
+
+        Args:
+            game (Tute): game with a log of events
+            game_id (int): id of game
+            dealer (int): number of player who dealt
+        """
+        self.write(record_game(game, game_id, dealer))
+
+    def _flush(self, key: tuple):
+        """Write the buffered rows of a partition as a row group.
+
+        Args:
+            key (tuple): values of partition columns
+        """
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+        partition = self._partitions[key]
+        columns, writer, num_file_rows, num_files = partition
+        if len(columns['game_id']) == 0:
+            return
+
+        if writer is not None and num_file_rows >= self.max_rows_per_file:
+            writer.close()
+            writer = None
+        if writer is None:
+            directory = os.path.join(
+                self.path, *[
+                    f'{name}={str(value).lower()}'
+                    for name, value in zip(PARTITIONS, key)
+                ])
+            os.makedirs(directory, exist_ok=True)
+            file_name = os.path.join(
+                directory, f'{self.prefix}-{num_files:05d}.'
+                f'{EXTENSIONS[self.file_format]}')
+            if self.file_format == 'parquet':
+                writer = pq.ParquetWriter(file_name, self.schema)
+            else:
+                writer = pa.ipc.new_file(file_name, self.schema)
+            num_file_rows = 0
+            num_files += 1
+
+        batch = pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        if self.file_format == 'parquet':
+            writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            writer.write_batch(batch)
+        self._partitions[key] = [{name: [] for name in columns}, writer,
+                                 num_file_rows + batch.num_rows, num_files]
+
+    def flush(self):
+        """Write the buffered rows of all partitions.
+        """
+        for key in self._partitions:
+            self._flush(key)
+
+    def close(self):
+        """Write the buffered rows and close the files.
+        """
+        self.flush()
+        for partition in self._partitions.values():
+            if partition[1] is not None:
+                partition[1].close()
+                partition[1] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def get_dataset(path: str, file_format: str = 'parquet'):
+    """Open the files of games in a directory as a dataset.
+
+    Args:
+        path (str): root directory of files
+        file_format (str): 'parquet' or 'arrow'
+
+    Returns:
+        Dataset: pyarrow dataset
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.dataset as ds  # pylint: disable=import-outside-toplevel
+    schema = get_schema()
+    return ds.dataset(path,
+                      schema=schema,
+                      format='ipc' if file_format == 'arrow' else file_format,
+                      partitioning=ds.partitioning(pa.schema(
+                          [schema.field(name) for name in PARTITIONS]),
+                                                   flavor='hive'))
+
+
+def iter_games(path: str,
+               columns: list = None,
+               filters=None,
+               file_format: str = 'parquet',
+               batch_size: int = 65536):
+    """Scan games in batches, reading only the columns and files needed.
+
+    Args:
+        path (str): root directory of files
+        columns (list): names of columns to read (all if None)
+        filters (Expression or list): pyarrow expression (such as
+            pyarrow.dataset.field('dealer') == 0) or list of (column, operator,
+            value) tuples, all of which must hold
+        file_format (str): 'parquet' or 'arrow'
+        batch_size (int): maximum number of rows in each batch
+
+    Yields:
+        RecordBatch: batch of games
+    """
+    dataset = get_dataset(path, file_format)
+    yield from dataset.to_batches(columns=columns,
+                                  filter=_get_expression(filters),
+                                  batch_size=batch_size)
+
+
+def read_games(path: str,
+               columns: list = None,
+               filters=None,
+               file_format: str = 'parquet'):
+    """Read games into a table, reading only the columns and files needed.
+
+    Args:
+        path (str): root directory of files
+        columns (list): names of columns to read (all if None)
+        filters (Expression or list): filters (see iter_games)
+        file_format (str): 'parquet' or 'arrow'
+
+    Returns:
+        Table: pyarrow table of games (see Table.to_pandas)
+    """
+    return get_dataset(path, file_format).to_table(
+        columns=columns, filter=_get_expression(filters))
+
+
+def _get_expression(filters):
+    """Convert filters to a pyarrow expression.
+
+    Args:
+        filters (Expression or list): filters (see iter_games)
+
+    Returns:
+        Expression: expression (None if no filters)
+    """
+    if filters is None or not isinstance(filters, list):
+        return filters
+    import pyarrow.dataset as ds  # pylint: disable=import-outside-toplevel
+    operators = {
+        '=': lambda field, value: field == value,
+        '==': lambda field, value: field == value,
+        '!=': lambda field, value: field != value,
+        '<': lambda field, value: field < value,
+        '<=': lambda field, value: field <= value,
+        '>': lambda field, value: field > value,
+        '>=': lambda field, value: field >= value,
+        'in': lambda field, value: field.isin(value),
+    }
+    expression = None
+    for name, operator, value in filters:
+        condition = operators[operator](ds.field(name), value)
+        expression = condition if expression is None else expression & condition
+    return expression
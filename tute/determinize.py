@@ -0,0 +1,210 @@
+"""Sample deals consistent with what a player knows about a game of Tute.
+
+The hidden cards (those in the pile and in the hands of the other players that
+have not been shown) are dealt at random, respecting the number of cards in
+each hand and the cards that each player cannot have, as inferred from the
+cards they played when they had to follow suit. This is what search-based
+agents need to determinize a game (see ISMCTS).
+"""
+import numpy as np
+
+from .bitboard import get_bitboards
+from .tute import Tute
+
+
+def infer_voids(game: Tute) -> np.ndarray:
+    """Infer which cards each player cannot have from the cards they played.
+
+    When suit must be followed, a player who did not follow suit has no cards
+    of that suit, one who did not trump has no trumps and one who did not beat
+    the cards in play has no cards that beat them (see Tute.get_possible_cards).
+    As the new cards dealt to a player are hidden, nothing is inferred about a
+    player from before they were dealt a card.
+
+    Args:
+        game (Tute): game with a log of events (see Tute.events)
+
+    Returns:
+        array: for each player, mask of card ids they cannot have
+    """
+    if game.events is None:
+        raise ValueError('Inferring voids requires the log of events')
+
+    bitboards = get_bitboards(game.num_players)
+    suit_masks = bitboards.suit_masks
+    suit_bits = (1 << bitboards.suit_size) - 1
+    suits = [
+        next(suit for suit, mask in enumerate(suit_masks) if mask >> card & 1)
+        for card in range(bitboards.num_cards)
+    ]
+
+    voids = [0] * game.num_players
+    to_deal = game.num_cards
+    face_up = 0
+    lead_suit = None
+    for event_type, player, card, _ in game.events:
+        if event_type == Tute.DEALT and player >= 0:
+            to_deal -= 1
+            voids[player] = 0
+
+        elif event_type == Tute.PLAYED:
+            if not face_up:
+                lead_suit = suits[card]
+            elif not game.habanero or to_deal < game.num_players:
+                for suit in [lead_suit, game.trump_suit]:
+                    beats = bitboards.beats[suit][
+                        (face_up >> bitboards.suit_shifts[suit]) & suit_bits]
+                    if suits[card] == suit:
+                        # had to beat the cards of the suit in play, if able
+                        if not beats >> card & 1:
+                            voids[player] |= beats
+                        break
+                    # had to play the suit (or trump), if able
+                    voids[player] |= suit_masks[suit]
+
+            face_up |= 1 << card
+            if bitboards.count(face_up) == game.num_players:
+                face_up = 0
+
+    masks = np.zeros((game.num_players, game.num_cards), dtype=bool)
+    for player, void in enumerate(voids):
+        masks[player, bitboards.to_cards(void)] = True
+    return masks
+
+
+class Determinizer:
+    """Deals the hidden cards of a game at random, consistently with what one
+    player knows.
+
+    Sampled deals are returned as the location of each card and an order of
+    the cards in which those in the pile come last, in the order they will be
+    dealt, as in FastTute.order and TuteBatch.order.
+    """
+
+    def __init__(self, game: Tute, player: int):
+        """Gather what the player knows about the game.
+
+        Args:
+            game (TuteGame): game (with a log of events)
+            player (int): number of player
+        """
+        self.num_cards = game.num_cards
+        self.player = player
+        self.known_locations = np.array(
+            game.get_state(player)['locations'], dtype=np.int8)
+        self.voids = infer_voids(game)
+
+        # the hidden cards are dealt to the other players' hands and the pile
+        unknown = game.locations['unknown']
+        self.hidden = np.flatnonzero(self.known_locations == unknown)
+        others = [
+            other for other in range(game.num_players) if other != player
+        ]
+        self.slots = np.array(
+            [game.locations[f'player {other + 1} hand'] for other in others] +
+            [game.locations['pile']],
+            dtype=np.int8)
+        self.capacities = np.array([
+            len(game.get_hand(other)) -
+            np.count_nonzero(self.known_locations == slot)
+            for other, slot in zip(others, self.slots)
+        ] + [len(game.get_cards_in('pile'))])
+        assert self.capacities.sum() == len(self.hidden)
+        # whether each card can go in each slot
+        self.allowed = np.ones((len(self.slots), self.num_cards), dtype=bool)
+        self.allowed[:-1] = ~self.voids[others]
+
+        # deal the cards that cannot go in some slot first, most constrained
+        # first, then the rest at random in the free space left
+        constrained = ~self.allowed[:, self.hidden].all(axis=0)
+        self._constrained = self.hidden[constrained][np.argsort(
+            self.allowed[:, self.hidden[constrained]].sum(axis=0),
+            kind='stable')]
+        self._free = self.hidden[~constrained]
+        self._known = np.flatnonzero(self.known_locations != unknown)
+
+    def _deal_constrained(self, num_deals: int,
+                          rng: np.random.Generator) -> tuple:
+        """Deal constrained hidden cards to slots, in proportion to free space.
+
+        Args:
+            num_deals (int): number of deals
+            rng (Generator): random number generator
+
+        Returns:
+            tuple: slot index of each constrained card and free space left in
+                   each slot, for each deal, and mask of deals that failed
+                   (because a card could not go in any slot)
+        """
+        rows = np.arange(num_deals)
+        free = np.tile(self.capacities, (num_deals, 1))
+        slots = np.zeros((num_deals, len(self._constrained)), dtype=np.int64)
+        failed = np.zeros(num_deals, dtype=bool)
+        for index, card in enumerate(self._constrained):
+            weights = np.cumsum(free * self.allowed[:, card], axis=1)
+            failed |= weights[:, -1] == 0
+            targets = rng.random(num_deals) * weights[:, -1]
+            slot = np.minimum((weights <= targets[:, np.newaxis]).sum(axis=1),
+                              len(self.slots) - 1)
+            slots[:, index] = slot
+            free[rows, slot] -= 1
+        return slots, free, failed
+
+    def sample(self,
+               num_deals: int,
+               rng: np.random.Generator = None,
+               max_tries: int = 100) -> tuple:
+        """Sample deals of the hidden cards.
+
+        Args:
+            num_deals (int): number of deals
+            rng (Generator): random number generator
+            max_tries (int): maximum number of times to redeal failed deals
+
+        Returns:
+            tuple: locations of cards and order of cards (with the pile last),
+                   for each deal
+        """
+        rng = rng or np.random.default_rng()
+        rows = np.arange(num_deals)[:, np.newaxis]
+        locations = np.tile(self.known_locations, (num_deals, 1))
+
+        # the free cards are shuffled and fill the space left in each slot in
+        # turn, so those in the pile come last
+        free_cards = self._free[np.argsort(rng.random(
+            (num_deals, len(self._free)), dtype=np.float32),
+                                           axis=1)]
+        if len(self._constrained) == 0:
+            locations[rows, free_cards] = np.repeat(self.slots,
+                                                    self.capacities)
+            return locations, np.concatenate(
+                [np.tile(self._known, (num_deals, 1)), free_cards], axis=1)
+
+        slots, free, failed = self._deal_constrained(num_deals, rng)
+        for _ in range(max_tries):
+            if not failed.any():
+                break
+            slots[failed], free[failed], failed[failed] = self._deal_constrained(
+                failed.sum(), rng)
+        else:
+            if failed.any():
+                raise RuntimeError('Could not find consistent deals')
+
+        locations[:, self._constrained] = self.slots[slots]
+        locations[rows, free_cards] = self.slots[(
+            np.arange(len(self._free)) >= np.cumsum(free, axis=1)[
+                :, :, np.newaxis]).sum(axis=1)]
+        orders = np.concatenate([
+            np.tile(self._known, (num_deals, 1)),
+            np.tile(self._constrained, (num_deals, 1)), free_cards
+        ],
+                                axis=1)
+
+        # constrained cards in the pile go at random among the rest of the pile
+        in_pile = (slots == len(self.slots) - 1).any(axis=1)
+        if in_pile.any():
+            orders[in_pile] = np.argsort(
+                rng.random((in_pile.sum(), self.num_cards)) +
+                (locations[in_pile] == self.slots[-1]),
+                axis=1)
+        return locations, orders
@@ -0,0 +1,199 @@
+"""Exact solver for the end of two player games of Tute.
+
+Once the pile and the trump card have been dealt, each of the two players
+knows the cards in the other's hand, so the rest of the game is of perfect
+information and can be solved with alpha-beta search.
+"""
+from .bitboard import get_bitboards
+from .tute import Tute
+
+# bounds of values stored in the transposition table
+EXACT, LOWER, UPPER = range(3)
+
+
+def is_endgame(game: Tute) -> bool:
+    """Determine whether the rest of a two player game is of perfect
+    information.
+
+    Args:
+        game (Tute): game
+
+    Returns:
+        bool: True if there are no cards left to deal
+    """
+    return (game.num_players == 2 and len(game.get_cards_in('pile')) == 0
+            and len(game.get_cards_in('trump')) == 0)
+
+
+class EndgameSolver:
+    """Alpha-beta search of the points left to win, with a transposition table
+    and move ordering.
+
+    Values are the difference between the points that the player whose turn
+    it is and the other player will win in the rest of the game (from the
+    cards in their hands and in play and the 10 points for the last trick).
+    No more cantes are possible at this stage.
+    """
+
+    def __init__(self, trump_suit: int, num_players: int = 2):
+        """Initialize solver.
+
+        Args:
+            trump_suit (int): trump suit
+            num_players (int): number of players of the deck (must be 2)
+        """
+        assert num_players == 2
+        self.trump_suit = trump_suit
+        self.bitboards = get_bitboards(num_players)
+        self.card_suits = [
+            next(suit for suit, mask in enumerate(self.bitboards.suit_masks)
+                 if mask >> card & 1)
+            for card in range(self.bitboards.num_cards)
+        ]
+        # wins[lead] are the cards that win the trick against the card led
+        self.wins = [0] * self.bitboards.num_cards
+        for lead, suit in enumerate(self.card_suits):
+            self.wins[lead] = self.bitboards.beats[suit][1 << (
+                lead - self.bitboards.suit_shifts[suit])]
+            if suit != trump_suit:
+                self.wins[lead] |= self.bitboards.suit_masks[trump_suit]
+        # (hand, other hand, card led or -1) -> (value, bound, best card)
+        self.table = {}
+        self.num_nodes = 0
+
+    def _moves(self, hand: int, lead: int) -> list:
+        """Get the cards that can be played, in the order to search them.
+
+        Args:
+            hand (int): bitboard of cards in hand
+            lead (int): id of card led (or -1 to lead)
+
+        Returns:
+            list: card ids
+        """
+        card_points = self.bitboards.card_points
+        if lead < 0:
+            # leading high cards wins (or loses) most points first
+            return sorted(self.bitboards.to_cards(hand),
+                          key=lambda card: (-card_points[card], card))
+
+        possible = self.bitboards.get_possible_cards(hand, 1 << lead,
+                                                     self.card_suits[lead],
+                                                     self.trump_suit, True)
+
+        wins = self.wins[lead]
+
+        def _order(card):
+            # win with the most points, or lose with the fewest
+            if wins >> card & 1:
+                return (0, -card_points[card], card)
+            return (1, card_points[card], card)
+
+        return sorted(self.bitboards.to_cards(possible), key=_order)
+
+    def search(self, hand: int, other: int, lead: int, alpha: float,
+               beta: float) -> int:
+        """Search for the value of a position within a window.
+
+        Args:
+            hand (int): bitboard of cards in the hand of player to move
+            other (int): bitboard of cards in the other player's hand
+            lead (int): id of card led by the other player (or -1 to lead)
+            alpha (float): lower bound of window
+            beta (float): upper bound of window
+
+        Returns:
+            int: value (exact if within the window, or else a bound)
+        """
+        if not hand:
+            return 0
+        self.num_nodes += 1
+
+        key = (hand, other, lead)
+        entry = self.table.get(key)
+        best_card = None
+        if entry is not None:
+            value, bound, best_card = entry
+            if bound == EXACT or (bound == LOWER and value >= beta) or (
+                    bound == UPPER and value <= alpha):
+                return value
+
+        moves = self._moves(hand, lead)
+        if best_card is not None:
+            moves.remove(best_card)
+            moves.insert(0, best_card)
+
+        original_alpha = alpha
+        best_value = -float('inf')
+        for card in moves:
+            if lead < 0:
+                value = -self.search(other, hand ^ 1 << card, card, -beta,
+                                     -alpha)
+            else:
+                points = self.bitboards.card_points[
+                    lead] + self.bitboards.card_points[card]
+                if hand == 1 << card:
+                    points += 10  # last trick
+                if self.wins[lead] >> card & 1:
+                    value = points + self.search(hand ^ 1 << card, other, -1,
+                                                 alpha - points,
+                                                 beta - points)
+                else:
+                    value = -points - self.search(other, hand ^ 1 << card, -1,
+                                                  -beta - points,
+                                                  -alpha - points)
+            if value > best_value:
+                best_value = value
+                best_card = card
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (best_value, bound, best_card)
+        return best_value
+
+    def solve(self, hand: int, other: int, lead: int = -1) -> tuple:
+        """Solve position.
+
+        Args:
+            hand (int): bitboard of cards in the hand of player to move
+            other (int): bitboard of cards in the other player's hand
+            lead (int): id of card led by the other player (or -1 to lead)
+
+        Returns:
+            tuple: value and best card to play
+        """
+        value = self.search(hand, other, lead, -float('inf'), float('inf'))
+        return value, self.table[(hand, other, lead)][2]
+
+
+def solve_endgame(game: Tute, player: int, solver: EndgameSolver = None) -> tuple:
+    """Solve the rest of a two player game when it is of perfect information
+    (see is_endgame).
+
+    Args:
+        game (Tute): game
+        player (int): number of player whose turn it is
+        solver (EndgameSolver): solver to reuse (its transposition table is
+                                valid for as long as the trump suit is the
+                                same)
+
+    Returns:
+        tuple: difference between the points that the player and the other
+               player will win in the rest of the game, and best card to play
+    """
+    assert is_endgame(game)
+    if solver is None or solver.trump_suit != game.trump_suit:
+        solver = EndgameSolver(int(game.trump_suit), game.num_players)
+    bitboards = solver.bitboards
+    hand = bitboards.from_cards(game.card_ids(game.get_hand(player)))
+    other = bitboards.from_cards(game.card_ids(game.get_hand(1 - player)))
+    face_up = game.card_ids(game.get_face_up())
+    lead = int(face_up[0]) if len(face_up) > 0 else -1
+    return solver.solve(hand, other, lead)
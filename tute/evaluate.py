@@ -0,0 +1,329 @@
+"""Round-robin tournaments between agents with duplicate deals.
+
+In a match between two agents, the first sits at the first seat and the second
+at the others, and each deal is played as many times as there are players,
+with each hand at each seat (see tute.selfplay), which cancels out most of
+the luck of the deal. Deals are played in parallel across processes, but
+their results are taken in order of deal id, so a match is reproducible. The
+match stops as soon as a sequential probability ratio test (SPRT) on the
+score of the first agent in each deal decides that it is better or worse than
+the second one by a margin.
+
+An agent can be given as
+    - a function that returns an rlcard agent, given the environment (and the
+      number of player, if it takes a player argument)
+    - a function to choose a card (see Tute.choose_card), recognized by its
+      possible_cards argument
+    - a string "module:function" of either of the above
+    - the path of a checkpoint of an agent saved with torch.save
+
+Example:
+    python -m tute.evaluate --agents tute.selfplay:random_agent \
+        tute.evaluate:ismcts_agent
+"""
+import argparse
+import inspect
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import combinations
+from statistics import NormalDist
+
+import numpy as np
+
+from tute.rlcard.agent import TuteChooseCardAgent
+from tute.rlcard.ismcts import TuteISMCTSAgent
+from tute.selfplay import load_agent_factory, play_games
+
+# win rate and mean point margin of the first agent per game, with their
+# confidence intervals, log likelihood ratio of the SPRT and its decision (1
+# if the first agent is better, -1 if it is worse and 0 if undecided)
+MatchResult = namedtuple('MatchResult', [
+    'agents', 'num_deals', 'num_games', 'win_rate', 'win_rate_ci', 'margin',
+    'margin_ci', 'llr', 'decision'
+])
+
+
+def ismcts_agent(env, player: int) -> TuteISMCTSAgent:
+    """Agent factory for an agent that plays with ISMCTS, with a fixed number
+    of playouts per move. It is reseeded at the start of each game by
+    play_games, so that matches are reproducible.
+
+    Args:
+        env (TuteEnv): environment
+        player (int): number of player
+
+    Returns:
+        TuteISMCTSAgent: agent
+    """
+    return TuteISMCTSAgent(player,
+                           env.game,
+                           time_limit=None,
+                           max_playouts=200)
+
+
+@lru_cache(maxsize=None)
+def load_checkpoint(path: str):
+    """Load an agent saved with torch.save (once per process).
+
+    Args:
+        path (str): path of checkpoint
+
+    Returns:
+        agent: agent
+    """
+    import torch  # pylint: disable=import-outside-toplevel
+    return torch.load(path, map_location='cpu', weights_only=False)
+
+
+def make_agent(agent, env, player: int):
+    """Make an agent for a seat.
+
+    Args:
+        agent (str or function): agent (see module docstring)
+        env (TuteEnv): environment
+        player (int): number of player
+
+    Returns:
+        agent: rlcard agent
+    """
+    if isinstance(agent, str):
+        if os.path.isfile(agent):
+            return load_checkpoint(agent)
+        agent = load_agent_factory(agent)
+    parameters = inspect.signature(agent).parameters
+    if 'possible_cards' in parameters:
+        return TuteChooseCardAgent(player, env.game, agent)
+    if 'player' in parameters:
+        return agent(env, player=player)
+    return agent(env)
+
+
+def play_deals(env_config: dict, agents: tuple, base_seed: int,
+               deal_ids: range) -> np.ndarray:
+    """Play duplicate deals in one worker.
+
+    Args:
+        env_config (dict): config of TuteEnv
+        agents (tuple): agent at the first seat and agent at the others
+        base_seed (int): base seed
+        deal_ids (range): ids of deals to play
+
+    Returns:
+        array: points of each player in each game of each deal
+    """
+    num_players = env_config.get('game_num_players', 2)
+    agent_factories = [
+        partial(make_agent, agents[0] if player == 0 else agents[1],
+                player=player) for player in range(num_players)
+    ]
+    records = play_games(
+        env_config, agent_factories, base_seed,
+        range(deal_ids.start * num_players, deal_ids.stop * num_players),
+        True)
+    return np.array([record.payoffs for record in records]).reshape(
+        len(deal_ids), num_players, num_players)
+
+
+def score_deal(points: np.ndarray) -> tuple:
+    """Score the first agent in a duplicate deal.
+
+    Args:
+        points (array): points of each player in each game of the deal
+
+    Returns:
+        tuple: mean score (1 for a win, 0.5 for a tie and 0 for a loss) and
+               mean margin of points over the mean of the other players
+    """
+    best_other = points[:, 1:].max(axis=1)
+    wins = (points[:, 0] > best_other) + 0.5 * (points[:, 0] == best_other)
+    margins = points[:, 0] - points[:, 1:].mean(axis=1)
+    return float(wins.mean()), float(margins.mean())
+
+
+def get_confidence_interval(values: list, confidence: float) -> tuple:
+    """Get confidence interval of the mean, with the normal approximation.
+
+    Args:
+        values (list): samples
+        confidence (float): confidence level
+
+    Returns:
+        tuple: lower and upper bounds
+    """
+    mean = float(np.mean(values))
+    if len(values) < 2:
+        return -math.inf, math.inf
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * float(
+        np.std(values, ddof=1)) / math.sqrt(len(values))
+    return mean - half_width, mean + half_width
+
+
+def play_match(agents: tuple,
+               env_config: dict = None,
+               base_seed: int = 0,
+               max_deals: int = 1000,
+               min_deals: int = 10,
+               delta: float = 0.05,
+               alpha: float = 0.05,
+               beta: float = 0.05,
+               confidence: float = 0.95,
+               chunk_size: int = 5,
+               executor: ProcessPoolExecutor = None,
+               num_workers: int = None) -> MatchResult:
+    """Play duplicate deals between two agents until the SPRT decides.
+
+    The SPRT tests whether the expected score of the first agent in a deal is
+    0.5 + delta (it is better) against 0.5 - delta (it is worse).
+
+    Args:
+        agents (tuple): agent at the first seat and agent at the others (see
+            module docstring), picklable
+        env_config (dict): config of TuteEnv
+        base_seed (int): base seed (see tute.seeding)
+        max_deals (int): maximum number of deals
+        min_deals (int): minimum number of deals before stopping
+        delta (float): margin of the expected score of the SPRT
+        alpha (float): probability of deciding that the first agent is better
+            when it is worse
+        beta (float): probability of deciding that the first agent is worse
+            when it is better
+        confidence (float): confidence level of intervals
+        chunk_size (int): number of deals to play in each task
+        executor (ProcessPoolExecutor): executor to play in (a new one if
+            None)
+        num_workers (int): number of processes of executor (number of CPUs
+            if None)
+
+    Returns:
+        MatchResult: result
+    """
+    env_config = env_config or {'game_fast': True}
+    if executor is None:
+        with ProcessPoolExecutor(num_workers) as executor:
+            return play_match(agents, env_config, base_seed, max_deals,
+                              min_deals, delta, alpha, beta, confidence,
+                              chunk_size, executor, num_workers)
+
+    upper = math.log((1 - beta) / alpha)
+    lower = math.log(beta / (1 - alpha))
+    win_weight = math.log((0.5 + delta) / (0.5 - delta))
+    # tasks in flight, indexed by their first deal id
+    window = 2 * (num_workers or os.cpu_count())
+    futures = {}
+    next_deal = 0
+    scores, margins = [], []
+    llr, decision = 0.0, 0
+    try:
+        while decision == 0 and len(scores) < max_deals:
+            while len(futures) < window and next_deal < max_deals:
+                deal_ids = range(next_deal,
+                                 min(next_deal + chunk_size, max_deals))
+                futures[next_deal] = executor.submit(play_deals, env_config,
+                                                     agents, base_seed,
+                                                     deal_ids)
+                next_deal = deal_ids.stop
+            for points in futures.pop(len(scores)).result():
+                score, margin = score_deal(points)
+                scores.append(score)
+                margins.append(margin)
+                llr += win_weight * (2 * score - 1)
+                if len(scores) >= min_deals:
+                    if llr >= upper:
+                        decision = 1
+                    elif llr <= lower:
+                        decision = -1
+                if decision != 0:
+                    break
+    finally:
+        for future in futures.values():
+            future.cancel()
+
+    num_players = env_config.get('game_num_players', 2)
+    win_rate_ci = get_confidence_interval(scores, confidence)
+    return MatchResult(agents, len(scores),
+                       len(scores) * num_players, float(np.mean(scores)),
+                       (max(win_rate_ci[0], 0.0), min(win_rate_ci[1], 1.0)),
+                       float(np.mean(margins)),
+                       get_confidence_interval(margins, confidence), llr,
+                       decision)
+
+
+def round_robin(agents: dict,
+                env_config: dict = None,
+                num_workers: int = None,
+                **kwargs) -> dict:
+    """Play a match between each pair of agents.
+
+    Args:
+        agents (dict): agents (see module docstring) indexed by name
+        env_config (dict): config of TuteEnv
+        num_workers (int): number of processes (number of CPUs if None)
+        kwargs: arguments of play_match
+
+    Returns:
+        dict: results indexed by the pair of names
+    """
+    results = {}
+    with ProcessPoolExecutor(num_workers) as executor:
+        for first, second in combinations(agents, 2):
+            results[(first, second)] = play_match(
+                (agents[first], agents[second]),
+                env_config,
+                executor=executor,
+                num_workers=num_workers,
+                **kwargs)
+    return results
+
+
+def main():
+    """Play a round-robin tournament and print the results.
+    """
+    parser = argparse.ArgumentParser(description='Tute tournament.')
+    parser.add_argument('--agents',
+                        nargs='+',
+                        required=True,
+                        help='module:function of agent factory or function '
+                        'to choose a card, or path of checkpoint')
+    parser.add_argument('--num_players', type=int, default=2)
+    parser.add_argument('--habanero',
+                        action=argparse.BooleanOptionalAction,
+                        default=True)
+    parser.add_argument('--max_deals', type=int, default=1000)
+    parser.add_argument('--delta',
+                        type=float,
+                        default=0.05,
+                        help='margin of the expected score of the SPRT')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--num_workers', type=int, default=None)
+    args = parser.parse_args()
+
+    env_config = {
+        'game_num_players': args.num_players,
+        'game_habanero': args.habanero,
+        'game_fast': True,
+    }
+    results = round_robin(dict(zip(args.agents, args.agents)),
+                          env_config,
+                          num_workers=args.num_workers,
+                          base_seed=args.seed,
+                          max_deals=args.max_deals,
+                          delta=args.delta)
+    for (first, second), result in results.items():
+        print(
+            f'{first} vs {second}: {result.num_games} games, '
+            f'win rate {result.win_rate:.3f} '
+            f'[{result.win_rate_ci[0]:.3f}, {result.win_rate_ci[1]:.3f}], '
+            f'margin {result.margin:+.1f} '
+            f'[{result.margin_ci[0]:+.1f}, {result.margin_ci[1]:+.1f}], ' +
+            {
+                1: 'better',
+                -1: 'worse',
+                0: 'undecided'
+            }[result.decision])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,472 @@
+"""Tute card game backed by NumPy arrays.
+"""
+import logging
+from typing import Callable
+
+import numpy as np
+
+from .bitboard import get_bitboards
+from .seeding import Seed, deal_order
+from .tables import must_play, trick_winner
+from .tute import Tute, get_card_table, logger
+
+
+class FastTute(Tute):
+    """Tute card game backed by NumPy arrays.
+
+    The public methods are the same as those of Tute but, instead of rows of a
+    DataFrame, cards are referred to by their id (their index in Tute.deck) and
+    sets of cards are arrays of card ids in the order in which they were dealt.
+    The cards in each location are also kept as bitboards (see Bitboards).
+    """
+    # legal moves are found with bitboards
+    profiled_phases = dict(Tute.profiled_phases,
+                           get_possible_cards='get_possible_mask')
+
+    def _init_deck(self):
+        """Build deck from the card attributes shared by all games.
+        """
+        # shared by all games, so read-only
+        card_table = get_card_table(self.num_players)
+        self.card_suits = card_table.suits
+        self.card_values = card_table.values
+        self.card_rankings = card_table.rankings
+        self.card_points = card_table.points
+        self.card_locations = np.full(self.num_cards,
+                                      self.locations['pile'],
+                                      dtype=np.int8)
+        self.order = np.arange(self.num_cards)
+
+        self.bitboards = get_bitboards(self.num_players)
+        self.location_masks = [0] * (max(self.locations.values()) + 1)
+        self.location_masks[self.locations['pile']] = self.bitboards.all
+
+        self._card_lookup = card_table.lookup
+        self._location_names = dict(
+            zip(self.locations.values(), self.locations.keys()))
+        self._hands = [
+            self.locations[f'player {player + 1} hand']
+            for player in range(self.num_players)
+        ]
+        self._tricks = [
+            self.locations[f'player {player + 1} tricks']
+            for player in range(self.num_players)
+        ]
+        self._face_ups = [
+            self.locations[f'player {player + 1} face up']
+            for player in range(self.num_players)
+        ]
+        self._is_face_up = np.zeros(max(self.locations.values()) + 1,
+                                    dtype=bool)
+        self._is_face_up[self._face_ups] = True
+        self._players = np.full(max(self.locations.values()) + 1,
+                                -1,
+                                dtype=np.int8)
+        for player in range(self.num_players):
+            self._players[[
+                self._hands[player], self._tricks[player],
+                self._face_ups[player]
+            ]] = player
+
+    def shuffle(self, seed: Seed = None):
+        """Shuffle deck.
+
+        Args:
+            seed (int, Generator or RandomState): seed or random number
+                generator (np_random if None)
+        """
+        self.order = deal_order(self.num_cards,
+                                self.np_random if seed is None else seed)
+
+    def move(self, card: int, location: str):
+        """Move card to location.
+
+        Args:
+            card (int): id of card to move
+            location (str): location according to tute.location
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('%s went from %s to %s', self.card_descriptions[card],
+                         self._location_names[self.card_locations[card]],
+                         location)
+        self._move(card, self.locations[location])
+
+    def _move(self, card: int, location: int):
+        """Move card to location without logging.
+
+        Args:
+            card (int): id of card to move
+            location (int): location code
+        """
+        card = int(card)
+        self.location_masks[self.card_locations[card]] ^= 1 << card
+        self.location_masks[location] |= 1 << card
+        self.card_locations[card] = location
+        if self.listeners:
+            self._notify(card)
+
+    def set_locations(self, locations: np.ndarray, order: np.ndarray = None):
+        """Move every card to its location, such as in a sampled deal (see
+        Determinizer).
+
+        Args:
+            locations (array): location code of each card
+            order (array): card ids in the order they were dealt (unchanged if
+                           None)
+        """
+        self.card_locations[:] = locations
+        if order is not None:
+            self.order = np.asarray(order)
+        self.location_masks = [0] * len(self.location_masks)
+        for card, location in enumerate(self.card_locations.tolist()):
+            self.location_masks[location] |= 1 << card
+        if self.listeners:
+            for card in range(self.num_cards):
+                self._notify(card)
+
+    def deal(self, dealer: int = 0, seed: Seed = None):
+        """Deal deck.
+
+        Args:
+            dealer (int): number of player who is dealing
+            seed (int, Generator or RandomState): seed or random number
+                generator to shuffle with (np_random if None)
+        """
+        self.card_locations[:] = self.locations['pile']
+        self.location_masks = [0] * len(self.location_masks)
+        self.location_masks[self.locations['pile']] = self.bitboards.all
+        self.shuffle(seed)
+
+        self.suit = None
+        self.shown = set()
+        self.cantes = {}
+        self.last_trick_winner = None
+        if self.events is not None:
+            self.events = []
+        self._num_retrieved = 0
+
+        num_dealt = self.num_cards_per_player * self.num_players
+        for dealt, card in enumerate(self.order[:num_dealt]):
+            player = (dealer + 1 + dealt) % self.num_players
+            self._move(card, self._hands[player])
+            if self.events is not None:
+                self.events.append((self.DEALT, player, int(card), -1))
+
+        if num_dealt < self.num_cards:
+            trump = self.order[num_dealt]
+            self._move(trump, self.locations['trump'])
+            if self.events is not None:
+                self.events.append((self.DEALT, -1, int(trump), -1))
+        else:
+            trump = self.order[num_dealt - 1]
+            self.show([int(trump)])
+        self.trump_suit = int(self.card_suits[trump])
+
+        # the rest of the cards went back to the pile
+        if self.listeners:
+            for card_id in range(self.num_cards):
+                self._notify(card_id)
+
+    @staticmethod
+    def card_id(card: int) -> int:
+        """Get id of card.
+
+        Args:
+            card (int): card id
+
+        Returns:
+            int: card id (index in deck)
+        """
+        return int(card)
+
+    @staticmethod
+    def card_ids(cards: np.ndarray) -> list:
+        """Get ids of cards.
+
+        Args:
+            cards (array): card ids
+
+        Returns:
+            list: card ids (indices in deck)
+        """
+        return cards.tolist()
+
+    def get_location(self, card: int) -> int:
+        """Get location of card.
+
+        Args:
+            card (int): card id
+
+        Returns:
+            int: location according to tute.location
+        """
+        return int(self.card_locations[card])
+
+    def get_cards_in(self, location: str) -> np.ndarray:
+        """Get cards in location.
+
+        Args:
+            location (str): location according to tute.location.
+
+        Returns:
+            array: ids of cards in location
+        """
+        return self.order[self.card_locations[self.order] ==
+                          self.locations[location]]
+
+    def get_face_up(self) -> np.ndarray:
+        """Get cards in play.
+
+        Returns:
+            array: ids of cards in play
+        """
+        return self.order[self._is_face_up[self.card_locations[self.order]]]
+
+    def show_cards(self, cards: np.ndarray, with_index: bool = False):  # pylint: disable=arguments-differ
+        """Convenience method to print cards.
+
+        Args:
+            cards (array): ids of cards to print
+            with_index (bool): if True, print index of each card
+        """
+        for index, card in enumerate(cards):
+            if with_index:
+                print(f'{index + 1}: ', end='')
+            print(self.card_descriptions[card])
+
+    @staticmethod
+    def choose_card(context, hand: np.ndarray, possible_cards: list) -> int:
+        """Convenience method to get input from user.
+
+        Args:
+            context (FastTute): game
+            hand (array): ids of cards in hand
+            possible_cards (list): list of possible card indices
+
+        Returns:
+            int: id of choosen card.
+        """
+        context.show_cards(hand, with_index=True)
+
+        while True:
+            choice = input(' '.join([f'{_ + 1} '
+                                     for _ in possible_cards]) + '? ')
+            try:
+                if int(choice) - 1 in possible_cards:
+                    break
+            except ValueError:
+                continue
+        return hand[int(choice) - 1]
+
+    def do_trick(self) -> int:
+        """Process trick.
+
+        Returns:
+            int: number of player who won the trick
+        """
+        face_up = self.get_face_up()
+        if self.use_tables:
+            winning_card = face_up[trick_winner(face_up, self.suit,
+                                                self.trump_suit,
+                                                self.num_players)]
+        else:
+            suits = self.card_suits[face_up]
+            candidates = suits == self.trump_suit
+            if not candidates.any():
+                candidates = suits == self.suit
+            candidates = face_up[candidates]
+            winning_card = candidates[np.argmin(
+                self.card_rankings[candidates])]
+        winning_player = int(
+            self._players[self.card_locations[winning_card]])
+        for card in face_up:
+            self._move(card, self._tricks[winning_player])
+        return winning_player
+
+    def calc_points(self, player: int) -> int:
+        """Tot up points for player.
+
+        Args:
+            player (int): number of player for which to calculate points.
+        """
+        points = 0
+        if player == self.last_trick_winner:
+            points += 10
+
+        for cante in self.cantes.items():
+            if cante[1] == player:
+                points += 40 if cante[0] == self.trump_suit else 20
+
+        return points + self.bitboards.points(
+            self.location_masks[self._tricks[player]])
+
+    def deal_new_cards(self, winning_player: int):
+        """Deal cards from pile, starting with player who won the trick.
+
+        Args:
+            Winning_player (int): number of player who won the last trick
+        """
+        to_deal = np.concatenate(
+            [self.get_cards_in('pile'),
+             self.get_cards_in('trump')])
+
+        if len(to_deal) >= self.num_players:
+            for dealt in range(self.num_players):
+                player = (winning_player + dealt) % self.num_players
+                self._move(to_deal[dealt], self._hands[player])
+                if self.events is not None:
+                    self.events.append(
+                        (self.DEALT, player, int(to_deal[dealt]), -1))
+
+    def get_follow_suit(self) -> bool:
+        """Determines whether player has to follow suit or not.
+
+        Returns:
+            bool: if True, suit must be followed
+        """
+        return self.bitboards.get_follow_suit(
+            self.location_masks[self.locations['pile']]
+            | self.location_masks[self.locations['trump']], self.habanero)
+
+    def get_face_up_mask(self) -> int:
+        """Get cards in play.
+
+        Returns:
+            int: bitboard of cards in play
+        """
+        face_up = 0
+        for location in self._face_ups:
+            face_up |= self.location_masks[location]
+        return face_up
+
+    def get_possible_mask(self, player: int) -> int:
+        """Determine which cards can be played from the player's hand.
+
+        Args:
+            player (int): number of player whose turn it is.
+
+        Returns:
+            int: bitboard of possible cards.
+        """
+        return self.bitboards.get_possible_cards(
+            self.location_masks[self._hands[player]], self.get_face_up_mask(),
+            self.suit, self.trump_suit, self.get_follow_suit())
+
+    def get_possible_cards(self, face_up: np.ndarray,
+                           hand: np.ndarray) -> np.ndarray:
+        """Determine which cards can be played from the hand.
+
+        Args:
+            face_up (array): ids of cards in play.
+            hand (array): ids of cards in hand.
+
+        Returns:
+            array: mask of possible cards in hand.
+        """
+        if self.use_tables and len(face_up) > 0 and self.get_follow_suit():
+            return must_play(hand, face_up, self.suit, self.trump_suit,
+                             self.num_players)
+
+        possible_cards = self.bitboards.get_possible_cards(
+            self.bitboards.from_cards(hand), self.bitboards.from_cards(face_up),
+            self.suit, self.trump_suit, self.get_follow_suit())
+        return np.array([bool(possible_cards >> card & 1) for card in hand],
+                        dtype=bool)
+
+    def swap_trump(self):
+        """Automatically swap trump card if possible.
+        """
+        swaps = self.bitboards.swap_trump(
+            self.location_masks[self.locations['trump']],
+            [self.location_masks[hand] for hand in self._hands],
+            self.trump_suit)
+        for player, trump, trump_swap in swaps:
+            trump = trump.bit_length() - 1
+            trump_swap = trump_swap.bit_length() - 1
+            self._move(trump_swap, self.locations['trump'])
+            self._move(trump, self._hands[player])
+            self.show([trump])
+            if self.events is not None:
+                self.events.append(
+                    (self.SWAPPED_TRUMP, player, trump, trump_swap))
+
+    def cantar(self, player: int):
+        """Automatically "cantar".
+
+        Args:
+            player (int): number of player who is "cantando"
+        """
+
+        # To simplify we are going to "cantar" greedily.
+        # Also, we are not going to allow "cantar tute".
+
+        suit = self.bitboards.cantar(self.location_masks[self._hands[player]],
+                                     self.trump_suit, self.cantes)
+        if suit is not None:
+            self.cantes[suit] = player
+            self.show(
+                self.bitboards.to_cards(self.bitboards.caballo_and_rey[suit]))
+            if self.events is not None:
+                self.events.append((self.CANTE, player, suit, -1))
+
+    def pre_move(self, player) -> list:
+        """Everything in a turn before player's move.
+
+        Args:
+            player (int): number of player whose turn it is.
+
+        Returns:
+            list: list of possible card indices
+        """
+        if self.habanero:
+            self.swap_trump()
+
+        possible_cards = self.get_possible_mask(player)
+        return [
+            index for index, card in enumerate(self.get_hand(player))
+            if possible_cards >> card & 1
+        ]
+
+    def post_move(self, card: int) -> int:
+        """Everything in a turn after player's move.
+
+        Args:
+            card (int): id of card being played
+
+        Returns:
+            int: number of trick swinning player (or None)
+        """
+        num_face_up = self.bitboards.count(self.get_face_up_mask())
+        if num_face_up == 1:
+            self.suit = int(self.card_suits[card])
+            return None
+
+        winning_player = None
+        if num_face_up == self.num_players:
+            winning_player = self.do_trick()
+            if self.num_players != 2 or self.location_masks[
+                    self.locations['pile']]:
+                self.cantar(winning_player)  # before dealing new cards
+            self.deal_new_cards(winning_player)
+            if not self.location_masks[self._hands[winning_player]]:
+                self.last_trick_winner = winning_player
+
+        return winning_player
+
+    def play_turn(self, player: int, choose_card: Callable = None) -> int:
+        """Play turn.
+
+        Args:
+            player (int): number of player whose turn it is.
+            choose_card (function): function to choose card (see FastTute.choose_card).
+        """
+        choose_card = choose_card or self.choose_card
+        possible_cards = self.pre_move(player)
+        card = choose_card(self, self.get_hand(player), possible_cards)
+        if self.events is not None:
+            self.events.append((self.PLAYED, player, int(card), -1))
+        self.move(card, f'player {player + 1} face up')
+        winning_player = self.post_move(card)
+        if winning_player is not None and self.events is not None:
+            self.events.append((self.TRICK_WON, winning_player, -1, -1))
+        return winning_player
@@ -0,0 +1,317 @@
+"""Replay buffer of TuteEnv transitions in memory-mapped NumPy files.
+
+Transitions are written to preallocated .npy files in a directory, so that
+they do not need to fit in memory and several processes can sample from the
+same buffer at the same time through the page cache.
+"""
+import json
+import os
+
+import numpy as np
+from rlcard.utils import reorganize
+
+from .tute import Tute
+
+# number of transitions whose priorities are summed together, so that
+# prioritized sampling does not need to read all the priorities
+BLOCK_SIZE = 4096
+
+
+class ReplayBuffer:
+    """Ring buffer of transitions (observation, legal actions, action, reward
+    and done) in memory-mapped files.
+
+    Observations can be stored in compact form (see ReplayBuffer.compact_obs),
+    which is over 10 times smaller than the observations of TuteEnv.
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        """Open existing replay buffer (see ReplayBuffer.create).
+
+        Args:
+            path (str): directory of replay buffer
+            writable (bool): if True, transitions and priorities can be written
+        """
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as file:
+            meta = json.load(file)
+        self.path = path
+        self.capacity = meta['capacity']
+        self.num_cards = meta['num_cards']
+        self.num_locations = meta['num_locations']
+        self.compact = meta['compact']
+
+        mode = 'r+' if writable else 'r'
+        for name in [
+                'obs', 'legal_actions', 'action', 'reward', 'done',
+                'priority', 'priority_blocks', 'count'
+        ]:
+            setattr(self, name,
+                    np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode))
+        self._max_priority = 1.0
+
+    @classmethod
+    def create(cls,
+               path: str,
+               capacity: int,
+               num_cards: int = 40,
+               num_locations: int = 15,
+               compact: bool = True) -> 'ReplayBuffer':
+        """Create an empty replay buffer, preallocating its files.
+
+        Args:
+            path (str): directory of replay buffer
+            capacity (int): maximum number of transitions (the oldest ones are
+                            overwritten after that)
+            num_cards (int): number of cards (size of action space)
+            num_locations (int): number of locations (see Tute.locations)
+            compact (bool): if True, store observations in compact form
+
+        Returns:
+            ReplayBuffer: writable replay buffer
+        """
+        os.makedirs(path, exist_ok=True)
+        obs_shape = (num_cards + 3,) if compact else (num_locations,
+                                                       num_cards + 1)
+        for name, dtype, shape in [
+            ('obs', np.int8 if compact else np.float32,
+             (capacity,) + obs_shape),
+            ('legal_actions', bool, (capacity, num_cards)),
+            ('action', np.int16, (capacity,)),
+            ('reward', np.float32, (capacity,)),
+            ('done', bool, (capacity,)),
+            ('priority', np.float32, (capacity,)),
+            ('priority_blocks', np.float64, (-(-capacity // BLOCK_SIZE),)),
+            ('count', np.int64, (1,)),
+        ]:
+            np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'),
+                                      mode='w+',
+                                      dtype=dtype,
+                                      shape=shape).flush()
+        with open(os.path.join(path, 'meta.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(
+                {
+                    'capacity': capacity,
+                    'num_cards': num_cards,
+                    'num_locations': num_locations,
+                    'compact': compact
+                }, file)
+        return cls(path, writable=True)
+
+    @classmethod
+    def for_env(cls,
+                path: str,
+                env,
+                capacity: int,
+                compact: bool = True) -> 'ReplayBuffer':
+        """Create an empty replay buffer for the transitions of an environment.
+
+        Args:
+            path (str): directory of replay buffer
+            env (TuteEnv): environment
+            capacity (int): maximum number of transitions
+            compact (bool): if True, store observations in compact form
+
+        Returns:
+            ReplayBuffer: writable replay buffer
+        """
+        return cls.create(path,
+                          capacity,
+                          num_cards=env.game.num_cards,
+                          num_locations=len(env.game.locations),
+                          compact=compact)
+
+    def __len__(self) -> int:
+        return int(min(self.count[0], self.capacity))
+
+    @staticmethod
+    def compact_obs(obs: np.ndarray) -> np.ndarray:
+        """Encode observations of TuteEnv as suit, trump suit, follow suit and
+        location of each card.
+
+        Args:
+            obs (array): observations, with shape (..., locations, cards + 1)
+
+        Returns:
+            array: compact observations, with shape (..., cards + 3)
+        """
+        num_suits = len(Tute.suits)
+        compact = np.empty(obs.shape[:-2] + (obs.shape[-1] + 2,),
+                           dtype=np.int8)
+        compact[..., 0] = obs[..., :num_suits, 0].argmax(axis=-1)
+        compact[..., 1] = obs[..., num_suits:2 * num_suits, 0].argmax(axis=-1)
+        compact[..., 2] = obs[..., 2 * num_suits, 0]
+        compact[..., 3:] = obs[..., 1:].argmax(axis=-2)
+        return compact
+
+    @staticmethod
+    def expand_obs(compact: np.ndarray, num_locations: int) -> np.ndarray:
+        """Decode compact observations (see ReplayBuffer.compact_obs).
+
+        Args:
+            compact (array): compact observations, with shape (..., cards + 3)
+            num_locations (int): number of locations
+
+        Returns:
+            array: observations, with shape (..., locations, cards + 1)
+        """
+        num_suits = len(Tute.suits)
+        one_hot = np.eye(num_locations, dtype=np.float32)
+        obs = np.empty(compact.shape[:-1] +
+                       (num_locations, compact.shape[-1] - 2),
+                       dtype=np.float32)
+        obs[..., 1:] = np.swapaxes(one_hot[compact[..., 3:]], -1, -2)
+        obs[..., 0] = (one_hot[compact[..., 0]] +
+                       one_hot[num_suits + compact[..., 1]] +
+                       compact[..., 2, np.newaxis] * one_hot[2 * num_suits])
+        return obs
+
+    def add(self,
+            obs: np.ndarray,
+            legal_actions,
+            action: int,
+            reward: float,
+            done: bool,
+            priority: float = None) -> int:
+        """Append transition, overwriting the oldest one if the buffer is full.
+
+        Args:
+            obs (array): observation of TuteEnv
+            legal_actions (iterable): ids of legal actions (or mask)
+            action (int): id of action taken
+            reward (float): reward
+            done (bool): if True, the game is over
+            priority (float): priority for sampling (the highest so far if None)
+
+        Returns:
+            int: index of transition
+        """
+        count = int(self.count[0])
+        index = count % self.capacity
+        self.obs[index] = self.compact_obs(obs) if self.compact else obs
+        if isinstance(legal_actions, np.ndarray) and legal_actions.dtype == bool:
+            self.legal_actions[index] = legal_actions
+        else:
+            self.legal_actions[index] = False
+            self.legal_actions[index, list(legal_actions)] = True
+        self.action[index] = action
+        self.reward[index] = reward
+        self.done[index] = done
+
+        priority = self._max_priority if priority is None else priority
+        self.priority_blocks[index // BLOCK_SIZE] += priority - float(
+            self.priority[index])
+        self.priority[index] = priority
+        self._max_priority = max(self._max_priority, priority)
+
+        # make the transition visible to readers once it is written
+        self.count[0] = count + 1
+        return index
+
+    def add_trajectories(self, trajectories: list, payoffs: list):
+        """Append transitions of games played with TuteEnv.run.
+
+        Args:
+            trajectories (list): trajectories of each player
+            payoffs (list): payoffs of each player
+        """
+        for transitions in reorganize(trajectories, payoffs):
+            for state, action, reward, _, done in transitions:
+                self.add(state['obs'], state['legal_actions'], action, reward,
+                         done)
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray):
+        """Update priorities of transitions (for example, with their TD errors).
+
+        Args:
+            indices (array): indices of transitions
+            priorities (array): new priorities
+        """
+        self.priority[indices] = priorities
+        self._max_priority = max(self._max_priority, float(np.max(priorities)))
+        for block in np.unique(np.asarray(indices) // BLOCK_SIZE):
+            self.priority_blocks[block] = self.priority[block * BLOCK_SIZE:(
+                block + 1) * BLOCK_SIZE].sum(dtype=np.float64)
+
+    def _sample_prioritized(self, batch_size: int,
+                            rng: np.random.Generator) -> np.ndarray:
+        """Sample indices with probability proportional to their priority.
+
+        Args:
+            batch_size (int): number of transitions
+            rng (Generator): random number generator
+
+        Returns:
+            array: indices
+        """
+        size = len(self)
+        cumulative = np.cumsum(self.priority_blocks[:-(-size // BLOCK_SIZE)])
+        targets = rng.random(batch_size) * cumulative[-1]
+        blocks = np.minimum(np.searchsorted(cumulative, targets, side='right'),
+                            len(cumulative) - 1)
+        targets -= cumulative[blocks] - self.priority_blocks[blocks]
+
+        indices = np.empty(batch_size, dtype=np.int64)
+        for block in np.unique(blocks):
+            start = block * BLOCK_SIZE
+            within = np.cumsum(self.priority[start:min(start + BLOCK_SIZE, size)],
+                               dtype=np.float64)
+            samples = blocks == block
+            indices[samples] = start + np.minimum(
+                np.searchsorted(within, targets[samples], side='right'),
+                len(within) - 1)
+        return indices
+
+    def sample(self,
+               batch_size: int,
+               prioritized: bool = False,
+               beta: float = 0.4,
+               expand: bool = False,
+               rng: np.random.Generator = None) -> dict:
+        """Sample a minibatch of transitions, reading only those transitions.
+
+        Args:
+            batch_size (int): number of transitions
+            prioritized (bool): if True, sample in proportion to priorities
+            beta (float): exponent of importance sampling weights
+            expand (bool): if True, expand compact observations
+            rng (Generator): random number generator
+
+        Returns:
+            dict: indices, transitions and (if prioritized) importance sampling
+                  weights
+        """
+        size = len(self)
+        assert size > 0
+        rng = rng or np.random.default_rng()
+        if prioritized:
+            indices = np.sort(self._sample_prioritized(batch_size, rng))
+        else:
+            indices = np.sort(rng.integers(size, size=batch_size))
+
+        obs = self.obs[indices]
+        if expand and self.compact:
+            obs = self.expand_obs(obs, self.num_locations)
+        batch = {
+            'indices': indices,
+            'obs': obs,
+            'legal_actions': self.legal_actions[indices],
+            'action': self.action[indices],
+            'reward': self.reward[indices],
+            'done': self.done[indices]
+        }
+        if prioritized:
+            probabilities = self.priority[indices] / np.sum(
+                self.priority_blocks)
+            weights = (size * probabilities)**-beta
+            batch['weights'] = weights / weights.max()
+        return batch
+
+    def flush(self):
+        """Write changes to disk.
+        """
+        for name in [
+                'obs', 'legal_actions', 'action', 'reward', 'done',
+                'priority', 'priority_blocks', 'count'
+        ]:
+            getattr(self, name).flush()
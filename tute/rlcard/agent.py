@@ -52,13 +52,13 @@ class TuteHumanAgent(object):
         print('\n=============== Your Hand ===============')
         hand = self.tute.get_hand(self.player)
         possible_cards = [
-            index for index, card in enumerate(hand.T.iteritems())
-            if card[1].name in state['raw_legal_actions']
+            index for index, card in enumerate(self.tute.card_ids(hand))
+            if card in state['raw_legal_actions']
         ]
         card = self.tute.choose_card(self.tute, hand, possible_cards)
         print()
 
-        return card.name
+        return self.tute.card_id(card)
 
     def eval_step(self, state):
         """Predict the action given the curent state for evaluation. The same to step here.
@@ -70,3 +70,53 @@ class TuteHumanAgent(object):
             action (int): the action predicted (randomly chosen) by the random agent
         """
         return self.step(state), {}
+
+
+class TuteChooseCardAgent(object):
+    """An agent that plays with a function to choose a card, as passed to
+    Tute.play_turn (see Tute.choose_card).
+    """
+
+    def __init__(self, player, tute, choose_card):
+        """Initialize the agent.
+
+        Args:
+            player (int): number of player
+            tute (Tute): game (such as the TuteGame of a TuteEnv)
+            choose_card (function): function to choose card, given the game,
+                the cards in hand and the indices in hand of possible cards
+        """
+        self.use_raw = False
+
+        self.player = player
+        self.tute = tute
+        self.choose_card = choose_card
+
+    def step(self, state):
+        """Choose a card.
+
+        Args:
+            state (dict): A dictionary that represents the current state
+
+        Returns:
+            action (int): id of card to play
+        """
+        hand = self.tute.get_hand(self.player)
+        possible_cards = [
+            index for index, card in enumerate(self.tute.card_ids(hand))
+            if card in state['raw_legal_actions']
+        ]
+        return self.tute.card_id(
+            self.choose_card(self.tute, hand, possible_cards))
+
+    def eval_step(self, state):
+        """Choose a card for evaluation. The same as step here.
+
+        Args:
+            state (dict): A dictionary that represents the current state
+
+        Returns:
+            action (int): id of card to play
+            info (dict): empty
+        """
+        return self.step(state), {}
@@ -0,0 +1,91 @@
+"""Run many TuteEnvs in one process, batching the decisions of agents.
+
+An agent with a step_batch(obs_batch, legal_mask_batch) method is asked for
+the actions of all the games that are waiting for it at once, given their
+observations stacked into one array and their masks of legal actions (see
+TuteGame.get_legal_actions_mask), and returns an array of action ids. Other
+agents are asked for one action at a time, as by rlcard's Env.run.
+"""
+import numpy as np
+
+
+def run_batch(envs: list, num_games: int = None,
+              is_training: bool = False) -> list:
+    """Play games in many environments at once.
+
+    Args:
+        envs (list): environments, with their agents set (the same agent can
+                     play in any number of environments and seats)
+        num_games (int): number of games to play (one in each environment if
+                         None), starting a new game in an environment as soon
+                         as its game is over
+        is_training (bool): if True, use the step method of agents that are
+                            not batched instead of eval_step
+
+    Returns:
+        list: trajectories and payoffs of each game, as returned by Env.run,
+              in the order the games were started
+    """
+    num_games = len(envs) if num_games is None else num_games
+    results = [None] * num_games
+    # game id, trajectories, state and current player of each environment
+    # playing a game
+    games = {}
+    num_started = 0
+
+    def _start(index):
+        nonlocal num_started
+        env = envs[index]
+        state, player = env.reset()
+        trajectories = [[] for _ in range(env.num_players)]
+        trajectories[player].append(state)
+        games[index] = (num_started, trajectories, state, player)
+        num_started += 1
+
+    for index in range(min(len(envs), num_games)):
+        _start(index)
+
+    while games:
+        # environments waiting for each agent
+        waiting = {}
+        for index, (_, _, _, player) in games.items():
+            agent = envs[index].agents[player]
+            waiting.setdefault(id(agent), (agent, []))[1].append(index)
+
+        actions = {}
+        for agent, indices in waiting.values():
+            if hasattr(agent, 'step_batch'):
+                obs_batch = np.stack(
+                    [games[index][2]['obs'] for index in indices])
+                legal_mask_batch = np.stack([
+                    envs[index].game.get_legal_actions_mask()
+                    for index in indices
+                ])
+                action_batch = agent.step_batch(obs_batch, legal_mask_batch)
+                actions.update(zip(indices, np.asarray(action_batch).tolist()))
+            else:
+                for index in indices:
+                    state = games[index][2]
+                    if is_training:
+                        actions[index] = agent.step(state)
+                    else:
+                        actions[index], _ = agent.eval_step(state)
+
+        for index, action in actions.items():
+            env = envs[index]
+            game_id, trajectories, _, player = games[index]
+            state, next_player = env.step(action, env.agents[player].use_raw)
+            trajectories[player].append(action)
+            if not env.is_over():
+                trajectories[next_player].append(state)
+                games[index] = (game_id, trajectories, state, next_player)
+                continue
+
+            for other_player in range(env.num_players):
+                trajectories[other_player].append(env.get_state(other_player))
+            results[game_id] = (trajectories, env.get_payoffs())
+            del games[index]
+            if num_started < num_games:
+                _start(index)
+
+    return results
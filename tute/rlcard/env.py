@@ -1,13 +1,18 @@
 """Tute env for RL Card.
 """
 
-from collections import OrderedDict
-
 import numpy as np
 
 from rlcard.envs import Env
 from .game import TuteGame
 
+DEFAULT_GAME_CONFIG = {
+    'game_num_players': 2,
+    'game_habanero': True,
+    'game_fast': False,
+    'game_headless': False,
+}
+
 
 class TuteEnv(Env):  # pylint: disable=abstract-method
     """Tute Environment.
@@ -15,7 +20,17 @@ class TuteEnv(Env):  # pylint: disable=abstract-method
 
     def __init__(self, config):
         self.name = 'tute'
-        self.game = TuteGame()
+        self.default_game_config = DEFAULT_GAME_CONFIG
+        game_config = {
+            key: config.get(key, default)
+            for key, default in self.default_game_config.items()
+        }
+        self.game = TuteGame(num_players=game_config['game_num_players'],
+                             habanero=game_config['game_habanero'],
+                             fast=game_config['game_fast'],
+                             headless=game_config['game_headless'],
+                             allow_step_back=config.get(
+                                 'allow_step_back', False))
         self.num_players = self.game.num_players
 
         assert len(self.game.locations) >= 2 * len(self.game.suits) + 1
@@ -23,12 +38,28 @@ class TuteEnv(Env):  # pylint: disable=abstract-method
             len(self.game.locations),
             # first row of state space one-hot encodes suit and trump_suit and follow_suit
             # the following rows one-hot encode the location of each card
-            len(self.game.deck) + 1
+            self.game.get_num_actions() + 1
         ]] * self.num_players
-        self.action_shape = [[len(self.game.deck)]] * self.num_players
+        self.action_shape = [[self.game.get_num_actions()]] * self.num_players
+
+        # observation of each player, updated in place as cards move or are
+        # shown (after the locations known by each player are updated)
+        self._obs = np.zeros([self.num_players] + self.state_shape[0])
+        self._players = np.arange(self.num_players)
+        self.game.listeners.append(self._update_obs)
 
         super().__init__(config=config)
 
+    def _update_obs(self, card: int):
+        """Update the location of card in the observation of each player.
+
+        Args:
+            card (int): id of card that has moved or been shown
+        """
+        self._obs[:, :, card + 1] = 0
+        self._obs[self._players, self.game.known_locations[:, card],
+                  card + 1] = 1
+
     def _extract_state(self, state: np.array) -> dict:
         """ Encode state.
 
@@ -38,23 +69,19 @@ class TuteEnv(Env):  # pylint: disable=abstract-method
         Returns:
             dict: encoded state
         """
-        suit = np.eye(len(self.game.suits))[state['suit'] or 0]
-        trump_suit = np.eye(len(self.game.suits))[state['trump_suit']]
-        deck = np.eye(len(self.game.locations))[state['locations']]
-        follow_suit = [self.game.get_follow_suit()]
-        obs = np.concatenate([
-            np.concatenate([
-                suit, trump_suit, follow_suit,
-                np.zeros(
-                    len(self.game.locations) - 2 * len(self.game.suits) - 1)
-            ])[:, np.newaxis].transpose(), deck
-        ],
-                             axis=0).transpose()
+        legal_actions = self._get_legal_actions()
+
+        # first column one-hot encodes suit and trump_suit and follow_suit
+        obs = self._obs[state['player']].copy()
+        obs[:, 0] = 0
+        obs[state['suit'] or 0, 0] = 1
+        obs[len(self.game.suits) + state['trump_suit'], 0] = 1
+        obs[2 * len(self.game.suits), 0] = self.game.get_follow_suit()
 
         extracted_state = {
             'obs': obs,
-            'legal_actions': self._get_legal_actions(),
-            'raw_legal_actions': list(self._get_legal_actions().keys())
+            'legal_actions': legal_actions,
+            'raw_legal_actions': list(legal_actions.keys())
         }
         extracted_state['raw_obs'] = obs
         return extracted_state
@@ -84,8 +111,6 @@ class TuteEnv(Env):  # pylint: disable=abstract-method
         """Get all legal actions for current state.
 
         Returns:
-            dict: a list of legal action ids
+            OrderedDict: legal action ids (cached, so not to be modified)
         """
-        legal_actions = self.game.get_legal_actions()
-        legal_actions_ids = {action: None for action in legal_actions}
-        return OrderedDict(legal_actions_ids)
+        return self.game.get_legal_actions_dict()
@@ -1,57 +1,236 @@
 """Tute card game with RL Card.
 """
-from typing import Tuple
+from __future__ import annotations
 
-import pandas as pd
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Tuple
 
-from tute import Tute
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from tute import Tute, FastTute
+from tute.seeding import Seed
 
 
 class TuteGame(Tute):
     """Game class. This class will interact with outer environment.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.allow_step_back = False
+    def __new__(cls,
+                num_players: int = 2,
+                habanero: bool = True,
+                fast: bool = False,
+                headless: bool = False,
+                allow_step_back: bool = False):
+        # TuteGame(fast=True) is a FastTuteGame
+        if fast and not issubclass(cls, FastTute):
+            cls = FastTuteGame
+        return super().__new__(cls)
+
+    def __init__(self,
+                 num_players: int = 2,
+                 habanero: bool = True,
+                 fast: bool = False,
+                 headless: bool = False,
+                 allow_step_back: bool = False):  # pylint: disable=unused-argument
+        """Initialize game.
+
+        Args:
+            num_players (int): number of players
+            habanero (bool): if True, play Tute Habanero
+            fast (bool): if True, use the NumPy engine (see FastTute)
+            headless (bool): if True, do not keep a log of events or messages
+            allow_step_back (bool): if True, keep the history of steps so that
+                                    they can be undone with step_back (this
+                                    can also be changed before init_game)
+        """
+        super().__init__(num_players=num_players,
+                         habanero=habanero,
+                         headless=headless)
+        self.allow_step_back = allow_step_back
         self.current_player = 0
 
-    def init_game(self):
+        # locations of cards as known by each player, updated as cards move or
+        # are shown, and where each player sees a card depending on whether it
+        # has been shown and where it is
+        self.known_locations = np.zeros((self.num_players, self.num_cards),
+                                        dtype=np.int8)
+        unknown = self.locations['unknown']
+        self._known_locations = np.tile(
+            np.arange(len(self.locations), dtype=np.int8)[:, np.newaxis],
+            (2, 1, self.num_players))
+        self._known_locations[:, self.locations['pile']] = unknown
+        for player in range(self.num_players):
+            for other_player in range(self.num_players):
+                if other_player != player:
+                    hand = self.locations[f'player {other_player + 1} hand']
+                    self._known_locations[0, hand, player] = unknown
+
+        # actual locations of cards, to know where they moved from
+        self._locations = np.full(self.num_cards,
+                                  self.locations['pile'],
+                                  dtype=np.int8)
+        self.listeners.append(self._update_locations)
+
+        # mask of legal card ids and the same as an OrderedDict for rlcard,
+        # computed when first asked for after each change of state
+        self._legal_actions = None
+
+        # undo stack of (checkpoint, moves) for each step, where moves are
+        # (card, location it moved from) since the checkpoint
+        self.history = []
+        self._checkpoint = None
+        self._moves = None
+
+    def _update_locations(self, card: int):
+        """Update the location of card, as known by each player.
+
+        Args:
+            card (int): id of card that has moved or been shown
+        """
+        self._legal_actions = None
+        location = self.get_location(card)
+        if self._moves is not None and location != self._locations[card]:
+            self._moves.append((card, self._locations[card]))
+        self._locations[card] = location
+        self.known_locations[:, card] = self._known_locations[int(
+            card in self.shown), location]
+
+    def _save_checkpoint(self):
+        """Save state that can change in a step, other than locations of cards.
+        """
+        self._checkpoint = (self.current_player, self.suit, dict(self.cantes),
+                            set(self.shown), self.last_trick_winner,
+                            None if self.events is None else len(self.events))
+        self._moves = [] if self.allow_step_back else None
+
+    def init_game(self, seed: Seed = None):
         """Initialize all characters in the game and start round 1.
+
+        Args:
+            seed (int, Generator or RandomState): seed or random number
+                generator to deal with (np_random if None)
         """
-        self.deck.location = self.locations['pile']
-        self.deal(self.current_player)
+        self.history = []
+        self._moves = None
+        self.deal(self.current_player, seed)
         self.current_player = (self.current_player + 1) % self.num_players
+        if self.habanero:
+            self.swap_trump()
+        self._legal_actions = None
+        self._save_checkpoint()
         return self.get_state(self.current_player), self.current_player
 
     def step(self, card: pd.DataFrame) -> Tuple[dict, int]:
         """Perform game action and return next player number, and the state for next player.
 
         Args:
-            action (int): action to perform (card to play)
+            action (int): action to perform (card to play, as returned by
+                          decode_action)
 
         Returns:
             dict: next player state
             int: next player
         """
-        assert card.location == self.locations[
+        card_id = self._card_id(card)
+        assert self.get_location(card_id) == self.locations[
             f'player {self.current_player + 1} hand']
-        self.messages += [
-            f'Player {self.current_player + 1} played {card.description}'
-        ]
+        if self.events is not None:
+            self.events.append((self.PLAYED, self.current_player, card_id, -1))
         self.move(card, f'player {self.current_player + 1} face up')
         winning_player = self.post_move(card)
         if winning_player is not None:
-            self.messages += [f'Player {winning_player + 1} won trick']
+            if self.events is not None:
+                self.events.append((self.TRICK_WON, winning_player, -1, -1))
             self.current_player = winning_player
         else:
             self.current_player = (self.current_player + 1) % self.num_players
+        if self.habanero:
+            self.swap_trump()
+        self._legal_actions = None
+        if self._moves is not None:
+            self.history.append((self._checkpoint, self._moves))
+        self._save_checkpoint()
         return self.get_state(self.current_player), self.current_player
 
-    def step_back(self):
+    @staticmethod
+    def _card_id(card: pd.DataFrame) -> int:
+        """Get the id of a card passed to step.
+
+        Args:
+            card (Series): card
+
+        Returns:
+            int: card id
+        """
+        return int(card.name)
+
+    def step_back(self) -> bool:
         """Takes one step backward and restore to the last state.
+
+        Returns:
+            bool: False if there are no steps to undo
         """
-        raise NotImplementedError
+        if len(self.history) == 0:
+            return False
+
+        # undo any moves since the last step (such as swapping the trump card)
+        moves, self._moves = self._moves, None
+        for card, location in reversed(moves):
+            self._move(card, location)
+
+        self._checkpoint, moves = self.history.pop()
+        self._legal_actions = None
+        (self.current_player, self.suit, cantes, shown, self.last_trick_winner,
+         num_events) = self._checkpoint
+        self.cantes = dict(cantes)
+        if self.events is not None:
+            del self.events[num_events:]
+            self._num_retrieved = min(self._num_retrieved, num_events)
+        shown, self.shown = self.shown ^ shown, set(shown)
+        for card, location in reversed(moves):
+            self._move(card, location)
+        for card in shown:
+            self._notify(card)
+        self._moves = []
+        return True
+
+    def snapshot(self) -> tuple:
+        """Take a snapshot of the state of the game, to restore it later.
+
+        Returns:
+            tuple: snapshot
+        """
+        return (self._locations.copy(), self.current_player, self.suit,
+                self.trump_suit, dict(self.cantes), set(self.shown),
+                self.last_trick_winner, list(self.history), self._checkpoint,
+                None if self._moves is None else list(self._moves),
+                None if self.events is None else list(self.events))
+
+    def restore(self, snapshot: tuple):
+        """Restore the state of the game from a snapshot of the same deal.
+
+        Args:
+            snapshot (tuple): snapshot (see TuteGame.snapshot)
+        """
+        (locations, self.current_player, self.suit, self.trump_suit, cantes,
+         shown, self.last_trick_winner, history, self._checkpoint, moves,
+         events) = snapshot
+        self._legal_actions = None
+        self._moves = None
+        self.cantes = dict(cantes)
+        shown, self.shown = self.shown ^ shown, set(shown)
+        for card in np.flatnonzero(locations != self._locations):
+            self._move(int(card), locations[card])
+        for card in shown:
+            self._notify(card)
+        self.history = list(history)
+        self._moves = None if moves is None else list(moves)
+        if events is not None:
+            self.events = list(events)
+            self._num_retrieved = min(self._num_retrieved, len(events))
 
     def get_num_players(self) -> int:
         """Return the number of players in the game.
@@ -67,7 +246,7 @@ class TuteGame(Tute):
         Returns:
             int: number of possible actions
         """
-        return len(self.deck)
+        return self.num_cards
 
     def get_player_id(self) -> int:
         """Return the current player that will take actions soon.
@@ -83,7 +262,8 @@ class TuteGame(Tute):
         Returns:
             bool: True if game has finished
         """
-        return len(self.get_hand(0)) == 0
+        # the player to move has no cards only once the last trick is done
+        return len(self.get_hand(self.current_player)) == 0
 
     def get_state(self, player: int) -> dict:
         """Returns everything the player can know about the state of the game.
@@ -92,36 +272,67 @@ class TuteGame(Tute):
             player (int): number of player
 
         Returns:
-            dict: current state known by player
+            dict: current state known by player (locations is updated in place
+                  as the game goes on, so copy it to keep it)
         """
-        cards = self.deck.copy()
-        for other_player in range(self.num_players):
-            if other_player == player:
-                continue
-
-            cards.loc[(cards.location == self.locations['pile']),
-                      'location'] = self.locations['unknown']
-
-            cards.loc[(cards.location ==
-                       self.locations[f'player {other_player + 1} hand']) &
-                      (~cards.index.isin(self.shown)),
-                      'location'] = self.locations['unknown']
-
         return {
+            'player': player,
             'suit': self.suit,
             'trump_suit': self.trump_suit,
-            'locations': cards.sort_index().location.to_list()
+            'locations': self.known_locations[player]
         }
 
+    def _get_legal_card_ids(self) -> list:
+        """Determine which cards the current player can play, without changing
+        the state of the game.
+
+        Returns:
+            list: ids of cards
+        """
+        hand = self.get_hand(self.current_player)
+        possible_cards = self.get_possible_cards(self.get_face_up(), hand)
+        return list(hand.index[np.asarray(possible_cards, dtype=bool)])
+
+    def _get_cached_legal_actions(self) -> tuple:
+        """Get the legal actions for the current state, computing them only
+        once until the state changes.
+
+        Returns:
+            tuple: mask of legal action ids and OrderedDict of legal action ids
+        """
+        if self._legal_actions is None:
+            card_ids = [int(card) for card in self._get_legal_card_ids()]
+            mask = np.zeros(self.num_cards, dtype=bool)
+            mask[card_ids] = True
+            mask.flags.writeable = False
+            self._legal_actions = (mask,
+                                   OrderedDict(
+                                       (card, None) for card in card_ids))
+        return self._legal_actions
+
     def get_legal_actions(self) -> list:
         """Get all legal actions for current state.
 
         Returns:
             list: a list of legal action ids
         """
-        possible_cards = self.pre_move(self.current_player)
-        hand = self.get_hand(self.current_player)
-        return [hand.iloc[card].name for card in possible_cards]
+        return list(self._get_cached_legal_actions()[1])
+
+    def get_legal_actions_mask(self) -> np.ndarray:
+        """Get all legal actions for current state as a mask.
+
+        Returns:
+            array: read-only mask of legal action ids, of size num_cards
+        """
+        return self._get_cached_legal_actions()[0]
+
+    def get_legal_actions_dict(self) -> OrderedDict:
+        """Get all legal actions for current state, as rlcard expects them.
+
+        Returns:
+            OrderedDict: legal action ids (not to be modified)
+        """
+        return self._get_cached_legal_actions()[1]
 
     def decode_action(self, action_id: int) -> pd.DataFrame:
         """Action id -> the action_event in the game.
@@ -133,3 +344,41 @@ class TuteGame(Tute):
             str: the action that will be passed to the game engine
         """
         return self.deck[self.deck.index == action_id].iloc[0]
+
+
+class FastTuteGame(TuteGame, FastTute):
+    """Game class using the NumPy engine. Actions are card ids.
+    """
+
+    @staticmethod
+    def _card_id(card: int) -> int:
+        """Get the id of a card passed to step.
+
+        Args:
+            card (int): card id
+
+        Returns:
+            int: card id
+        """
+        return int(card)
+
+    def _get_legal_card_ids(self) -> list:
+        """Determine which cards the current player can play, without changing
+        the state of the game.
+
+        Returns:
+            list: ids of cards
+        """
+        return self.bitboards.to_cards(
+            self.get_possible_mask(self.current_player))
+
+    def decode_action(self, action_id: int) -> int:
+        """Action id -> the action_event in the game.
+
+        Args:
+            action_id (int): the id of the action
+
+        Returns:
+            int: the action that will be passed to the game engine
+        """
+        return action_id
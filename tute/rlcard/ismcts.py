@@ -0,0 +1,441 @@
+"""Information set Monte Carlo tree search agent for Tute.
+"""
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tute import FastTute, Tute
+from tute.determinize import Determinizer
+from tute.endgame import EndgameSolver, is_endgame, solve_endgame
+from tute.seeding import derive_seed
+
+
+class Node:
+    """Node of the search tree, reached by a card played by a player.
+    """
+    __slots__ = ['player', 'children', 'visits', 'availability', 'reward']
+
+    def __init__(self, player: int = None):
+        """Initialize node.
+
+        Args:
+            player (int): number of player who played the card (None for root)
+        """
+        self.player = player
+        self.children = {}
+        self.visits = 0
+        self.availability = 0
+        self.reward = 0.0
+
+
+class Search:
+    """Single observer information set Monte Carlo tree search (Cowling et al.).
+
+    Each playout deals the hidden cards at random, consistently with what the
+    player knows, and plays the cards in the tree (choosing among those that
+    are legal in that deal with UCB) and then random cards to the end of the
+    game. The reward of each player is their share of the points.
+    """
+
+    def __init__(self,
+                 num_players: int,
+                 habanero: bool,
+                 exploration: float = 0.7,
+                 seed: int = None):
+        """Initialize search.
+
+        Args:
+            num_players (int): number of players
+            habanero (bool): if True, play Tute Habanero
+            exploration (float): exploration constant of UCB
+            seed (int): seed of random number generators
+        """
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.simulator = FastTute(num_players=num_players,
+                                  habanero=habanero,
+                                  headless=True)
+
+    def legal_cards(self, player: int) -> list:
+        """Get the cards the player can play in the simulator.
+
+        Args:
+            player (int): number of player
+
+        Returns:
+            list: card ids
+        """
+        if self.simulator.habanero:
+            self.simulator.swap_trump()
+        return self.simulator.bitboards.to_cards(
+            self.simulator.get_possible_mask(player))
+
+    def play(self, player: int, card: int) -> int:
+        """Play a card in the simulator.
+
+        Args:
+            player (int): number of player
+            card (int): card id
+
+        Returns:
+            int: number of next player
+        """
+        simulator = self.simulator
+        simulator._move(card, simulator._face_ups[player])  # pylint: disable=protected-access
+        winning_player = simulator.post_move(card)
+        if winning_player is None:
+            return (player + 1) % simulator.num_players
+        return winning_player
+
+    def is_over(self, player: int) -> bool:
+        """Determine whether the game in the simulator is over.
+
+        Args:
+            player (int): number of player whose turn it is
+
+        Returns:
+            bool: True if the game is over
+        """
+        return not self.simulator.location_masks[self.simulator._hands[player]]  # pylint: disable=protected-access
+
+    def run(self,
+            root: Node,
+            determinizer: Determinizer,
+            state: dict,
+            deadline: float,
+            max_playouts: int = None,
+            batch_size: int = 64) -> int:
+        """Run playouts from the root until the deadline or number of playouts.
+
+        Args:
+            root (Node): root of the tree
+            determinizer (Determinizer): sampler of deals
+            state (dict): public state of the game (see get_public_state)
+            deadline (float): time (as in time.time) to stop at
+            max_playouts (int): maximum number of playouts (no maximum if None)
+            batch_size (int): number of deals to sample at a time
+
+        Returns:
+            int: number of playouts
+        """
+        simulator = self.simulator
+        num_playouts = 0
+        while max_playouts is None or num_playouts < max_playouts:
+            locations, orders = determinizer.sample(batch_size, self.rng)
+            for deal in range(batch_size):
+                if time.time() >= deadline or num_playouts == max_playouts:
+                    return num_playouts
+
+                simulator.set_locations(locations[deal], orders[deal])
+                simulator.suit = state['suit']
+                simulator.trump_suit = state['trump_suit']
+                simulator.cantes = dict(state['cantes'])
+                simulator.last_trick_winner = state['last_trick_winner']
+                self.playout(root, determinizer.player)
+                num_playouts += 1
+        return num_playouts
+
+    def playout(self, root: Node, player: int):
+        """Select, expand, simulate and back propagate once.
+
+        Args:
+            root (Node): root of the tree
+            player (int): number of player whose turn it is
+        """
+        node = root
+        path = []
+        while not self.is_over(player):
+            legal_cards = self.legal_cards(player)
+            untried = [
+                card for card in legal_cards if card not in node.children
+            ]
+            if untried:
+                card = self.random.choice(untried)
+                node.children[card] = Node(player)
+            else:
+                log_availability = {
+                    card: math.log(node.children[card].availability + 1)
+                    for card in legal_cards
+                }
+                card = max(
+                    legal_cards,
+                    key=lambda card: node.children[card].reward / node.children[
+                        card].visits + self.exploration * math.sqrt(
+                            log_availability[card] / node.children[card].visits))
+            for legal_card in legal_cards:
+                if legal_card in node.children:
+                    node.children[legal_card].availability += 1
+            node = node.children[card]
+            path.append(node)
+            player = self.play(player, card)
+            if untried:
+                break
+
+        while not self.is_over(player):
+            player = self.play(player, self.random.choice(
+                self.legal_cards(player)))
+
+        points = [
+            self.simulator.calc_points(player)
+            for player in range(self.simulator.num_players)
+        ]
+        total = sum(points) or 1
+        for node in path:
+            node.visits += 1
+            node.reward += points[node.player] / total
+
+
+def get_public_state(game: Tute) -> dict:
+    """Get the state of the game, other than the locations of cards, that all
+    players know.
+
+    Args:
+        game (Tute): game
+
+    Returns:
+        dict: public state
+    """
+    return {
+        'suit': None if game.suit is None else int(game.suit),
+        'trump_suit': int(game.trump_suit),
+        'cantes': {int(suit): int(player) for suit, player in game.cantes.items()},
+        'last_trick_winner': game.last_trick_winner
+    }
+
+
+_searches = {}
+
+
+def search_root(num_players: int, habanero: bool, exploration: float,
+                determinizer: Determinizer, state: dict, deadline: float,
+                max_playouts: int, seed: int) -> dict:
+    """Search from a new tree, such as in a worker process.
+
+    Args:
+        num_players (int): number of players
+        habanero (bool): if True, play Tute Habanero
+        exploration (float): exploration constant of UCB
+        determinizer (Determinizer): sampler of deals
+        state (dict): public state of the game (see get_public_state)
+        deadline (float): time (as in time.time) to stop at
+        max_playouts (int): maximum number of playouts (no maximum if None)
+        seed (int): seed of random number generators
+
+    Returns:
+        dict: visits and reward of each card at the root
+    """
+    key = (num_players, habanero, exploration)
+    if key not in _searches:
+        _searches[key] = Search(num_players, habanero, exploration)
+    search = _searches[key]
+    search.random.seed(seed)
+    search.rng = np.random.default_rng(seed)
+    root = Node()
+    search.run(root, determinizer, state, deadline, max_playouts)
+    return {
+        card: (child.visits, child.reward)
+        for card, child in root.children.items()
+    }
+
+
+class TuteISMCTSAgent:
+    """An agent that plays Tute with information set Monte Carlo tree search.
+
+    The agent needs the game it plays (with a log of events, so not headless)
+    to know what its player has seen. It searches for a time or a number of
+    playouts per move, in this process and in parallel in worker processes
+    from the same root, and reuses the subtree of the moves played since its
+    last move.
+    """
+
+    def __init__(self,
+                 player: int,
+                 tute: Tute,
+                 time_limit: float = 0.1,
+                 max_playouts: int = None,
+                 num_workers: int = 0,
+                 exploration: float = 0.7,
+                 seed: int = None,
+                 endgame: bool = True):
+        """Initialize the agent.
+
+        Args:
+            player (int): number of player
+            tute (Tute): game (such as the TuteGame of a TuteEnv)
+            time_limit (float): time in seconds to search for each move (no
+                                limit if None)
+            max_playouts (int): maximum number of playouts per move and process
+                                (no maximum if None)
+            num_workers (int): number of worker processes to search in
+            exploration (float): exploration constant of UCB
+            seed (int): seed of random number generators
+            endgame (bool): if True, solve the end of two player games exactly
+                            (see tute.endgame) instead of searching
+        """
+        assert time_limit is not None or max_playouts is not None
+        self.use_raw = False
+
+        self.player = player
+        self.tute = tute
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.num_workers = num_workers
+        self.exploration = exploration
+        self.seed = seed
+        self.endgame = endgame
+        self.search = Search(tute.num_players, tute.habanero, exploration, seed)
+        self._executor = None
+        self._root = Node()
+        self._events = None
+        self._num_events = 0
+        self._num_searches = 0
+        self._solver = None
+
+    def reseed(self, seed: int):
+        """Seed the random number generators, such as at the start of a game,
+        so that the game does not depend on the games played before it.
+
+        Args:
+            seed (int): seed of random number generators
+        """
+        self.seed = seed
+        self.search.random.seed(seed)
+        self.search.rng = np.random.default_rng(seed)
+        self._num_searches = 0
+        self._root = Node()
+        self._events = None
+
+    def close(self):
+        """Shut down worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_root(self) -> Node:
+        """Get the root of the tree, reusing the subtree of the cards played
+        since the last search.
+
+        Returns:
+            Node: root
+        """
+        events = self.tute.events
+        if events is None:
+            raise ValueError('TuteISMCTSAgent requires the log of events')
+
+        if events is not self._events or len(events) < self._num_events:
+            # new deal, or moves taken back
+            self._root = Node()
+        else:
+            for event_type, _, card, _ in events[self._num_events:]:
+                if event_type == Tute.PLAYED:
+                    self._root = self._root.children.get(card) or Node()
+        self._root.player = None
+        self._events = events
+        self._num_events = len(events)
+        return self._root
+
+    def choose(self, legal_cards: list) -> tuple:
+        """Choose a card by searching.
+
+        Args:
+            legal_cards (list): ids of cards that can be played
+
+        Returns:
+            tuple: card id and visits of each legal card
+        """
+        root = self._get_root()
+        if len(legal_cards) == 1:
+            return legal_cards[0], {legal_cards[0]: 1}
+
+        if self.endgame and is_endgame(self.tute):
+            if (self._solver is None
+                    or self._solver.trump_suit != self.tute.trump_suit):
+                self._solver = EndgameSolver(int(self.tute.trump_suit))
+            card = solve_endgame(self.tute, self.player, self._solver)[1]
+            return card, {card: 1}
+
+        deadline = math.inf if self.time_limit is None else time.time(
+        ) + self.time_limit
+        determinizer = Determinizer(self.tute, self.player)
+        state = get_public_state(self.tute)
+
+        futures = []
+        if self.num_workers > 0:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.num_workers)
+            for worker in range(self.num_workers):
+                # an independent stream for each worker and search
+                seed = None if self.seed is None else derive_seed(
+                    self.seed, self._num_searches, worker)
+                futures.append(
+                    self._executor.submit(search_root,
+                                          self.tute.num_players,
+                                          self.tute.habanero,
+                                          self.exploration, determinizer,
+                                          state, deadline, self.max_playouts,
+                                          seed))
+        self._num_searches += 1
+
+        self.search.run(root, determinizer, state, deadline, self.max_playouts)
+        visits = {
+            card: root.children[card].visits if card in root.children else 0
+            for card in legal_cards
+        }
+        for future in futures:
+            for card, (child_visits, _) in future.result().items():
+                if card in visits:
+                    visits[card] += child_visits
+
+        return max(legal_cards, key=lambda card: visits[card]), visits
+
+    def step(self, state: dict) -> int:
+        """Choose an action for the current state of the game.
+
+        Args:
+            state (dict): A dictionary that represents the current state
+
+        Returns:
+            action (int): id of card to play
+        """
+        return self.choose(list(state['legal_actions']))[0]
+
+    def eval_step(self, state: dict) -> tuple:
+        """Choose an action for evaluation. The same as step here.
+
+        Args:
+            state (dict): A dictionary that represents the current state
+
+        Returns:
+            action (int): id of card to play
+            info (dict): share of visits of each legal action
+        """
+        card, visits = self.choose(list(state['legal_actions']))
+        total = sum(visits.values()) or 1
+        return card, {
+            'probs': {
+                action: count / total for action, count in visits.items()
+            }
+        }
+
+    def choose_card(self, context: Tute, hand, possible_cards: list):
+        """Choose a card to play from the hand (see Tute.choose_card).
+
+        Args:
+            context (Tute): game
+            hand (DataFrame): cards in hand
+            possible_cards (list): indices of cards in hand that can be played
+
+        Returns:
+            DataFrame: card to play
+        """
+        card_ids = context.card_ids(hand)
+        card = self.choose([int(card_ids[index])
+                            for index in possible_cards])[0]
+        index = next(index for index in possible_cards
+                     if card_ids[index] == card)
+        return hand[index] if isinstance(hand, np.ndarray) else hand.iloc[index]
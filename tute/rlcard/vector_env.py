@@ -0,0 +1,196 @@
+"""Many TuteEnvs stepped in lockstep in worker processes.
+"""
+import multiprocessing as mp
+
+import numpy as np
+from rlcard import make
+
+from tute.seeding import game_seed
+
+
+def _worker(pipe, config: dict, indices: range, seeds: list, arrays: dict,
+            shapes: dict):
+    """Run environments in a worker process, writing their observations and
+    legal actions to shared memory.
+
+    Args:
+        pipe (Connection): pipe to receive commands on and acknowledge them
+        config (dict): config of TuteEnv
+        indices (range): indices of environments in the shared arrays
+        seeds (list): seed of each environment
+        arrays (dict): shared arrays
+        shapes (dict): shape of each shared array
+    """
+    views = {
+        name: np.frombuffer(array, dtype=shapes[name][1]).reshape(
+            shapes[name][0])[indices.start:indices.stop]
+        for name, array in arrays.items()
+    }
+    envs = [make('tute', dict(config, seed=seed)) for seed in seeds]
+
+    def _write(index, env, state, player):
+        views['obs'][index] = state['obs']
+        views['legal_actions'][index] = env.game.get_legal_actions_mask()
+        views['player'][index] = player
+
+    try:
+        while True:
+            command, actions = pipe.recv()
+            if command == 'reset':
+                for index, env in enumerate(envs):
+                    _write(index, env, *env.reset())
+                views['done'][:] = False
+                views['payoffs'][:] = 0
+            elif command == 'step':
+                for index, (env, action) in enumerate(zip(envs, actions)):
+                    state, player = env.step(int(action))
+                    done = env.is_over()
+                    views['done'][index] = done
+                    if done:
+                        views['payoffs'][index] = env.get_payoffs()
+                        state, player = env.reset()
+                    else:
+                        views['payoffs'][index] = 0
+                    _write(index, env, state, player)
+            else:
+                break
+            pipe.send(True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipe.close()
+
+
+class TuteVectorEnv:
+    """Steps many TuteEnvs at once in worker processes, resetting each one as
+    soon as its game is over.
+
+    Observations, masks of legal actions, current players, payoffs and whether
+    games just finished are written by the workers to shared memory and
+    returned as NumPy arrays without copying, so they are overwritten by the
+    next reset or step.
+    """
+
+    def __init__(self,
+                 num_envs: int,
+                 config: dict = None,
+                 num_workers: int = None,
+                 seed: int = 0):
+        """Start worker processes.
+
+        Args:
+            num_envs (int): number of environments
+            config (dict): config of TuteEnv
+            num_workers (int): number of processes (number of CPUs, up to the
+                               number of environments, if None)
+            seed (int): base seed (each environment is seeded from it and its
+                        index, as in tute.selfplay)
+        """
+        config = dict(config or {})
+        config.pop('seed', None)
+        env = make('tute', config)
+        self.num_envs = num_envs
+        self.num_players = env.num_players
+        self.num_actions = env.num_actions
+        self.state_shape = env.state_shape
+        self.action_shape = env.action_shape
+
+        context = mp.get_context()
+        shapes = {
+            'obs': ((num_envs,) + tuple(env.state_shape[0]), np.float32),
+            'legal_actions': ((num_envs, env.num_actions), bool),
+            'player': ((num_envs,), np.int64),
+            'payoffs': ((num_envs, env.num_players), np.float32),
+            'done': ((num_envs,), bool),
+        }
+        arrays = {
+            name: context.RawArray(
+                'b',
+                int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            for name, (shape, dtype) in shapes.items()
+        }
+        for name, array in arrays.items():
+            shape, dtype = shapes[name]
+            setattr(self, name,
+                    np.frombuffer(array, dtype=dtype).reshape(shape))
+
+        num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self._slices = [
+            range(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        self._pipes = []
+        self._processes = []
+        for indices in self._slices:
+            pipe, worker_pipe = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(worker_pipe, config, indices,
+                      [game_seed(seed, index) for index in indices], arrays,
+                      shapes),
+                daemon=True)
+            process.start()
+            worker_pipe.close()
+            self._pipes.append(pipe)
+            self._processes.append(process)
+
+    def _wait(self):
+        """Wait for all workers to finish their commands.
+        """
+        for pipe in self._pipes:
+            pipe.recv()
+
+    def reset(self) -> tuple:
+        """Start new games in all environments.
+
+        Returns:
+            tuple: observations, masks of legal actions and current player of
+                   each environment
+        """
+        for pipe in self._pipes:
+            pipe.send(('reset', None))
+        self._wait()
+        return self.obs, self.legal_actions, self.player
+
+    def step(self, actions) -> tuple:
+        """Take an action in each environment, resetting those whose games are
+        over.
+
+        Args:
+            actions (array): id of action to take in each environment
+
+        Returns:
+            tuple: observations, masks of legal actions and current player of
+                   each environment (of the new game, if reset), payoffs of
+                   each player of the games that are over (0 otherwise) and
+                   whether each game is over
+        """
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,)
+        for pipe, indices in zip(self._pipes, self._slices):
+            pipe.send(('step', actions[indices.start:indices.stop].tolist()))
+        self._wait()
+        return (self.obs, self.legal_actions, self.player, self.payoffs,
+                self.done)
+
+    def close(self):
+        """Stop worker processes.
+        """
+        for pipe in self._pipes:
+            try:
+                pipe.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+            pipe.close()
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self._pipes = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
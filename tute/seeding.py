@@ -0,0 +1,102 @@
+"""Random number generators for dealing and independent streams of seeds.
+
+Streams are derived from a base seed and an id (of a game, deal or worker)
+with NumPy's SeedSequence, so they are independent of each other and of which
+process uses them. Any deal can be regenerated from the base seed and its id:
+    tute.deal(dealer, seed=deal_seed(base_seed, deal_id))
+"""
+from typing import Union
+
+import numpy as np
+
+Seed = Union[None, int, np.random.Generator, np.random.RandomState]
+
+# first key of streams of deals
+DEALS = 0
+
+
+def get_rng(seed: Seed = None):
+    """Get a random number generator.
+
+    Args:
+        seed (int, Generator or RandomState): seed of a new generator, or a
+            generator to use as is (NumPy's global one if None)
+
+    Returns:
+        Generator: random number generator
+    """
+    if seed is None:
+        return np.random
+    if isinstance(seed, (np.random.Generator, np.random.RandomState)):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def derive_seed(base_seed: int, *keys: int) -> int:
+    """Derive an independent seed from a base seed and a sequence of keys, such
+    as the id of a game or of a worker.
+
+    Args:
+        base_seed (int): base seed
+        keys (int): keys of stream
+
+    Returns:
+        int: 128-bit seed (so that seeds of different streams do not collide
+             even after billions of games)
+    """
+    high, low = np.random.SeedSequence(
+        base_seed, spawn_key=keys).generate_state(2, np.uint64).tolist()
+    return (high << 64) | low
+
+
+def legacy_seed(seed: int) -> int:
+    """Reduce a seed to 32 bits, for NumPy's legacy RandomState (such as
+    np.random.seed).
+
+    Args:
+        seed (int): seed of any width
+
+    Returns:
+        int: 32-bit seed
+    """
+    return int(np.random.SeedSequence(seed).generate_state(1)[0])
+
+
+def game_seed(base_seed: int, game_id: int) -> int:
+    """Derive the seed of a game from the base seed.
+
+    Args:
+        base_seed (int): base seed
+        game_id (int): game id
+
+    Returns:
+        int: seed
+    """
+    return derive_seed(base_seed, game_id)
+
+
+def deal_seed(base_seed: int, deal_id: int) -> int:
+    """Derive the seed of a deal from the base seed, independently of the seeds
+    of games (so that the same deal can be played in several games).
+
+    Args:
+        base_seed (int): base seed
+        deal_id (int): deal id
+
+    Returns:
+        int: seed
+    """
+    return derive_seed(base_seed, DEALS, deal_id)
+
+
+def deal_order(num_cards: int, seed: Seed = None) -> np.ndarray:
+    """Shuffle a deck.
+
+    Args:
+        num_cards (int): number of cards in deck
+        seed (int, Generator or RandomState): seed (see get_rng)
+
+    Returns:
+        array: card ids in the order they are dealt
+    """
+    return get_rng(seed).permutation(num_cards)
@@ -0,0 +1,222 @@
+"""Play many games of Tute between agents across processes.
+
+Each game is seeded from a base seed and its game id, and dealt from a seed
+derived from the base seed and its deal id, so that games do not depend on
+which worker plays them and can be replayed from their records. With
+duplicate deals, each group of as many games as players plays the same deal
+with each hand at each seat.
+
+Example:
+    python -m tute.selfplay --num_games 10000 --output games.jsonl
+"""
+import argparse
+import importlib
+import json
+import random
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Union
+
+import numpy as np
+from rlcard import make
+from rlcard.agents import RandomAgent
+
+from tute import rlcard  # pylint: disable=unused-import
+from tute.seeding import (deal_seed, derive_seed, game_seed, get_rng,
+                          legacy_seed)
+
+# seed of agents, seed of deal, player who dealt, ids of cards played in order
+# and payoff of each player
+GameRecord = namedtuple(
+    'GameRecord',
+    ['game_id', 'seed', 'deal_seed', 'dealer', 'actions', 'payoffs'])
+
+
+def random_agent(env) -> RandomAgent:
+    """Agent factory for an agent that plays random legal cards.
+
+    Args:
+        env (TuteEnv): environment
+
+    Returns:
+        RandomAgent: agent
+    """
+    return RandomAgent(num_actions=env.num_actions)
+
+
+def play_games(env_config: dict,
+               agent_factories: List[Callable],
+               base_seed: int,
+               game_ids: range,
+               duplicate: bool = False) -> List[GameRecord]:
+    """Play games in one worker.
+
+    Args:
+        env_config (dict): config of TuteEnv
+        agent_factories (list): functions that return an agent for each player,
+            given the environment
+        base_seed (int): base seed
+        game_ids (range): ids of games to play
+        duplicate (bool): if True, deal each deal to each seat in turn
+
+    Returns:
+        list: game records
+    """
+    env = make('tute', env_config)
+    env.set_agents([factory(env) for factory in agent_factories])
+    records = []
+    for game_id in game_ids:
+        seed = game_seed(base_seed, game_id)
+        deal = deal_seed(
+            base_seed,
+            game_id // env.num_players if duplicate else game_id)
+        dealer = game_id % env.num_players
+        env.game.np_random = get_rng(deal)
+        # agents may use the global random number generators
+        np.random.seed(legacy_seed(seed))
+        random.seed(seed)
+        # and others have their own (such as TuteISMCTSAgent)
+        for player, agent in enumerate(env.agents):
+            if hasattr(agent, 'reseed'):
+                agent.reseed(derive_seed(seed, player))
+        env.game.current_player = dealer
+        env.run(is_training=False)
+        actions = np.array(
+            [env.game.card_id(action) for _, action in env.action_recorder],
+            dtype=np.int8)
+        records.append(
+            GameRecord(game_id, seed, deal, dealer, actions,
+                       env.get_payoffs().tolist()))
+    return records
+
+
+def selfplay(num_games: int,
+             agent_factories: Union[Callable, List[Callable]] = random_agent,
+             env_config: dict = None,
+             base_seed: int = 0,
+             num_workers: int = None,
+             chunk_size: int = 100,
+             duplicate: bool = False) -> Iterator[GameRecord]:
+    """Play games in parallel, yielding records as they finish.
+
+    Args:
+        num_games (int): number of games
+        agent_factories (function or list): picklable functions that return an
+            agent given the environment, one for each player or one for all
+        env_config (dict): config of TuteEnv
+        base_seed (int): base seed
+        num_workers (int): number of processes (number of CPUs if None)
+        chunk_size (int): number of games to play in each task
+        duplicate (bool): if True, play each deal as many times as there are
+            players, with each hand at each seat (game ids with the same
+            quotient by the number of players share a deal)
+
+    Yields:
+        GameRecord: record of each game, in order of completion
+    """
+    env_config = env_config or {}
+    num_players = env_config.get('game_num_players', 2)
+    if callable(agent_factories):
+        agent_factories = [agent_factories] * num_players
+    assert len(agent_factories) == num_players
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(play_games, env_config, agent_factories, base_seed,
+                            range(start, min(start + chunk_size, num_games)),
+                            duplicate)
+            for start in range(0, num_games, chunk_size)
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def replay(record: GameRecord, env_config: dict = None) -> np.ndarray:
+    """Replay a game from its record.
+
+    Args:
+        record (GameRecord): record of game
+        env_config (dict): config of TuteEnv
+
+    Returns:
+        array: payoffs
+    """
+    env = make('tute', env_config or {})
+    env.game.np_random = get_rng(record.deal_seed)
+    env.game.current_player = record.dealer
+    env.reset()
+    for action in record.actions:
+        env.step(int(action))
+    assert env.is_over()
+    return env.get_payoffs()
+
+
+def load_agent_factory(name: str) -> Callable:
+    """Import agent factory from "module:function".
+
+    Args:
+        name (str): module and name of function
+
+    Returns:
+        function: agent factory
+    """
+    module, function = name.split(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def main():
+    """Play games and write records as JSON lines.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_games', type=int, default=1000)
+    parser.add_argument('--num_players', type=int, default=2)
+    parser.add_argument('--habanero',
+                        action=argparse.BooleanOptionalAction,
+                        default=True)
+    parser.add_argument('--fast',
+                        action=argparse.BooleanOptionalAction,
+                        default=True)
+    parser.add_argument('--agents',
+                        nargs='+',
+                        default=['tute.selfplay:random_agent'],
+                        help='module:function of agent factory for each '
+                        'player (or one for all)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--num_workers', type=int, default=None)
+    parser.add_argument('--chunk_size', type=int, default=100)
+    parser.add_argument('--duplicate',
+                        action='store_true',
+                        help='play each deal with each hand at each seat')
+    parser.add_argument('--output', type=str, default=None)
+    args = parser.parse_args()
+
+    agent_factories = [load_agent_factory(name) for name in args.agents]
+    if len(agent_factories) == 1:
+        agent_factories = agent_factories[0]
+    env_config = {
+        'game_num_players': args.num_players,
+        'game_habanero': args.habanero,
+        'game_fast': args.fast,
+        'game_headless': True,
+    }
+
+    output = open(args.output, 'w') if args.output else sys.stdout  # pylint: disable=consider-using-with
+    try:
+        for record in selfplay(args.num_games,
+                               agent_factories,
+                               env_config=env_config,
+                               base_seed=args.seed,
+                               num_workers=args.num_workers,
+                               chunk_size=args.chunk_size,
+                               duplicate=args.duplicate):
+            output.write(
+                json.dumps(record._replace(
+                    actions=record.actions.tolist())._asdict()) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,468 @@
+"""Asyncio server that hosts many tables of Tute for humans and bots.
+
+Clients connect over TCP (or a Unix socket) and exchange JSON objects, one per
+line. A client sends
+    {"type": "join", "num_players": 2, "bots": 1}
+to sit at a table with that many players, of which that many are bots, and
+    {"type": "play", "card": <card id>}
+to play a card when it is their turn. The server sends
+    {"type": "joined", "table": <table id>, "player": <number of player>}
+    {"type": "state", ...} whenever the table changes (see Table.get_view)
+    {"type": "over", "points": [<points of each player>]}
+    {"type": "error", "message": <message>}
+
+Bots play with information set Monte Carlo tree search (see
+tute.rlcard.ismcts) in a pool of worker processes, so that they never block
+the event loop. Each table only keeps a FastTute game and its seats.
+
+Example:
+    python -m tute.server --port 8765
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tute.determinize import Determinizer
+from tute.rlcard.game import TuteGame
+from tute.rlcard.ismcts import get_public_state, search_root
+
+logger = logging.getLogger('tute.server')
+
+
+def bot_move(num_players: int, habanero: bool, determinizer: Determinizer,
+             state: dict, legal_cards: list, deadline: float,
+             max_playouts: int, seed: int) -> int:
+    """Choose a card for a bot, in a worker process.
+
+    Args:
+        num_players (int): number of players
+        habanero (bool): if True, play Tute Habanero
+        determinizer (Determinizer): sampler of deals for the bot's player
+        state (dict): public state of the game (see get_public_state)
+        legal_cards (list): ids of cards that can be played
+        deadline (float): time (as in time.time) to stop searching at
+        max_playouts (int): maximum number of playouts
+        seed (int): seed of random number generators
+
+    Returns:
+        int: id of card to play
+    """
+    stats = search_root(num_players, habanero, 0.7, determinizer, state,
+                        deadline, max_playouts, seed)
+    return max(legal_cards, key=lambda card: stats.get(card, (0, 0))[0])
+
+
+class Table:
+    """A game of Tute and who is sitting at each seat.
+    """
+
+    def __init__(self, table_id: int, num_players: int, num_bots: int,
+                 habanero: bool):
+        """Initialize table, with the bots in the last seats.
+
+        Args:
+            table_id (int): table id
+            num_players (int): number of players
+            num_bots (int): number of players that are bots
+            habanero (bool): if True, play Tute Habanero
+        """
+        self.table_id = table_id
+        self.game = TuteGame(num_players=num_players,
+                             habanero=habanero,
+                             fast=True)
+        # queue of messages to send to the human at each seat (None for bots)
+        self.seats = [None] * num_players
+        self.num_bots = num_bots
+        self.started = False
+        self.playing_bots = False
+
+    @property
+    def free_seats(self) -> list:
+        """Seats for humans that are not taken.
+        """
+        return [
+            player
+            for player in range(self.game.num_players - self.num_bots)
+            if self.seats[player] is None
+        ]
+
+    def is_bot(self, player: int) -> bool:
+        """Determine whether a player is played by a bot (or has left).
+
+        Args:
+            player (int): number of player
+
+        Returns:
+            bool: True if player is a bot
+        """
+        return self.seats[player] is None
+
+    def get_view(self, player: int, messages: list) -> dict:
+        """Get what a player sees of the table.
+
+        Args:
+            player (int): number of player
+            messages (list): messages since the last view
+
+        Returns:
+            dict: state message
+        """
+        game = self.game
+        turn = game.current_player
+        trump = game.get_cards_in('trump')
+        return {
+            'type': 'state',
+            'player': player,
+            'turn': turn,
+            'hand': [int(card) for card in game.get_hand(player)],
+            'face_up': [int(card) for card in game.get_face_up()],
+            'trump': int(trump[0]) if len(trump) > 0 else None,
+            'trump_suit': int(game.trump_suit),
+            'follow_suit': bool(game.get_follow_suit()),
+            'legal_actions':
+                game.get_legal_actions() if turn == player else [],
+            'messages': messages
+        }
+
+    def broadcast(self):
+        """Send the state of the table (or the points, if the game is over)
+        to each human.
+        """
+        messages = self.game.retreive_messages()
+        is_over = self.game.is_over()
+        points = [
+            self.game.calc_points(player)
+            for player in range(self.game.num_players)
+        ] if is_over else None
+        for player, queue in enumerate(self.seats):
+            if queue is None:
+                continue
+            queue.put_nowait(self.get_view(player, messages))
+            if is_over:
+                queue.put_nowait({'type': 'over', 'points': points})
+
+
+class TuteServer:
+    """Hosts tables of Tute for clients connected to a socket.
+    """
+
+    def __init__(self,
+                 habanero: bool = True,
+                 think_time: float = 0.05,
+                 max_playouts: int = 2000,
+                 num_workers: int = None):
+        """Initialize server.
+
+        Args:
+            habanero (bool): if True, play Tute Habanero
+            think_time (float): maximum time in seconds for a bot to move,
+                                including waiting for a worker
+            max_playouts (int): maximum number of playouts for a bot move
+            num_workers (int): number of processes for bots (number of CPUs if
+                               None)
+        """
+        self.habanero = habanero
+        self.think_time = think_time
+        self.max_playouts = max_playouts
+        self.executor = ProcessPoolExecutor(num_workers)
+        self.tables = {}
+        # tables waiting for humans, indexed by number of players and bots
+        self.waiting = {}
+        self._table_ids = itertools.count()
+        # latencies in seconds of the latest bot moves
+        self.latencies = deque(maxlen=10000)
+        # running tasks, as the event loop only keeps weak references to them
+        self.tasks = set()
+
+    def close(self):
+        """Shut down worker processes.
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+    def create_task(self, coro) -> asyncio.Task:
+        """Run a coroutine in a task that is kept until it is done, and log
+        any exception it raises.
+
+        Args:
+            coro (coroutine): coroutine
+
+        Returns:
+            Task: task
+        """
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        """Forget a task that is done and log its exception, if any.
+
+        Args:
+            task (Task): task
+        """
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Task %s failed',
+                         task.get_name(),
+                         exc_info=task.exception())
+
+    def get_latency(self, percentile: float = 99) -> float:
+        """Get a percentile of the latency of bot moves.
+
+        Args:
+            percentile (float): percentile
+
+        Returns:
+            float: latency in seconds (None if no bot has moved)
+        """
+        if len(self.latencies) == 0:
+            return None
+        return float(np.percentile(self.latencies, percentile))
+
+    def join(self, queue: asyncio.Queue, num_players: int,
+             num_bots: int) -> tuple:
+        """Sit at a table that is waiting for humans, or a new one.
+
+        Args:
+            queue (Queue): queue of messages to send to the human
+            num_players (int): number of players
+            num_bots (int): number of players that are bots
+
+        Returns:
+            tuple: table and number of player
+        """
+        key = (num_players, num_bots)
+        table = self.waiting.get(key)
+        if table is None:
+            table = Table(next(self._table_ids), num_players, num_bots,
+                          self.habanero)
+            self.tables[table.table_id] = table
+            self.waiting[key] = table
+
+        player = table.free_seats[0]
+        table.seats[player] = queue
+        if len(table.free_seats) == 0:
+            del self.waiting[key]
+        return table, player
+
+    def leave(self, table: Table, player: int):
+        """Leave a table. A bot takes over the seat, or the table is closed
+        if there are no humans left.
+
+        Args:
+            table (Table): table
+            player (int): number of player
+        """
+        table.seats[player] = None
+        if all(queue is None for queue in table.seats):
+            self.tables.pop(table.table_id, None)
+            key = (table.game.num_players, table.num_bots)
+            if self.waiting.get(key) is table:
+                del self.waiting[key]
+
+    async def play_bots(self, table: Table):
+        """Play the moves of bots until it is the turn of a human.
+
+        Args:
+            table (Table): table
+        """
+        if table.playing_bots:
+            return
+        table.playing_bots = True
+        loop = asyncio.get_running_loop()
+        game = table.game
+        try:
+            while (not game.is_over() and table.is_bot(game.current_player)
+                   and table.table_id in self.tables):
+                start = time.time()
+                player = game.current_player
+                legal_cards = game.get_legal_actions()
+                if len(legal_cards) == 1:
+                    card = legal_cards[0]
+                else:
+                    card = await loop.run_in_executor(
+                        self.executor, bot_move, game.num_players,
+                        game.habanero, Determinizer(game, player),
+                        get_public_state(game), legal_cards,
+                        start + self.think_time, self.max_playouts,
+                        int(np.random.randint(2**31)))
+                game.step(card)
+                self.latencies.append(time.time() - start)
+                table.broadcast()
+        finally:
+            table.playing_bots = False
+
+    async def start_game(self, table: Table):
+        """Deal and play until it is the turn of a human.
+
+        Args:
+            table (Table): table with all its seats taken
+        """
+        table.started = True
+        table.game.init_game()
+        table.broadcast()
+        await self.play_bots(table)
+
+    async def play(self, table: Table, player: int, card: int) -> str:
+        """Play a human's card.
+
+        Args:
+            table (Table): table
+            player (int): number of player
+            card (int): id of card
+
+        Returns:
+            str: error message (None if the card was played)
+        """
+        game = table.game
+        if not table.started or game.is_over():
+            return 'game not in progress'
+        if game.current_player != player:
+            return 'not your turn'
+        if card not in game.get_legal_actions_dict():
+            return 'illegal card'
+        game.step(card)
+        table.broadcast()
+        await self.play_bots(table)
+        return None
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        """Handle the connection of a client.
+
+        Args:
+            reader (StreamReader): stream from client
+            writer (StreamWriter): stream to client
+        """
+        queue = asyncio.Queue()
+        sender = self.create_task(self._send(queue, writer))
+        table, player = None, None
+        try:
+            async for line in reader:
+                try:
+                    request = json.loads(line)
+                    if request['type'] == 'join' and (
+                            table is None or table.game.is_over()):
+                        num_players = int(request.get('num_players', 2))
+                        num_bots = int(request.get('bots', num_players - 1))
+                        if not (2 <= num_players <= 4
+                                and 0 <= num_bots < num_players):
+                            raise ValueError('invalid number of players')
+                        if table is not None:
+                            self.leave(table, player)
+                        table, player = self.join(queue, num_players,
+                                                  num_bots)
+                        queue.put_nowait({
+                            'type': 'joined',
+                            'table': table.table_id,
+                            'player': player
+                        })
+                        if len(table.free_seats) == 0:
+                            self.create_task(self.start_game(table))
+                    elif request['type'] == 'play' and table is not None:
+                        error = await self.play(table, player,
+                                                int(request['card']))
+                        if error is not None:
+                            queue.put_nowait({
+                                'type': 'error',
+                                'message': error
+                            })
+                    else:
+                        raise ValueError('unexpected request')
+                except (ValueError, KeyError, TypeError) as error:
+                    queue.put_nowait({'type': 'error', 'message': str(error)})
+        except ConnectionError:
+            pass
+        finally:
+            if table is not None:
+                self.leave(table, player)
+                if table.started and table.table_id in self.tables:
+                    self.create_task(self.play_bots(table))
+            sender.cancel()
+            writer.close()
+
+    @staticmethod
+    async def _send(queue: asyncio.Queue, writer: asyncio.StreamWriter):
+        """Send messages to a client as they are queued.
+
+        Args:
+            queue (Queue): queue of messages
+            writer (StreamWriter): stream to client
+        """
+        while True:
+            message = await queue.get()
+            try:
+                writer.write((json.dumps(message) + '\n').encode())
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                queue.task_done()
+
+    async def serve(self, host: str = 'localhost', port: int = 8765,
+                    path: str = None):
+        """Serve forever.
+
+        Args:
+            host (str): host to listen on
+            port (int): port to listen on
+            path (str): path of Unix socket to listen on instead
+        """
+        # many clients can connect at once
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle,
+                                                     path,
+                                                     backlog=4096)
+        else:
+            server = await asyncio.start_server(self.handle,
+                                                host,
+                                                port,
+                                                backlog=4096)
+        logger.info('Serving on %s', server.sockets[0].getsockname())
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Run server.
+    """
+    parser = argparse.ArgumentParser(description='Tute server.')
+    parser.add_argument('--host', type=str, default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix',
+                        type=str,
+                        default=None,
+                        help='path of Unix socket to listen on instead')
+    parser.add_argument('--habanero',
+                        action=argparse.BooleanOptionalAction,
+                        default=True)
+    parser.add_argument('--think_time',
+                        type=float,
+                        default=0.05,
+                        help='maximum time in seconds for a bot to move')
+    parser.add_argument('--max_playouts', type=int, default=2000)
+    parser.add_argument('--num_workers', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = TuteServer(habanero=args.habanero,
+                        think_time=args.think_time,
+                        max_playouts=args.max_playouts,
+                        num_workers=args.num_workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
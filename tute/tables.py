@@ -0,0 +1,103 @@
+"""Lookup tables to resolve tricks and follow suit, precomputed at import time.
+
+All tables are indexed by number of players, as this determines the deck, and
+by card id (the index of the card in Tute.deck).
+"""
+import numpy as np
+
+from .tute import Tute, get_card_table
+
+
+def _build_tables(num_players: int) -> tuple:
+    """Build lookup tables for the deck used with this number of players.
+
+    Args:
+        num_players (int): number of players
+
+    Returns:
+        tuple: strengths, beats and tiers tables
+    """
+    deck = get_card_table(num_players).deck
+    num_suits = len(Tute.suits)
+    suits = np.array([card['suit'] for card in deck.values()])
+    rankings = np.array([card['ranking'] for card in deck.values()])
+    lead_suits = np.arange(num_suits)[:, np.newaxis, np.newaxis]
+    trump_suits = np.arange(num_suits)[np.newaxis, :, np.newaxis]
+
+    # the card with the highest strength wins the trick
+    strengths = np.where(suits == trump_suits, 40 - rankings,
+                         np.where(suits == lead_suits, 20 - rankings,
+                                  0)).astype(np.int8)
+    beats = strengths[..., :, np.newaxis] > strengths[..., np.newaxis, :]
+
+    # tiers of cards in order of preference when following suit, given the
+    # trump suit, highest card of suit in play and highest trump in play (if
+    # any), as in Tute.get_possible_cards
+    trump_suits = np.arange(num_suits)[:, np.newaxis, np.newaxis, np.newaxis]
+    lead = np.arange(len(deck))[np.newaxis, :, np.newaxis, np.newaxis]
+    trump = np.arange(len(deck) + 1)[np.newaxis, np.newaxis, :, np.newaxis]
+    trump_rankings = np.append(rankings, 0)[trump]
+    same_suit = suits == suits[lead]
+    is_trump = suits == trump_suits
+    tiers = np.where(
+        same_suit & (rankings < rankings[lead]), 0,
+        np.where(
+            same_suit, 1,
+            np.where(is_trump & (rankings < trump_rankings), 2,
+                     np.where(is_trump, 3, 4)))).astype(np.int8)
+
+    return strengths, beats, tiers
+
+
+# strengths of each card indexed by suit of trick and trump suit
+STRENGTHS = {}
+# whether first card beats second card indexed by suit of trick and trump suit
+BEATS = {}
+# tier of each card indexed by trump suit, highest card of suit of trick in
+# play and highest trump in play (or number of cards if none)
+TIERS = {}
+for _num_players in range(2, 5):
+    STRENGTHS[_num_players], BEATS[_num_players], TIERS[
+        _num_players] = _build_tables(_num_players)
+
+
+def trick_winner(cards: np.ndarray, suit: int, trump_suit: int,
+                 num_players: int) -> int:
+    """Determine which card wins the trick.
+
+    Args:
+        cards (array): ids of cards in play
+        suit (int): suit of trick
+        trump_suit (int): trump suit
+        num_players (int): number of players
+
+    Returns:
+        int: index in cards of winning card
+    """
+    if len(cards) == 2:
+        return 0 if BEATS[num_players][suit, trump_suit, cards[0],
+                                       cards[1]] else 1
+    return int(np.argmax(STRENGTHS[num_players][suit, trump_suit][cards]))
+
+
+def must_play(hand: np.ndarray, face_up: np.ndarray, suit: int,
+              trump_suit: int, num_players: int) -> np.ndarray:
+    """Determine which cards must be played from the hand, if suit must be followed.
+
+    Args:
+        hand (array): ids of cards in hand
+        face_up (array): ids of cards in play
+        suit (int): suit of trick
+        trump_suit (int): trump suit
+        num_players (int): number of players
+
+    Returns:
+        array: mask of possible cards in hand
+    """
+    strengths = STRENGTHS[num_players]
+    lead = face_up[np.argmax(strengths[suit, suit][face_up])]
+    trumps = strengths[trump_suit, trump_suit][face_up]
+    trump = face_up[np.argmax(trumps)] if trumps.max() > 0 else len(
+        strengths[0, 0])
+    tiers = TIERS[num_players][trump_suit, lead, trump][hand]
+    return tiers == tiers.min()
@@ -0,0 +1,58 @@
+"""Test Tute games played in lockstep.
+"""
+import numpy as np
+
+from tute import FastTute
+from tute.batch import TuteBatch
+from tute.seeding import game_seed
+
+
+def test_batch():
+    """Test that all games finish with all the cards in tricks.
+    """
+    for num_players in range(2, 5):
+        batch = TuteBatch(32, num_players=num_players)
+        batch.reset()
+        while not batch.done.all():
+            legal_actions = batch.legal_actions()
+            assert (legal_actions.any(axis=1) | batch.done).all()
+            choices = np.random.random(legal_actions.shape) * legal_actions
+            batch.step(choices.argmax(axis=1))
+        tricks = [
+            batch.locations[f'player {player + 1} tricks']
+            for player in range(num_players)
+        ]
+        assert np.isin(batch.card_locations, tricks).all()
+        batch.reset(batch.done)
+        assert not batch.done.any()
+
+
+def test_same_as_fast_tute():
+    """Test that games in lockstep are the same as with FastTute.
+    """
+
+    def _lowest_card(context, hand, possible_cards):  # pylint: disable=unused-argument
+        return min(hand[card] for card in possible_cards)
+
+    for num_players, habanero in [(2, True), (2, False), (3, False),
+                                  (4, False)]:
+        batch = TuteBatch(8, num_players=num_players, habanero=habanero)
+        seeds = [game_seed(num_players, game) for game in range(8)]
+        batch.reset(seed=seeds)
+        while not batch.done.all():
+            batch.step(batch.legal_actions().argmax(axis=1))
+
+        for game, seed in enumerate(seeds):
+            tute = FastTute(num_players=num_players, habanero=habanero)
+            tute.deal(seed=seed)
+            player = 1 % num_players
+            while len(tute.get_hand(player)) > 0:
+                winning_player = tute.play_turn(player=player,
+                                                choose_card=_lowest_card)
+                if winning_player is not None:
+                    player = winning_player
+                else:
+                    player = (player + 1) % num_players
+            assert batch.get_payoffs()[game].tolist() == [
+                tute.calc_points(player) for player in range(num_players)
+            ]
@@ -0,0 +1,94 @@
+"""Test running many environments with batched agents.
+"""
+import numpy as np
+from rlcard import make
+
+from tute import rlcard  # pylint: disable=unused-import
+from tute.rlcard.batch_run import run_batch
+
+
+class LowestCardAgent:
+    """Agent that plays the legal card with the lowest id, in batches.
+    """
+    use_raw = False
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def step_batch(self, obs_batch, legal_mask_batch):
+        """Choose an action for each game.
+        """
+        assert len(obs_batch) == len(legal_mask_batch)
+        self.batch_sizes.append(len(obs_batch))
+        return legal_mask_batch.argmax(axis=1)
+
+
+class HighestCardAgent:
+    """Agent that plays the legal card with the highest id, one at a time.
+    """
+    use_raw = False
+
+    def step(self, state):
+        """Choose an action.
+        """
+        return max(state['legal_actions'])
+
+    def eval_step(self, state):
+        """Choose an action for evaluation.
+        """
+        return self.step(state), {}
+
+
+class _OneAtATime:
+    """Agent that plays like another agent with a batch of one.
+    """
+    use_raw = False
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def eval_step(self, state):
+        """Choose an action for evaluation.
+        """
+        mask = np.zeros(state['obs'].shape[1] - 1, dtype=bool)
+        mask[list(state['legal_actions'])] = True
+        return int(self.agent.step_batch(state['obs'][np.newaxis],
+                                         mask[np.newaxis])[0]), {}
+
+
+def _outcome(trajectories, payoffs) -> tuple:
+    """Summarize a game as its payoffs and number of steps of each player.
+    """
+    return tuple(payoffs.tolist()), tuple(
+        len(trajectory) for trajectory in trajectories)
+
+
+def test_run_batch():
+    """Test that batched games are the same as games played one at a time.
+    """
+    # games with different numbers of players end at different steps, so new
+    # games are not started in the order of the environments
+    configs = [{
+        'game_fast': True,
+        'game_num_players': num_players,
+        'seed': seed
+    } for num_players in [2, 3] for seed in range(2)]
+    batched = {2: LowestCardAgent(), 3: LowestCardAgent()}
+    single = HighestCardAgent()
+    envs = [make('tute', config) for config in configs]
+    for env in envs:
+        env.set_agents([batched[env.num_players], single] +
+                       [batched[env.num_players]] * (env.num_players - 2))
+    results = run_batch(envs, num_games=3 * len(envs))
+    assert all(result is not None for result in results)
+    for agent in batched.values():
+        assert max(agent.batch_sizes) == 2
+
+    expected = []
+    for config in configs:
+        env = make('tute', config)
+        agent = _OneAtATime(batched[env.num_players])
+        env.set_agents([agent, single] + [agent] * (env.num_players - 2))
+        for _ in range(3):
+            expected.append(_outcome(*env.run(is_training=False)))
+    assert sorted(_outcome(*result) for result in results) == sorted(expected)
@@ -0,0 +1,100 @@
+"""Test streaming export of games to columnar files.
+"""
+import random
+
+import pytest
+
+from tute import Tute, get_card_table
+from tute.columnar import GameWriter, iter_games, read_games, record_game
+from tute.rlcard.game import TuteGame
+
+pytest.importorskip('pyarrow')
+
+
+def _play(game: TuteGame, seed: int = None):
+    """Deal and play a game with random legal cards (the lowest if seeded).
+    """
+    game.init_game(seed)
+    while not game.is_over():
+        legal_actions = game.get_legal_actions()
+        game.step(
+            game.decode_action(
+                random.choice(legal_actions
+                             ) if seed is None else min(legal_actions)))
+
+
+@pytest.mark.parametrize('fast', [False, True])
+def test_columnar(tmp_path, fast):
+    """Test that games are written in row groups and files of bounded size
+    and read back with projection and filters.
+    """
+    for file_format in ['parquet', 'arrow']:
+        path = str(tmp_path / file_format)
+        rows = []
+        with GameWriter(path,
+                        file_format=file_format,
+                        row_group_size=4,
+                        max_rows_per_file=8) as writer:
+            for num_players in [2, 3]:
+                game = TuteGame(num_players=num_players, fast=fast)
+                for game_id in range(10):
+                    _play(game)
+                    writer.write_game(game, game_id)
+                    rows.append((num_players, game_id, [
+                        game.calc_points(player)
+                        for player in range(num_players)
+                    ]))
+                    # no more than a row group is buffered in memory
+                    assert max(
+                        len(columns['game_id'])
+                        for columns, *_ in writer._partitions.values()) < 4  # pylint: disable=protected-access
+
+        table = read_games(path, file_format=file_format)
+        assert table.num_rows == 20
+        assert len(list((tmp_path / file_format).glob('*/*/*'))) == 4
+        for row in table.to_pylist():
+            assert (row['num_players'], row['game_id'], row['points']) in rows
+            assert len(row['plays']) == len(row['deal'])
+            assert len(row['play_players']) == len(row['plays'])
+            assert len(row['trick_winners']) * row['num_players'] == len(
+                row['plays'])
+
+        table = read_games(path, ['game_id', 'points'],
+                           [('num_players', '=', 3), ('game_id', '<', 5)],
+                           file_format=file_format)
+        assert table.column_names == ['game_id', 'points']
+        assert sorted(table.column('game_id').to_pylist()) == list(range(5))
+        assert all(
+            len(points) == 3 for points in table.column('points').to_pylist())
+        assert sum(
+            batch.num_rows for batch in iter_games(
+                path, ['game_id'], file_format=file_format, batch_size=3)) == 20
+
+
+def test_record_swap():
+    """Test that the trump card and trump swaps are recorded, the same with
+    either engine.
+    """
+    game = TuteGame(habanero=True, fast=True)
+    for seed in range(100):
+        _play(game, seed)
+        row = record_game(game, seed)
+        if row['swap_players']:
+            break
+    assert row['swap_players']
+    other = TuteGame(habanero=True, fast=False)
+    _play(other, seed)
+    assert record_game(other, seed) == row
+
+    suits = get_card_table(2).suits
+    # the card after the hands is turned up as trump
+    assert row['trump_card'] == row['deal'][2 * game.num_cards_per_player]
+    assert suits[row['trump_card']] == row['trump_suit']
+    assert row['swap_players'] == [
+        player for event_type, player, _, _ in game.events
+        if event_type == Tute.SWAPPED_TRUMP
+    ]
+    # the card shown as trump is taken for a card of the trump suit
+    assert row['swap_taken'][0] == row['trump_card']
+    for taken, given in zip(row['swap_taken'], row['swap_given']):
+        assert suits[taken] == suits[given] == row['trump_suit']
@@ -0,0 +1,43 @@
+"""Test sampling of deals consistent with what a player knows.
+"""
+import random
+
+import numpy as np
+
+from tute.determinize import Determinizer, infer_voids
+from tute.rlcard.game import TuteGame
+
+
+def test_determinize():
+    """Test that inferred voids and sampled deals are consistent with the game.
+    """
+    for num_players, habanero in [(2, True), (2, False), (3, False),
+                                  (4, True)]:
+        for _ in range(5):
+            game = TuteGame(num_players=num_players,
+                            habanero=habanero,
+                            fast=True)
+            game.init_game()
+            while not game.is_over():
+                voids = infer_voids(game)
+                for player in range(num_players):
+                    assert not voids[player, game.get_hand(player)].any()
+
+                player = game.current_player
+                determinizer = Determinizer(game, player)
+                locations, orders = determinizer.sample(64)
+                known = game.known_locations[player] != 0
+                assert (locations[:, known] == game.card_locations[known]).all()
+                assert (np.sort(locations, axis=1) == np.sort(
+                    game.card_locations)).all()
+                for other in range(num_players):
+                    hand = locations == game.locations[f'player {other + 1} hand']
+                    assert not (hand & voids[other]).any()
+
+                # cards in the pile come last in the order they are dealt
+                num_pile = len(game.get_cards_in('pile'))
+                pile = np.take_along_axis(locations, orders,
+                                          axis=1)[:, game.num_cards - num_pile:]
+                assert (pile == game.locations['pile']).all()
+
+                game.step(random.choice(game.get_legal_actions()))
@@ -0,0 +1,53 @@
+"""Test exact solver of the end of two player games.
+"""
+import random
+import time
+
+from tute.endgame import EndgameSolver, is_endgame, solve_endgame
+from tute.rlcard.game import TuteGame
+
+
+def _minimax(game: TuteGame) -> int:
+    """Difference between the points the player to move and the other player
+    win in the rest of the game, by exhaustive search with the game engine.
+    """
+    if game.is_over():
+        return 0
+    player = game.current_player
+    best_value = None
+    for card in game.get_legal_actions():
+        snapshot = game.snapshot()
+        before = game.calc_points(player) - game.calc_points(1 - player)
+        game.step(game.decode_action(card))
+        value = game.calc_points(player) - game.calc_points(1 - player) - before
+        value += _minimax(game) if game.current_player == player else -_minimax(
+            game)
+        game.restore(snapshot)
+        if best_value is None or value > best_value:
+            best_value = value
+    return best_value
+
+
+def test_endgame():
+    """Test that the solver agrees with exhaustive search and is fast.
+    """
+    random.seed(0)
+    for fast in [True, False]:
+        for _ in range(5):
+            game = TuteGame(fast=fast)
+            game.init_game()
+            solver = EndgameSolver(int(game.trump_suit))
+            while not game.is_over():
+                if is_endgame(game):
+                    player = game.current_player
+                    num_cards = len(game.get_hand(player))
+                    start = time.perf_counter()
+                    value, card = solve_endgame(game, player)
+                    assert time.perf_counter() - start < 1
+                    assert card in game.get_legal_actions()
+                    assert solve_endgame(game, player, solver)[0] == value
+                    if num_cards <= 3:
+                        assert value == _minimax(game)
+                game.step(
+                    game.decode_action(random.choice(
+                        game.get_legal_actions())))
@@ -0,0 +1,62 @@
+"""Test tournaments with duplicate deals.
+"""
+from tute.evaluate import ismcts_agent, play_match, round_robin
+from tute.selfplay import random_agent
+
+
+def first_card(context, hand, possible_cards):  # pylint: disable=unused-argument
+    """Choose the first possible card (see Tute.choose_card).
+    """
+    return hand[possible_cards[0]]
+
+
+def test_round_robin():
+    """Test that matches are reproducible and stop once decided.
+    """
+    results = round_robin(
+        {
+            'random': random_agent,
+            'first': first_card,
+            'module': 'tute.selfplay:random_agent'
+        },
+        {'game_fast': True, 'game_num_players': 3},
+        num_workers=2,
+        max_deals=6,
+        chunk_size=2)
+    assert set(results) == {('random', 'first'), ('random', 'module'),
+                            ('first', 'module')}
+    for result in results.values():
+        assert result.num_games == 3 * result.num_deals
+        assert 0 <= result.win_rate_ci[0] <= result.win_rate
+        assert result.win_rate <= result.win_rate_ci[1] <= 1
+
+    # a large margin is decided by the first deal that is won or lost
+    result = play_match((random_agent, first_card),
+                        delta=0.45,
+                        min_deals=1,
+                        max_deals=100,
+                        chunk_size=2,
+                        num_workers=2)
+    assert result.decision != 0
+    assert result.num_deals < 10
+    assert play_match((random_agent, first_card),
+                      delta=0.45,
+                      min_deals=1,
+                      max_deals=100,
+                      chunk_size=3,
+                      num_workers=1) == result
+
+
+def test_ismcts_match():
+    """Test that matches with a searching agent do not depend on how deals are
+    split between workers.
+    """
+    results = [
+        play_match((ismcts_agent, random_agent),
+                   max_deals=2,
+                   min_deals=2,
+                   chunk_size=chunk_size,
+                   num_workers=num_workers)
+        for chunk_size, num_workers in [(1, 2), (2, 1)]
+    ]
+    assert results[0] == results[1]
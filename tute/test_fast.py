@@ -0,0 +1,127 @@
+"""Test Tute game with NumPy engine.
+"""
+import random
+
+import numpy as np
+from rlcard import make
+from rlcard.agents import RandomAgent
+
+from tute import Tute, FastTute
+from tute.bitboard import get_bitboards
+from tute import rlcard  # pylint: disable=unused-import
+
+
+def choose_card(context, hand, possible_cards):  # pylint: disable=unused-argument
+    """Dummy player that always chooses a random card.
+    """
+    assert len(possible_cards) > 0
+    return hand[random.choice(possible_cards)]
+
+
+def play_game(tute, choose_card):  # pylint: disable=redefined-outer-name
+    """Play a game until the hands are empty.
+    """
+    player = 0
+    while len(tute.get_hand(player)) > 0:
+        winning_player = tute.play_turn(player=player, choose_card=choose_card)
+        if winning_player is not None:
+            player = winning_player
+        else:
+            player = (player + 1) % tute.num_players
+
+
+def test_deck():
+    """Test deck has the right number of cards.
+    """
+    tute = FastTute()
+    assert len(set(tute.card_descriptions)) == 40
+
+    tute = FastTute(num_players=3)
+    assert len(set(tute.card_descriptions)) == 36
+
+
+def test_game():
+    """Test that all the cards end up in tricks at the end of a game.
+    """
+
+    def _test_game(num_players, habanero):
+        tute = FastTute(num_players=num_players, habanero=habanero)
+        tute.deal()
+        for player in range(tute.num_players):
+            assert len(tute.get_hand(player)) == tute.num_cards_per_player
+
+        play_game(tute, choose_card)
+
+        num_cards_in_tricks = 0
+        for player in range(tute.num_players):
+            num_cards_in_tricks += len(
+                tute.get_cards_in(f'player {player + 1} tricks'))
+        assert num_cards_in_tricks == tute.num_cards
+
+    for _ in range(10):
+        _test_game(num_players=2, habanero=True)
+        for num_players in range(2, 5):
+            _test_game(num_players=num_players, habanero=False)
+
+
+def test_bitboards():
+    """Test legal moves with bitboards.
+    """
+    bitboards = get_bitboards(2)
+    assert bitboards.to_cards(bitboards.from_cards([3, 0, 39])) == [0, 3, 39]
+    assert bitboards.count(bitboards.all) == 40
+
+    # el tres de oros was led and copas are trumps
+    face_up = bitboards.from_cards([2])
+    hand = bitboards.from_cards([0, 9, 10])
+    assert bitboards.to_cards(
+        bitboards.get_possible_cards(hand, face_up, 0, 1, True)) == [0]
+    assert bitboards.get_possible_cards(hand, face_up, 0, 1, False) == hand
+    hand = bitboards.from_cards([10, 19, 20])
+    assert bitboards.to_cards(
+        bitboards.get_possible_cards(hand, face_up, 0, 1, True)) == [10, 19]
+    face_up = bitboards.from_cards([2, 12])
+    assert bitboards.to_cards(
+        bitboards.get_possible_cards(hand, face_up, 0, 1, True)) == [10]
+
+
+def test_same_as_tute():
+    """Test that both engines play the same game from the same deal.
+    """
+
+    def _first_card(context, hand, possible_cards):  # pylint: disable=unused-argument
+        if isinstance(hand, np.ndarray):
+            return hand[possible_cards[0]]
+        return hand.iloc[possible_cards[0]]
+
+    for num_players, habanero in [(2, True), (3, False), (4, False)]:
+        for _ in range(3):
+            tute = Tute(num_players=num_players, habanero=habanero)
+            fast = FastTute(num_players=num_players, habanero=habanero)
+            seed = np.random.randint(2**31)
+            tute.deal(seed=seed)
+            fast.deal(seed=seed)
+
+            play_game(tute, _first_card)
+            play_game(fast, _first_card)
+            for player in range(num_players):
+                assert tute.calc_points(player) == fast.calc_points(player)
+            assert tute.cantes == fast.cantes
+            assert tute.retreive_messages() == fast.retreive_messages()
+            assert tute.events == fast.events
+
+
+def test_rlcard():
+    """Test RLCard with NumPy engine
+    """
+    for num_players in range(2, 5):
+        env = make('tute', {
+            'game_num_players': num_players,
+            'game_habanero': num_players == 2,
+            'game_fast': True
+        })
+        assert isinstance(env.game, FastTute)
+        agent = RandomAgent(num_actions=env.num_actions)
+        env.set_agents([agent for _ in range(env.num_players)])
+        _, payoffs = env.run(is_training=False)
+        assert len(payoffs) == num_players
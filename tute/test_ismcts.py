@@ -0,0 +1,62 @@
+"""Test information set Monte Carlo tree search agent.
+"""
+import time
+
+from rlcard import make
+from rlcard.agents import RandomAgent
+
+from tute import rlcard  # pylint: disable=unused-import
+from tute.rlcard.game import TuteGame
+from tute.rlcard.ismcts import TuteISMCTSAgent
+
+
+def test_ismcts():
+    """Test that the agent plays legal cards within its time limit, in the
+    environment and with Tute.play_turn, and with worker processes.
+    """
+    for fast, num_players in [(True, 2), (True, 3), (False, 2)]:
+        env = make('tute', {
+            'game_fast': fast,
+            'game_num_players': num_players,
+            'seed': 0
+        })
+        agent = TuteISMCTSAgent(0, env.game, time_limit=0.05)
+        env.set_agents([agent] + [
+            RandomAgent(num_actions=env.num_actions)
+            for _ in range(num_players - 1)
+        ])
+        for _ in range(2):
+            state, player = env.reset()
+            while not env.is_over():
+                if player == 0:
+                    start = time.time()
+                    action, info = agent.eval_step(state)
+                    assert time.time() - start < 0.5
+                    assert action in state['legal_actions']
+                    assert abs(sum(info['probs'].values()) - 1) < 1e-6
+                else:
+                    action = env.agents[player].step(state)
+                state, player = env.step(action)
+
+    game = TuteGame(fast=True)
+    agents = [
+        TuteISMCTSAgent(player, game, time_limit=None, max_playouts=50)
+        for player in range(2)
+    ]
+    game.deal()
+    player = 0
+    while len(game.get_hand(player)) > 0:
+        winning_player = game.play_turn(player,
+                                        choose_card=agents[player].choose_card)
+        player = (player +
+                  1) % 2 if winning_player is None else winning_player
+    assert sum(game.calc_points(player) for player in range(2)) >= 130
+
+    env = make('tute', {'game_fast': True})
+    agent = TuteISMCTSAgent(0, env.game, time_limit=0.05, num_workers=2, seed=0)
+    try:
+        env.set_agents([agent, RandomAgent(num_actions=env.num_actions)])
+        env.run(is_training=False)
+        assert env.is_over()
+    finally:
+        agent.close()
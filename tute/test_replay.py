@@ -0,0 +1,47 @@
+"""Test replay buffer.
+"""
+import numpy as np
+from rlcard import make
+from rlcard.agents import RandomAgent
+
+from tute import rlcard  # pylint: disable=unused-import
+from tute.replay import ReplayBuffer
+
+
+def test_replay(tmp_path):
+    """Test that transitions can be stored, read back and sampled.
+    """
+    env = make('tute', {'game_fast': True})
+    env.set_agents([RandomAgent(num_actions=env.num_actions)] * 2)
+    buffer = ReplayBuffer.for_env(tmp_path, env, capacity=100)
+
+    trajectories, payoffs = env.run(is_training=False)
+    buffer.add_trajectories(trajectories, payoffs)
+    state = trajectories[0][0]
+    assert (buffer.expand_obs(buffer.obs[0],
+                              buffer.num_locations) == state['obs']).all()
+    assert np.flatnonzero(
+        buffer.legal_actions[0]).tolist() == state['raw_legal_actions']
+    assert buffer.action[0] == trajectories[0][1]
+    assert buffer.done.sum() == 2
+    assert sorted(buffer.reward[buffer.done].tolist()) == sorted(payoffs)
+
+    # another process can read the same files
+    num_transitions = len(buffer)
+    reader = ReplayBuffer(tmp_path)
+    assert len(reader) == num_transitions
+    batch = reader.sample(16, expand=True)
+    assert batch['obs'].shape == (16,) + tuple(env.state_shape[0])
+    assert (batch['action'] == buffer.action[batch['indices']]).all()
+
+    buffer.update_priorities(np.arange(num_transitions),
+                             np.zeros(num_transitions))
+    buffer.update_priorities([3], [1])
+    batch = reader.sample(16, prioritized=True)
+    assert (batch['indices'] == 3).all()
+    assert (batch['weights'] == 1).all()
+
+    for _ in range(3):
+        buffer.add_trajectories(*env.run(is_training=False))
+    assert len(reader) == 100
+    assert reader.count[0] > 100
@@ -0,0 +1,43 @@
+"""Test seeded deals.
+"""
+import numpy as np
+
+from tute import FastTute, Tute
+from tute.seeding import deal_seed, derive_seed, game_seed, legacy_seed
+
+
+def test_seeded_deals():
+    """Test that the same seed deals the same cards with either engine, and
+    each hand to the next player when the next player deals.
+    """
+    for num_players in [2, 3, 4]:
+        seed = deal_seed(0, num_players)
+        tute = Tute(num_players=num_players)
+        fast_tute = FastTute(num_players=num_players)
+        for dealer in range(num_players):
+            tute.deal(dealer, seed=seed)
+            fast_tute.deal(dealer, seed=np.random.default_rng(seed))
+            assert tute.trump_suit == fast_tute.trump_suit
+            assert tute.order.tolist() == fast_tute.order.tolist()
+            for player in range(num_players):
+                hand = sorted(fast_tute.get_hand(player).tolist())
+                assert sorted(
+                    tute.get_cards_in(f'player {player + 1} hand').index) == hand
+                other = FastTute(num_players=num_players)
+                other.deal((dealer + 1) % num_players, seed=seed)
+                assert sorted(other.get_hand(
+                    (player + 1) % num_players).tolist()) == hand
+
+
+def test_streams():
+    """Test that streams of seeds are reproducible and distinct.
+    """
+    assert game_seed(0, 1) == game_seed(0, 1)
+    seeds = {game_seed(0, game_id) for game_id in range(100)}
+    seeds |= {deal_seed(0, deal_id) for deal_id in range(100)}
+    seeds |= {derive_seed(1, game_id) for game_id in range(100)}
+    assert len(seeds) == 300
+    # wide enough not to collide after billions of games
+    assert max(seed.bit_length() for seed in seeds) > 64
+    assert all(0 <= legacy_seed(seed) < 2**32 for seed in seeds)
+    np.random.seed(legacy_seed(game_seed(0, 1)))
@@ -0,0 +1,50 @@
+"""Test self-play across processes.
+"""
+import numpy as np
+
+from tute.selfplay import replay, selfplay
+
+
+def test_selfplay():
+    """Test that games are reproducible and can be replayed from their records.
+    """
+    env_config = {'game_fast': True}
+    records = sorted(selfplay(20,
+                              env_config=env_config,
+                              base_seed=1,
+                              num_workers=2,
+                              chunk_size=3),
+                     key=lambda record: record.game_id)
+    assert [record.game_id for record in records] == list(range(20))
+
+    for record, other in zip(
+            records,
+            sorted(selfplay(20,
+                            env_config=env_config,
+                            base_seed=1,
+                            num_workers=1,
+                            chunk_size=20),
+                   key=lambda record: record.game_id)):
+        assert record.seed == other.seed
+        assert np.array_equal(record.actions, other.actions)
+        assert record.payoffs == other.payoffs
+
+    for record in records[:5]:
+        assert replay(record, env_config).tolist() == record.payoffs
+        assert replay(record, {'game_fast': False}).tolist() == record.payoffs
+
+
+def test_duplicate():
+    """Test that duplicate deals give each hand to each seat.
+    """
+    env_config = {'game_fast': True, 'game_num_players': 3}
+    records = sorted(selfplay(6,
+                              env_config=env_config,
+                              base_seed=2,
+                              num_workers=1,
+                              duplicate=True),
+                     key=lambda record: record.game_id)
+    assert len({record.deal_seed for record in records}) == 2
+    for record in records:
+        assert record.dealer == record.game_id % 3
+        assert replay(record, env_config).tolist() == record.payoffs
@@ -0,0 +1,84 @@
+"""Test asyncio server of tables of Tute.
+"""
+import asyncio
+import json
+import random
+
+from tute.server import TuteServer
+
+
+async def _play(path: str, num_players: int, num_bots: int) -> dict:
+    """Join a table and play random legal cards until the game is over.
+
+    Returns:
+        dict: last message
+    """
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write((json.dumps({
+        'type': 'join',
+        'num_players': num_players,
+        'bots': num_bots
+    }) + '\n').encode())
+    async for line in reader:
+        message = json.loads(line)
+        assert message['type'] != 'error', message
+        if message['type'] == 'state' and message['legal_actions']:
+            assert message['turn'] == message['player']
+            assert set(message['legal_actions']) <= set(message['hand'])
+            writer.write((json.dumps({
+                'type': 'play',
+                'card': random.choice(message['legal_actions'])
+            }) + '\n').encode())
+        elif message['type'] == 'over':
+            break
+    writer.close()
+    return message
+
+
+def test_server(tmp_path):
+    """Test that humans and bots play concurrent games to the end.
+    """
+    path = str(tmp_path / 'tute.sock')
+    server = TuteServer(think_time=0.02, max_playouts=50, num_workers=2)
+
+    async def _run():
+        serving = asyncio.create_task(server.serve(path=path))
+        await asyncio.sleep(0.1)
+        results = await asyncio.gather(*[_play(path, 2, 1) for _ in range(20)],
+                                       _play(path, 2, 0), _play(path, 2, 0),
+                                       _play(path, 3, 1), _play(path, 3, 1))
+        serving.cancel()
+        return results
+
+    try:
+        results = asyncio.run(_run())
+    finally:
+        server.close()
+    for message in results:
+        assert message['type'] == 'over'
+        assert sum(message['points']) >= 120
+    assert server.get_latency(99) < 1
+    assert len(server.tables) == 0
+
+
+def test_tasks(caplog):
+    """Test that tasks are kept until they are done and that their exceptions
+    are logged.
+    """
+    server = TuteServer(num_workers=1)
+
+    async def _fail():
+        raise RuntimeError('bot failed')
+
+    async def _run():
+        task = server.create_task(_fail())
+        assert task in server.tasks
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    try:
+        asyncio.run(_run())
+    finally:
+        server.close()
+    assert len(server.tasks) == 0
+    assert 'bot failed' in caplog.text
@@ -0,0 +1,66 @@
+"""Test lookup tables.
+"""
+import numpy as np
+
+from tute import Tute, FastTute
+from tute.tables import must_play, trick_winner
+
+
+def test_trick_winner():
+    """Test tricks are won by trumps, then by the suit of the trick.
+    """
+    # el tres de oros (2) against el as de copas (10) and el rey de oros (9)
+    assert trick_winner(np.array([2, 9]), 0, 1, 2) == 0
+    assert trick_winner(np.array([2, 10]), 0, 1, 2) == 1
+    assert trick_winner(np.array([2, 10]), 0, 3, 2) == 0
+    assert trick_winner(np.array([9, 2, 10]), 0, 1, 4) == 2
+    assert trick_winner(np.array([10, 2]), 1, 3, 2) == 0
+
+
+def test_must_play():
+    """Test follow suit with tables.
+    """
+    hand = np.array([0, 9, 10, 19])
+    assert must_play(hand, np.array([2]), 0, 1, 2).tolist() == [
+        True, False, False, False
+    ]
+    hand = np.array([10, 19, 20])
+    assert must_play(hand, np.array([2]), 0, 1, 2).tolist() == [
+        True, True, False
+    ]
+    assert must_play(hand, np.array([2, 12]), 0, 1, 2).tolist() == [
+        True, False, False
+    ]
+
+
+def test_same_as_without_tables():
+    """Test that games are the same with and without tables.
+    """
+
+    def _first_card(context, hand, possible_cards):  # pylint: disable=unused-argument
+        if isinstance(hand, np.ndarray):
+            return hand[possible_cards[0]]
+        return hand.iloc[possible_cards[0]]
+
+    for engine, num_games in [(Tute, 1), (FastTute, 10)]:
+        for num_players in range(2, 5):
+            for _ in range(num_games):
+                seed = np.random.randint(2**31)
+                points = []
+                for use_tables in [False, True]:
+                    tute = engine(num_players=num_players,
+                                  habanero=False,
+                                  use_tables=use_tables)
+                    tute.deal(seed=seed)
+
+                    player = 0
+                    while len(tute.get_hand(player)) > 0:
+                        winning_player = tute.play_turn(
+                            player=player, choose_card=_first_card)
+                        if winning_player is not None:
+                            player = winning_player
+                        else:
+                            player = (player + 1) % num_players
+                    points.append(
+                        [tute.calc_points(p) for p in range(num_players)])
+                assert points[0] == points[1]
@@ -1,11 +1,16 @@
 """Test Tute game.
 """
+import os
 import random
+import subprocess
+import sys
 
+import numpy as np
 from rlcard import make
 from rlcard.agents import RandomAgent
 
-from tute import Tute
+from tute import Tute, set_legal_move_cache_size
+from tute.rlcard.game import TuteGame
 from tute import rlcard  # pylint: disable=unused-import
 
 
@@ -91,3 +96,248 @@ def test_rlcard():
     agent = RandomAgent(num_actions=env.num_actions)
     env.set_agents([agent for _ in range(env.num_players)])
     env.run(is_training=False)
+
+
+def test_observations():
+    """Test that observations are kept up to date as cards move.
+    """
+
+    def _known_locations(game, player):
+        hands = [
+            game.locations[f'player {other_player + 1} hand']
+            for other_player in range(game.num_players)
+            if other_player != player
+        ]
+        known_locations = []
+        for card in range(game.num_cards):
+            location = game.get_location(card)
+            if location == game.locations['pile'] or (location in hands and
+                                                      card not in game.shown):
+                location = game.locations['unknown']
+            known_locations.append(location)
+        return known_locations
+
+    def _obs(env, player):
+        state = env.game.get_state(player)
+        suit = np.eye(len(env.game.suits))[state['suit'] or 0]
+        trump_suit = np.eye(len(env.game.suits))[state['trump_suit']]
+        deck = np.eye(len(env.game.locations))[_known_locations(
+            env.game, player)]
+        header = np.zeros(len(env.game.locations))
+        header[:2 * len(env.game.suits) + 1] = np.concatenate(
+            [suit, trump_suit, [env.game.get_follow_suit()]])
+        return np.concatenate([header[np.newaxis], deck]).transpose()
+
+    for num_players, habanero, fast in [(2, True, False), (3, False, False),
+                                         (2, True, True), (4, False, True)]:
+        env = make(
+            'tute', {
+                'game_num_players': num_players,
+                'game_habanero': habanero,
+                'game_fast': fast
+            })
+        for _ in range(2):
+            state, player = env.reset()
+            while not env.is_over():
+                for other_player in range(env.num_players):
+                    assert env.game.get_state(other_player)['locations'].tolist(
+                    ) == _known_locations(env.game, other_player)
+                    assert (env.get_state(other_player)['obs'] == _obs(
+                        env, other_player)).all()
+                state, player = env.step(
+                    random.choice(list(state['legal_actions'])))
+
+
+def test_step_back():
+    """Test that stepping back and restoring snapshots undo steps.
+    """
+    for num_players, habanero, fast in [(2, True, False), (3, False, False),
+                                         (2, True, True), (4, False, True)]:
+        env = make(
+            'tute', {
+                'game_num_players': num_players,
+                'game_habanero': habanero,
+                'game_fast': fast,
+                'allow_step_back': True
+            })
+        state, player = env.reset()
+        states = []
+        while not env.is_over():
+            states.append((player, state['obs'], list(state['legal_actions']),
+                           env.get_payoffs().tolist()))
+            if len(states) == 5:
+                snapshot = env.game.snapshot()
+            state, player = env.step(
+                random.choice(list(state['legal_actions'])))
+
+        for player, obs, legal_actions, payoffs in reversed(states):
+            state, _ = env.step_back()
+            assert env.get_player_id() == player
+            assert (state['obs'] == obs).all()
+            assert list(state['legal_actions']) == legal_actions
+            assert env.get_payoffs().tolist() == payoffs
+        assert not env.step_back()
+
+        env.game.restore(snapshot)
+        player, obs, legal_actions, payoffs = states[4]
+        state = env.get_state(env.get_player_id())
+        assert env.get_player_id() == player
+        assert (state['obs'] == obs).all()
+        assert list(state['legal_actions']) == legal_actions
+
+        game = TuteGame(num_players=num_players,
+                        habanero=habanero,
+                        fast=fast,
+                        allow_step_back=True)
+        game.init_game()
+        player = game.get_player_id()
+        game.step(game.decode_action(random.choice(game.get_legal_actions())))
+        assert game.step_back()
+        assert game.get_player_id() == player
+
+
+def test_profiling():
+    """Test that the phases of each turn are profiled when enabled.
+    """
+    for fast in [False, True]:
+        game = TuteGame(fast=fast)
+        assert game.profile == {}
+        game.enable_profiling()
+        game.init_game()
+        num_steps = 0
+        while not game.is_over():
+            game.step(game.decode_action(random.choice(
+                game.get_legal_actions())))
+            num_steps += 1
+
+        profile = game.profile
+        assert set(profile) == set(Tute.profiled_phases)
+        assert profile['do_trick']['calls'] == num_steps // 2
+        assert profile['move']['calls'] >= num_steps
+        assert profile['get_state']['calls'] == num_steps + 1
+        assert profile['get_possible_cards']['calls'] == num_steps
+        assert all(stats['time'] >= 0 for stats in profile.values())
+
+        game.reset_profile()
+        assert all(stats['calls'] == 0 for stats in game.profile.values())
+        game.disable_profiling()
+        assert game.profile == {}
+        assert 'move' not in vars(game)
+
+
+def test_events():
+    """Test that events are logged unless headless.
+    """
+    game = TuteGame()
+    game.init_game()
+    dealt = [event for event in game.events if event[0] == Tute.DEALT]
+    assert len(dealt) == 2 * game.num_cards_per_player + 1
+    # the trump card may have been swapped straight after dealing
+    num_events = len(game.events)
+    assert all(' swapped ' in message for message in game.retreive_messages())
+
+    while not game.is_over():
+        player = game.current_player
+        card = random.choice(game.get_legal_actions())
+        game.step(game.decode_action(card))
+        played = [event for event in game.events if event[0] == Tute.PLAYED]
+        assert played[-1] == (Tute.PLAYED, player, card, -1)
+
+    messages = game.retreive_messages()
+    assert messages == [
+        game.render_event(event)
+        for event in game.events[num_events:]
+        if event[0] != Tute.DEALT
+    ]
+    assert f'Player {played[0][1] + 1} played ' in ''.join(messages)
+    assert game.retreive_messages() == []
+
+    game = TuteGame(headless=True)
+    game.init_game()
+    game.step(game.decode_action(game.get_legal_actions()[0]))
+    assert game.events is None
+    assert game.retreive_messages() == []
+
+
+def test_legal_actions():
+    """Test that legal actions are cached and getting them changes nothing.
+    """
+    for fast in [False, True]:
+        game = TuteGame(fast=fast)
+        game.init_game()
+        while not game.is_over():
+            snapshot = game.snapshot()
+            legal_actions = game.get_legal_actions()
+            mask = game.get_legal_actions_mask()
+            assert mask.shape == (game.num_cards,)
+            assert list(np.flatnonzero(mask)) == sorted(legal_actions)
+            assert list(game.get_legal_actions_dict()) == legal_actions
+            assert game.get_legal_actions_mask() is mask
+            assert (game.snapshot()[0] == snapshot[0]).all()
+            assert game.snapshot()[-1] == snapshot[-1]
+            game.step(game.decode_action(random.choice(legal_actions)))
+            assert game.get_legal_actions_mask() is not mask
+
+
+def test_legal_move_cache():
+    """Test that memoized legal moves are the same as without the cache.
+    """
+    for num_players, habanero in [(2, False), (3, False), (2, True)]:
+        tute = Tute(num_players=num_players, habanero=habanero)
+        cache = tute.legal_move_cache
+        cache.clear()
+        for seed in range(3):
+            tute.deal(seed=seed)
+            player = 1 % num_players
+            while len(tute.get_hand(player)) > 0:
+                hand = tute.get_hand(player)
+                face_up = tute.get_face_up()
+                assert list(tute.get_possible_cards(face_up, hand)) == list(
+                    np.asarray(tute._get_possible_cards(  # pylint: disable=protected-access
+                        face_up, hand, tute.get_follow_suit()),
+                               dtype=bool))
+                winning_player = tute.play_turn(
+                    player=player,
+                    choose_card=lambda context, hand, possible_cards: hand.
+                    iloc[random.choice(possible_cards)])
+                if winning_player is not None:
+                    player = winning_player
+                else:
+                    player = (player + 1) % num_players
+        info = cache.cache_info()
+        assert info['hits'] > 0
+        assert info['currsize'] == info['misses']
+
+    try:
+        set_legal_move_cache_size(10)
+        assert cache.cache_info()['currsize'] == 10
+        set_legal_move_cache_size(0)
+        assert cache.cache_info()['currsize'] == 0
+        tute = Tute(habanero=False)
+        tute.deal(seed=0)
+        tute.play_turn(player=0,
+                       choose_card=lambda context, hand, possible_cards: hand.
+                       iloc[possible_cards[0]])
+        assert tute.get_possible_cards(tute.get_face_up(),
+                                       tute.get_hand(1)).dtype == bool
+        assert tute.legal_move_cache.cache_info()['currsize'] == 0
+    finally:
+        set_legal_move_cache_size(2**18)
+
+
+def test_lazy_import():
+    """Test that importing tute and playing with the fast engine does not
+    import pandas.
+    """
+    code = (
+        'import sys\n'
+        'from tute import FastTute\n'
+        'tute = FastTute()\n'
+        'tute.deal(seed=0)\n'
+        'assert "pandas" not in sys.modules\n'
+        'from tute import Tute\n'
+        'Tute()\n'
+        'assert "pandas" in sys.modules\n')
+    subprocess.run([sys.executable, '-c', code],
+                   cwd=os.path.dirname(os.path.dirname(__file__)),
+                   check=True)
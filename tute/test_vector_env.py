@@ -0,0 +1,44 @@
+"""Test vector of TuteEnvs in worker processes.
+"""
+import numpy as np
+from rlcard import make
+
+from tute import rlcard  # pylint: disable=unused-import
+from tute.rlcard.vector_env import TuteVectorEnv
+from tute.seeding import game_seed
+
+
+def test_vector_env():
+    """Test that environments are stepped as TuteEnvs are and reset when their
+    games are over.
+    """
+    config = {'game_fast': True}
+    envs = [make('tute', dict(config, seed=game_seed(0, index)))
+            for index in range(5)]
+    rng = np.random.default_rng(0)
+    with TuteVectorEnv(5, config, num_workers=2, seed=0) as vector_env:
+        obs, legal_actions, players = vector_env.reset()
+        states = [env.reset() for env in envs]
+        num_games = 0
+        for _ in range(100):
+            for index, (env, (state, player)) in enumerate(zip(envs, states)):
+                assert players[index] == player
+                assert (obs[index] == state['obs']).all()
+                assert list(np.flatnonzero(legal_actions[index])) == sorted(
+                    state['legal_actions'])
+
+            actions = [
+                rng.choice(np.flatnonzero(mask)) for mask in legal_actions
+            ]
+            obs, legal_actions, players, payoffs, dones = vector_env.step(
+                actions)
+            for index, (env, action) in enumerate(zip(envs, actions)):
+                states[index] = env.step(action)
+                assert dones[index] == env.is_over()
+                if env.is_over():
+                    assert (payoffs[index] == env.get_payoffs()).all()
+                    states[index] = env.reset()
+                    num_games += 1
+                else:
+                    assert (payoffs[index] == 0).all()
+        assert num_games >= 5
@@ -0,0 +1,47 @@
+"""Test Zobrist hashing of states.
+"""
+import random
+
+from tute import FastTute
+from tute.rlcard.game import TuteGame
+from tute.zobrist import ZobristHash
+
+
+def test_zobrist():
+    """Test that incremental hashes are the same as hashing from scratch and
+    the same for equal states.
+    """
+    for fast in [False, True]:
+        game = TuteGame(num_players=2, fast=fast)
+        zobrist = ZobristHash(game)
+        game.init_game()
+        other = ZobristHash(game)
+        hashes = {}
+        while not game.is_over():
+            other.reset()
+            assert zobrist.hash() == other.hash()
+            for player in range(game.num_players):
+                assert zobrist.info_hash(player) == other.info_hash(player)
+            assert zobrist.info_hash(0) != zobrist.info_hash(1)
+            hashes[zobrist.hash()] = game.snapshot()
+            game.step(game.decode_action(random.choice(
+                game.get_legal_actions())))
+        assert len(hashes) == game.num_cards
+
+        # restoring a state restores its hash
+        for value, snapshot in hashes.items():
+            game.restore(snapshot)
+            assert zobrist.hash() == value
+        zobrist.close()
+        other.close()
+
+
+def test_same_keys():
+    """Test that the same state has the same hash with either engine.
+    """
+    game = TuteGame(num_players=3, fast=False)
+    fast = FastTute(num_players=3)
+    hashes = [ZobristHash(game), ZobristHash(fast)]
+    game.deal(seed=1)
+    fast.deal(seed=1)
+    assert hashes[0].hash() ^ hashes[1].hash() == hashes[0].keys.players[0]
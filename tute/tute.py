@@ -2,16 +2,33 @@
 """
 # pragma pylint: disable=redefined-outer-name
 
+from __future__ import annotations
+
 import os
+import time
 import logging
 import argparse
-from typing import Callable
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+from .seeding import Seed, deal_order
 
-import pandas as pd
+if TYPE_CHECKING:
+    # pandas is only imported when a pandas deck is first built
+    import pandas as pd
 
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger('tute')
 
+# attributes of the cards in the deck for a number of players, shared by all
+# games (see get_card_table)
+CardTable = namedtuple('CardTable', [
+    'deck', 'descriptions', 'suits', 'values', 'rankings', 'points', 'lookup'
+])
+
 
 class Tute:
     """Tute card game.
@@ -81,19 +98,143 @@ class Tute:
 
     suits = ['oros', 'copas', 'espadas', 'bastos']
 
-    def __init__(self, num_players: int = 2, habanero: bool = True):
+    # types of events in the event log (see Tute.events)
+    PLAYED, TRICK_WON, SWAPPED_TRUMP, CANTE, DEALT = range(5)
+
+    # methods that implement each phase of a turn that can be profiled
+    profiled_phases = {
+        phase: phase for phase in [
+            'pre_move', 'swap_trump', 'get_possible_cards', 'move',
+            'post_move', 'do_trick', 'cantar', 'deal_new_cards', 'get_state'
+        ]
+    }
+
+    def __init__(self,
+                 num_players: int = 2,
+                 habanero: bool = True,
+                 use_tables: bool = False,
+                 headless: bool = False,
+                 events: Optional[bool] = None):
+        """Initialize game.
+
+        Args:
+            num_players (int): number of players (2 to 4)
+            habanero (bool): play Tute Habanero
+            use_tables (bool): resolve tricks and follow suit with lookup tables
+            headless (bool): if True, do not keep a log of events or messages
+                             (unless events is True)
+            events (bool or None): True to keep a log of events, False not to
+                                   and None to keep one unless headless
+        """
         self.num_players = max(2, min(num_players, 4))
         self.num_cards_per_player = [8, 12, 10][self.num_players - 2]
         self.habanero = habanero
+        # resolve tricks and follow suit with lookup tables (see tute.tables)
+        self.use_tables = use_tables
 
         self.suit = None
         self.trump_suit = None
         self.shown = set()
         self.cantes = {}
         self.last_trick_winner = None
-        self.messages = []
+        # log of (type, player, card, other card) events, or None if not kept
+        # (see events argument): played (card), trick won, swapped trump (card
+        # taken, card given), cante (suit as card) and dealt (card, player -1
+        # for the trump card)
+        if events is None:
+            events = not headless
+        self.events = [] if events else None
+        # number of events already retrieved as messages
+        self._num_retrieved = 0
+        # functions called with the id of a card when it moves or is shown
+        self.listeners = []
+        # random number generator to shuffle (NumPy's global one if None),
+        # unless a seed is passed to deal
+        self.np_random = None
+        # calls and time spent in each phase (None if not profiling)
+        self._profile = None
+
+        self.locations = self.build_locations(self.num_players)
+        card_table = get_card_table(self.num_players)
+        self.num_cards = len(card_table.deck)
+        self.card_descriptions = card_table.descriptions
+        # cards that can be played in each context of the rules seen
+        self.legal_move_cache = get_legal_move_cache(self.num_players)
+        # bitboards to encode contexts of the cache (see _get_bitboards)
+        self._bitboards = None
+        self._init_deck()
+
+    def enable_profiling(self):
+        """Count calls and time spent in each phase of a turn (see Tute.profile).
+
+        The methods of the phases are wrapped on this instance, so that they
+        cost nothing extra when profiling is disabled.
+        """
+        if self._profile is not None:
+            return
+
+        self._profile = {}
+        for phase, name in self.profiled_phases.items():
+            method = getattr(self, name, None)
+            if method is None:
+                continue
+            stats = self._profile[phase] = [0, 0.0]
+
+            def profiled(*args, method=method, stats=stats, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    stats[0] += 1
+                    stats[1] += time.perf_counter() - start
+
+            setattr(self, name, profiled)
+
+    def disable_profiling(self):
+        """Stop profiling and discard the profile.
+        """
+        if self._profile is None:
+            return
+
+        for phase, name in self.profiled_phases.items():
+            if phase in self._profile:
+                delattr(self, name)
+        self._profile = None
+
+    def reset_profile(self):
+        """Reset the counts and times of the profile.
+        """
+        for stats in (self._profile or {}).values():
+            stats[:] = [0, 0.0]
+
+    @property
+    def profile(self) -> dict:
+        """Calls and wall time in seconds spent in each phase of a turn.
 
-        self.locations = {
+        Times include those of any phases called within the phase (such as
+        swap_trump in pre_move).
+
+        Returns:
+            dict: 'calls' and 'time' indexed by phase (empty if not profiling)
+        """
+        return {
+            phase: {
+                'calls': calls,
+                'time': seconds
+            } for phase, (calls, seconds) in (self._profile or {}).items()
+        }
+
+    @staticmethod
+    def build_locations(num_players: int) -> dict:
+        """Build codes of locations of cards.
+
+        Args:
+            num_players (int): number of players
+
+        Returns:
+            dict: location codes indexed by name
+        """
+        return {
             'unknown': 0,
             'pile': 1,
             'trump': 2,
@@ -111,33 +252,55 @@ class Tute:
             }
         }
 
+    @classmethod
+    def build_deck(cls, num_players: int) -> dict:
+        """Build attributes of cards in deck.
+
+        Args:
+            num_players (int): number of players
+
+        Returns:
+            dict: card attributes indexed by card id
+        """
         discards = [8, 9]
-        if self.num_players == 3:
+        if num_players == 3:
             discards += [2]
 
         deck = {}
         card_id = 0
-        for suit in self.suits:
-            for card in self.cards.items():
+        for suit in cls.suits:
+            for card in cls.cards.items():
                 if card[0] in discards:
                     continue
 
                 deck[card_id] = {
                     'description': f"{card[1]['name']} de {suit}",
-                    'suit': self.suits.index(suit),
+                    'suit': cls.suits.index(suit),
                     'value': card[0],
                     'ranking': card[1]['ranking'],
-                    'points': card[1]['points'],
-                    'location': self.locations['pile']
+                    'points': card[1]['points']
                 }
                 card_id += 1
 
-        self.deck = pd.DataFrame.from_dict(deck, orient='index')
+        return deck
+
+    def _init_deck(self):
+        """Build deck from the card attributes shared by all games.
+        """
+        self.deck = _get_deck_frame(self.num_players).copy()
+        self.deck['location'] = self.locations['pile']
+        self.order = np.arange(self.num_cards)
 
-    def shuffle(self):
+    def shuffle(self, seed: Seed = None):
         """Shuffle deck.
+
+        Args:
+            seed (int, Generator or RandomState): seed or random number
+                generator (np_random if None)
         """
-        self.deck = self.deck.sample(frac=1)
+        self.order = deal_order(self.num_cards,
+                                self.np_random if seed is None else seed)
+        self.deck = self.deck.loc[self.order]
 
     def move(self, card: pd.DataFrame, location: int):
         """Move card to location.
@@ -146,31 +309,71 @@ class Tute:
             card (DataFrame): card to move
             location (int): location according to tute.location
         """
-        logger.debug(
-            '%s went from %s to %s', card.description,
-            dict(zip(self.locations.values(),
-                     self.locations.keys()))[card.location], location)
-        self.deck.loc[card.name, 'location'] = self.locations[location]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                '%s went from %s to %s', card.description,
+                dict(zip(self.locations.values(),
+                         self.locations.keys()))[card.location], location)
+        self._move(card.name, self.locations[location])
+
+    def _move(self, card: int, location: int):
+        """Move card to location without logging.
+
+        Args:
+            card (int): id of card to move
+            location (int): location code
+        """
+        self.deck.loc[card, 'location'] = location
+        self._notify(card)
 
-    def deal(self, dealer: int = 0):
+    def show(self, cards: list):
+        """Show cards to all players.
+
+        Args:
+            cards (list): ids of cards to show
+        """
+        self.shown.update(cards)
+        for card in cards:
+            self._notify(card)
+
+    def _notify(self, card: int):
+        """Notify listeners that card has moved or been shown.
+
+        Args:
+            card (int): card id
+        """
+        for listener in self.listeners:
+            listener(card)
+
+    def deal(self, dealer: int = 0, seed: Seed = None):
         """Deal deck.
 
+        The same seed deals the same cards with any engine, and each hand to
+        the next player when the next player deals.
+
         Args:
             dealer (int): number of player who is dealing
+            seed (int, Generator or RandomState): seed or random number
+                generator to shuffle with (np_random if None)
         """
-        self.shuffle()
+        self.deck.location = self.locations['pile']
+        self.shuffle(seed)
 
         self.suit = None
         self.shown = set()
         self.cantes = {}
         self.last_trick_winner = None
-        self.messages = []
+        if self.events is not None:
+            self.events = []
+        self._num_retrieved = 0
 
         dealt = 0
         player = (dealer + 1) % self.num_players
         deck = self.deck.T.iteritems()
         for card in deck:
             self.move(card[1], f'player {player + 1} hand')
+            if self.events is not None:
+                self.events.append((self.DEALT, player, int(card[0]), -1))
             player = (player + 1) % self.num_players
             dealt += 1
             if (self.num_cards_per_player is not None
@@ -181,11 +384,52 @@ class Tute:
             trump = next(deck)
             self.move(trump[1], 'trump')
             self.trump_suit = trump[1].suit
+            if self.events is not None:
+                self.events.append((self.DEALT, -1, int(trump[0]), -1))
 
         except StopIteration:
-            self.shown.add(card[0])  # pylint: disable=undefined-loop-variable
+            self.show([card[0]])  # pylint: disable=undefined-loop-variable
             self.trump_suit = card[1].suit  # pylint: disable=undefined-loop-variable
 
+        # the rest of the cards went back to the pile
+        for card_id in range(self.num_cards):
+            self._notify(card_id)
+
+    @staticmethod
+    def card_id(card: pd.DataFrame) -> int:
+        """Get id of card.
+
+        Args:
+            card (DataFrame): card
+
+        Returns:
+            int: card id (index in deck)
+        """
+        return card.name
+
+    @staticmethod
+    def card_ids(cards: pd.DataFrame) -> list:
+        """Get ids of cards.
+
+        Args:
+            cards (DataFrame): cards
+
+        Returns:
+            list: card ids (indices in deck)
+        """
+        return cards.index.to_list()
+
+    def get_location(self, card: int) -> int:
+        """Get location of card.
+
+        Args:
+            card (int): card id
+
+        Returns:
+            int: location according to tute.location
+        """
+        return self.deck.at[card, 'location']
+
     def get_cards_in(self, location: int) -> pd.DataFrame:
         """Get cards in location.
 
@@ -267,26 +511,46 @@ class Tute:
     def do_trick(self):
         """Process trick.
         """
+        face_up = self.get_face_up()
+        if self.use_tables:
+            from .tables import trick_winner  # pylint: disable=import-outside-toplevel
+            winning_location = face_up.location.iloc[trick_winner(
+                face_up.index.to_numpy(), self.suit, self.trump_suit,
+                self.num_players)]
+            winning_player = [
+                self.locations[f'player {player + 1} face up']
+                for player in range(self.num_players)
+            ].index(winning_location)
+        else:
+            winning_player = self._do_trick()
+
+        for card in face_up.T.iteritems():
+            self.move(card[1], f'player {winning_player + 1} tricks')
+
+        return winning_player
+
+    def _do_trick(self) -> int:
+        """Determine winner of trick.
+
+        Returns:
+            int: number of player who won the trick
+        """
         highest_ranking = None
         highest_ranking_trump = None
         for player in range(self.num_players):
             card = self.get_cards_in(f'player {player + 1} face up').iloc[0]
 
+            if card.suit == self.trump_suit:
+                if (highest_ranking_trump is None
+                        or card.ranking < highest_ranking_trump):
+                    highest_ranking_trump = card.ranking
+                    winning_player = player
+                continue
+
             if highest_ranking_trump is None and card.suit == self.suit and (
                     highest_ranking is None or card.ranking < highest_ranking):
                 highest_ranking = card.ranking
                 winning_player = player
-                continue
-
-            if card.suit == self.trump_suit and (
-                    highest_ranking_trump is None
-                    or card.ranking < highest_ranking_trump):
-                highest_ranking_trump = card.ranking
-                winning_player = player
-
-        face_up = self.get_face_up()
-        for card in face_up.T.iteritems():
-            self.move(card[1], f'player {winning_player + 1} tricks')
 
         return winning_player
 
@@ -302,7 +566,7 @@ class Tute:
 
         for cante in self.cantes.items():
             if cante[1] == player:
-                points += 40 if cante[1] == self.trump_suit else 20
+                points += 40 if cante[0] == self.trump_suit else 20
 
         return points + self.get_cards_in(
             f'player {player + 1} tricks').points.sum()
@@ -313,6 +577,7 @@ class Tute:
         Args:
             Winning_player (int): number of player who won the last trick
         """
+        import pandas as pd  # pylint: disable=import-outside-toplevel
         to_deal = pd.concat(
             [self.get_cards_in('pile'),
              self.get_cards_in('trump')], axis=0)
@@ -321,10 +586,10 @@ class Tute:
             for dealt, card in enumerate(to_deal.T.iteritems()):
                 if dealt == self.num_players:
                     break
-                self.move(
-                    card[1],
-                    f'player {(winning_player + dealt) % self.num_players + 1} hand'
-                )
+                player = (winning_player + dealt) % self.num_players
+                self.move(card[1], f'player {player + 1} hand')
+                if self.events is not None:
+                    self.events.append((self.DEALT, player, int(card[0]), -1))
 
     def get_follow_suit(self) -> bool:
         """Determines whether player has to follow suit or not.
@@ -332,24 +597,110 @@ class Tute:
         Returns:
             bool: if True, suit must be followed
         """
-        return not self.habanero or len(self.get_cards_in('pile')) + len(
-            self.get_cards_in('trump')) < self.num_players
+        if not self.habanero:
+            return True
+        # count with the array of locations rather than filtering the deck
+        locations = self.deck['location'].to_numpy()
+        return np.count_nonzero((locations == self.locations['pile'])
+                                | (locations == self.locations['trump'])
+                               ) < self.num_players
 
     def get_possible_cards(self, face_up: pd.DataFrame,
-                           hand: pd.DataFrame) -> list:
+                           hand: pd.DataFrame) -> np.ndarray:
         """Determine which cards can be played from the hand.
 
+        The result only depends on the cards in hand and in play of the suit of
+        the trick and of the trump suit, relative to the lowest card of each
+        suit, so it is memoized in legal_move_cache, which is shared by all
+        games with the same number of players (see set_legal_move_cache_size).
+
         Args:
             face_up (Series): cards in play.
             hand (Series): cards in hand.
 
         Returns:
-            list: list of possible card indices.
+            array: boolean mask of possible cards in hand.
         """
+        hand_ids = hand.index.to_numpy()
         follow_suit = self.get_follow_suit()
+        if not follow_suit or len(face_up) == 0:
+            return np.ones(len(hand_ids), dtype=bool)
+        if self.legal_move_cache.maxsize <= 0:
+            return np.asarray(self._get_possible_cards(face_up, hand,
+                                                       follow_suit),
+                              dtype=bool)
+
+        bitboards = self._bitboards or self._get_bitboards()
+        suit_shift = bitboards.suit_shifts[self.suit]
+        trump_shift = bitboards.suit_shifts[self.trump_suit]
+        full = (1 << bitboards.suit_size) - 1
+        hand_mask = int(np.bitwise_or.reduce(bitboards.card_bits[hand_ids]))
+        face_up_mask = int(
+            np.bitwise_or.reduce(
+                bitboards.card_bits[face_up.index.to_numpy()]))
+        hand_suit = (hand_mask >> suit_shift) & full
+        if hand_suit:
+            # trumps only matter if there are no cards of the suit
+            key = LegalMoveCache.encode(hand_suit, 0,
+                                        (face_up_mask >> suit_shift) & full, 0,
+                                        self.suit == self.trump_suit,
+                                        bitboards.suit_size)
+        else:
+            key = LegalMoveCache.encode(0, (hand_mask >> trump_shift) & full,
+                                        0, (face_up_mask >> trump_shift) & full,
+                                        self.suit == self.trump_suit,
+                                        bitboards.suit_size)
+        possible = self.legal_move_cache.get(key)
+        if possible is None:
+            mask = np.asarray(self._get_possible_cards(face_up, hand,
+                                                       follow_suit),
+                              dtype=bool)
+            possible_mask = int(np.bitwise_or.reduce(1 << hand_ids[mask]))
+            possible = (((possible_mask >> suit_shift) & full) <<
+                        bitboards.suit_size) | (
+                            (possible_mask >> trump_shift) & full)
+            self.legal_move_cache.put(key, possible)
+
+        if possible == 0:
+            # no cards of the suit or trumps
+            return np.ones(len(hand_ids), dtype=bool)
+        possible_mask = ((possible >> bitboards.suit_size) << suit_shift) | (
+            (possible & full) << trump_shift)
+        return (possible_mask >> hand_ids) & 1 == 1
+
+    def _get_bitboards(self):
+        """Get the bitboards of the deck, the first time they are needed.
+
+        Returns:
+            Bitboards: bitboards (see tute.bitboard)
+        """
+        # tute.bitboard imports this module, so it is imported once it is
+        # loaded
+        from .bitboard import get_bitboards  # pylint: disable=import-outside-toplevel
+        self._bitboards = get_bitboards(self.num_players)
+        return self._bitboards
+
+    def _get_possible_cards(self, face_up: pd.DataFrame, hand: pd.DataFrame,
+                            follow_suit: bool) -> list:
+        """Determine which cards can be played from the hand, without the
+        cache.
+
+        Args:
+            face_up (Series): cards in play.
+            hand (Series): cards in hand.
+            follow_suit (bool): if True, suit must be followed
+
+        Returns:
+            Series or array: boolean mask of possible cards in hand.
+        """
         if not follow_suit or len(face_up) == 0:
             return hand.T.any()
 
+        if self.use_tables:
+            from .tables import must_play  # pylint: disable=import-outside-toplevel
+            return must_play(hand.index.to_numpy(), face_up.index.to_numpy(),
+                             self.suit, self.trump_suit, self.num_players)
+
         highest_ranking = face_up[face_up.suit == self.suit].ranking.min()
         higher_ranking = (hand.suit
                           == self.suit) & (hand.ranking < highest_ranking)
@@ -386,11 +737,12 @@ class Tute:
                     self.deck.loc[self.deck.index == trump.name,
                                   'location'] = self.locations[
                                       f'player {player + 1} hand']
-                    self.shown.add(trump.name)
-                    self.messages += [
-                        f'Player {player + 1} swapped {trump.description} \
-for {trump_swap.description}'
-                    ]
+                    self._notify(trump_swap.name)
+                    self.show([trump.name])
+                    if self.events is not None:
+                        self.events.append(
+                            (self.SWAPPED_TRUMP, player, int(trump.name),
+                             int(trump_swap.name)))
 
         trump = self.get_cards_in('trump')
         if len(trump) < 1:
@@ -426,10 +778,9 @@ for {trump_swap.description}'
         caballo_and_rey = _caballo_and_rey(hand, self.trump_suit)
         if len(self.cantes) == 0 and len(caballo_and_rey) == 2:
             self.cantes[self.trump_suit] = player
-            self.shown.update(caballo_and_rey.index.tolist())
-            self.messages += [
-                f'Player {player + 1} canta {self.suits[self.trump_suit]}'
-            ]
+            self.show(caballo_and_rey.index.tolist())
+            if self.events is not None:
+                self.events.append((self.CANTE, player, self.trump_suit, -1))
             return
 
         for suit, _ in enumerate(self.suits):
@@ -438,10 +789,9 @@ for {trump_swap.description}'
             caballo_and_rey = _caballo_and_rey(hand, suit)
             if len(caballo_and_rey) == 2:
                 self.cantes[suit] = player
-                self.shown.update(caballo_and_rey.index.tolist())
-                self.messages += [
-                    f'Player {player + 1} canta {self.suits[suit]}'
-                ]
+                self.show(caballo_and_rey.index.tolist())
+                if self.events is not None:
+                    self.events.append((self.CANTE, player, suit, -1))
                 return
 
     def pre_move(self, player) -> list:
@@ -500,23 +850,52 @@ for {trump_swap.description}'
         choose_card = choose_card or self.choose_card
         possible_cards = self.pre_move(player)
         card = choose_card(self, self.get_hand(player), possible_cards)
-        self.messages += [f'Player {player + 1} played {card.description}']
+        if self.events is not None:
+            self.events.append((self.PLAYED, player, int(card.name), -1))
         self.move(card, f'player {player + 1} face up')
         winning_player = self.post_move(card)
-        if winning_player is not None:
-            self.messages += [f'Player {winning_player + 1} won trick']
+        if winning_player is not None and self.events is not None:
+            self.events.append((self.TRICK_WON, winning_player, -1, -1))
         return winning_player
 
     def retreive_messages(self) -> list:
-        """Retrieve messages such as cantes etc. Also clears message list.
+        """Retrieve messages such as cantes etc. since they were last retrieved.
 
         Returns:
-            list: List of string messages
+            list: List of string messages (empty if headless)
         """
-        messages = self.messages
-        self.messages = []
+        if self.events is None:
+            return []
+
+        messages = [
+            message for message in map(
+                self.render_event, self.events[self._num_retrieved:])
+            if message is not None
+        ]
+        self._num_retrieved = len(self.events)
         return messages
 
+    def render_event(self, event: tuple) -> str:
+        """Render event as a message.
+
+        Args:
+            event (tuple): event (see Tute.events)
+
+        Returns:
+            str: message (None for cards dealt, as they may be hidden)
+        """
+        event_type, player, card, other_card = event
+        if event_type == self.PLAYED:
+            return f'Player {player + 1} played {self.card_descriptions[card]}'
+        if event_type == self.TRICK_WON:
+            return f'Player {player + 1} won trick'
+        if event_type == self.SWAPPED_TRUMP:
+            return f'Player {player + 1} swapped {self.card_descriptions[card]} \
+for {self.card_descriptions[other_card]}'
+        if event_type == self.CANTE:
+            return f'Player {player + 1} canta {self.suits[card]}'
+        return None
+
     @staticmethod
     def show_messages(messages: list):
         """Convenience method to print messages.
@@ -525,6 +904,202 @@ for {trump_swap.description}'
             print(message)
 
 
+@lru_cache(maxsize=None)
+def get_card_table(num_players: int) -> CardTable:
+    """Get the attributes of the cards in the deck used with this number of
+    players, built once and shared read-only by all games.
+
+    Args:
+        num_players (int): number of players
+
+    Returns:
+        CardTable: card attributes indexed by card id, as read-only mappings
+                   and arrays
+    """
+    deck = Tute.build_deck(num_players)
+    arrays = {}
+    for attribute, dtype in [('suit', np.int8), ('value', np.int8),
+                             ('ranking', np.int8), ('points', np.int16)]:
+        arrays[attribute] = np.array([card[attribute] for card in deck.values()],
+                                     dtype=dtype)
+        arrays[attribute].flags.writeable = False
+    return CardTable(
+        deck=MappingProxyType({
+            card_id: MappingProxyType(card) for card_id, card in deck.items()
+        }),
+        descriptions=tuple(card['description'] for card in deck.values()),
+        suits=arrays['suit'],
+        values=arrays['value'],
+        rankings=arrays['ranking'],
+        points=arrays['points'],
+        lookup=MappingProxyType({(card['suit'], card['value']): card_id
+                                 for card_id, card in deck.items()}))
+
+
+class LegalMoveCache:
+    """LRU cache of the cards that can be played when suit must be followed,
+    keyed by the context of the rules encoded as an int (see
+    LegalMoveCache.encode), as bitboards of the cards of the suit of the trick
+    and of the trump suit, shifted down and concatenated.
+    """
+
+    def __init__(self, maxsize: int = 2**18):
+        """Initialize cache.
+
+        Args:
+            maxsize (int): maximum number of contexts to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def encode(hand_suit: int, hand_trump: int, face_up_suit: int,
+               face_up_trump: int, suit_is_trump: bool, suit_size: int) -> int:
+        """Encode the context of the rules as an int.
+
+        Args:
+            hand_suit (int): bitboard of cards in hand of the suit of the
+                trick, shifted down to the lowest card of the suit
+            hand_trump (int): bitboard of trumps in hand, shifted down
+            face_up_suit (int): bitboard of cards in play of the suit of the
+                trick, shifted down
+            face_up_trump (int): bitboard of trumps in play, shifted down
+            suit_is_trump (bool): if True, the suit of the trick is trumps
+            suit_size (int): number of cards in each suit
+
+        Returns:
+            int: key
+        """
+        key = 0
+        for bits in [hand_suit, hand_trump, face_up_suit, face_up_trump]:
+            key = (key << suit_size) | bits
+        return (key << 1) | bool(suit_is_trump)
+
+    def get(self, key: int) -> int:
+        """Get the cards that can be played in a context.
+
+        Args:
+            key (int): encoded context
+
+        Returns:
+            int: possible cards (None if not cached)
+        """
+        possible = self._cache.get(key)
+        if possible is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return possible
+
+    def put(self, key: int, possible: int):
+        """Cache the cards that can be played in a context.
+
+        Args:
+            key (int): encoded context
+            possible (int): possible cards
+        """
+        if self.maxsize <= 0:
+            return
+        self._cache[key] = possible
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def resize(self, maxsize: int):
+        """Change the maximum size of cache, discarding the least recently
+        used contexts that no longer fit.
+
+        Args:
+            maxsize (int): maximum number of contexts to keep
+        """
+        self.maxsize = maxsize
+        while len(self._cache) > max(maxsize, 0):
+            self._cache.popitem(last=False)
+
+    def cache_info(self) -> dict:
+        """Get statistics of cache.
+
+        Returns:
+            dict: hits, misses, hit rate, maximum size and current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'maxsize': self.maxsize,
+            'currsize': len(self._cache)
+        }
+
+    def clear(self):
+        """Empty cache and reset statistics.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# maximum number of contexts kept by each cache of legal moves (see
+# set_legal_move_cache_size)
+LEGAL_MOVE_CACHE_SIZE = 2**18
+# caches of legal moves of this process, indexed by number of players
+_legal_move_caches = {}
+
+
+def get_legal_move_cache(num_players: int) -> LegalMoveCache:
+    """Get the cache of legal moves shared by all games with this number of
+    players in this process.
+
+    Args:
+        num_players (int): number of players
+
+    Returns:
+        LegalMoveCache: cache
+    """
+    cache = _legal_move_caches.get(num_players)
+    if cache is None:
+        cache = _legal_move_caches[num_players] = LegalMoveCache(
+            LEGAL_MOVE_CACHE_SIZE)
+    return cache
+
+
+def set_legal_move_cache_size(maxsize: int):
+    """Set the maximum number of contexts kept by each cache of legal moves in
+    this process, including the caches already in use.
+
+    Each context costs around 170 bytes, so a full cache of the default size
+    (2**18) takes around 45 MB for each number of players, although a few
+    hundred games only visit a few thousand contexts.
+
+    Args:
+        maxsize (int): maximum number of contexts (0 to disable caching)
+    """
+    global LEGAL_MOVE_CACHE_SIZE  # pylint: disable=global-statement
+    LEGAL_MOVE_CACHE_SIZE = maxsize
+    for cache in _legal_move_caches.values():
+        cache.resize(maxsize)
+
+
+@lru_cache(maxsize=None)
+def _get_deck_frame(num_players: int) -> pd.DataFrame:
+    """Get a DataFrame of the attributes of the cards in the deck, built once
+    for each number of players (to be copied, as games modify their deck).
+
+    Args:
+        num_players (int): number of players
+
+    Returns:
+        DataFrame: card attributes indexed by card id
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    deck = get_card_table(num_players).deck
+    return pd.DataFrame.from_dict(
+        {card_id: dict(card) for card_id, card in deck.items()},
+        orient='index')
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Demo Tute game.")
     parser.add_argument("--num_players",
@@ -535,9 +1110,29 @@ if __name__ == '__main__':
                         type=bool,
                         default=True,
                         help='Tute Habanero')
+    parser.add_argument("--bots",
+                        type=int,
+                        default=0,
+                        help='number of players (the last ones) played by '
+                        'the ISMCTS agent')
+    parser.add_argument("--think_time",
+                        type=float,
+                        default=0.1,
+                        help='time in seconds the bots think for each move')
     args = parser.parse_args()
-
-    tute = Tute(num_players=args.num_players, habanero=args.habanero)
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.bots > 0:
+        # bots need to know what their players have seen
+        from tute.rlcard.game import TuteGame
+        from tute.rlcard.ismcts import TuteISMCTSAgent
+        tute = TuteGame(num_players=args.num_players, habanero=args.habanero)
+    else:
+        tute = Tute(num_players=args.num_players, habanero=args.habanero)
+    bots = {
+        player: TuteISMCTSAgent(player, tute, time_limit=args.think_time)
+        for player in range(args.num_players - args.bots, args.num_players)
+    }
     tute.deal()
 
     player = 0  # pylint: disable=invalid-name
@@ -566,11 +1161,22 @@ if __name__ == '__main__':
             print()
 
         print(f'Player {player + 1}')
-        winning_player = tute.play_turn(player=player)
-        print()
+        if player in bots:
+            winning_player = tute.play_turn(
+                player=player, choose_card=bots[player].choose_card)
+            print()
+        else:
+            winning_player = tute.play_turn(player=player)
+            print()
+
+            if len(bots) < args.num_players - 1:
+                input('Press any key to change player ')
+                os.system('cls' if os.name == 'nt' else 'clear')
 
-        input('Press any key to change player ')
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if winning_player is not None:
+            player = winning_player  # pylint: disable=invalid-name
+        else:
+            player = (player + 1) % tute.num_players  # pylint: disable=invalid-name
 
     highest_points = None  # pylint: disable=invalid-name
     for player in range(tute.num_players):
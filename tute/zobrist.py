@@ -0,0 +1,165 @@
+"""Zobrist hashing of states of games of Tute.
+
+The hash of a state is the XOR of a random 64-bit key for the location of each
+card and for each card that has been shown, which is updated as cards move or
+are shown, and of keys for the suit of the trick, the trump suit, the cantes
+and the current player. The hash of the information set of a player is the
+same with the locations of cards as the player knows them (see
+TuteGame.get_state). The keys are the same in every process, so hashes can be
+used to deduplicate states across processes as well as in transposition
+tables.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .tute import Tute, get_card_table
+
+# random keys of each card in each location, of each card being shown, of the
+# suit of the trick (the last if there is none), of the trump suit, of each
+# player having "cantado" in each suit and of the current player (or the player
+# whose information set it is)
+ZobristKeys = namedtuple(
+    'ZobristKeys',
+    ['locations', 'shown', 'suits', 'trump_suits', 'cantes', 'players'])
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(num_players: int) -> ZobristKeys:
+    """Get the keys used to hash games with this number of players.
+
+    Args:
+        num_players (int): number of players
+
+    Returns:
+        ZobristKeys: keys as lists of ints
+    """
+    num_cards = len(get_card_table(num_players).deck)
+    num_locations = max(Tute.build_locations(num_players).values()) + 1
+    num_suits = len(Tute.suits)
+    rng = np.random.default_rng(
+        np.random.SeedSequence(0x7475746520, spawn_key=(num_players,)))
+
+    def _keys(*shape):
+        return rng.integers(0, 2**64, size=shape, dtype=np.uint64).tolist()
+
+    return ZobristKeys(locations=_keys(num_cards, num_locations),
+                       shown=_keys(num_cards),
+                       suits=_keys(num_suits + 1),
+                       trump_suits=_keys(num_suits),
+                       cantes=_keys(num_suits, num_players),
+                       players=_keys(num_players))
+
+
+class ZobristHash:
+    """Hash of the state of a game, maintained as its cards move or are shown.
+
+    The hashes of information sets are only maintained for games that know
+    what each player knows (such as TuteGame).
+    """
+
+    def __init__(self, tute: Tute):
+        """Start hashing a game.
+
+        Args:
+            tute (Tute): game (with either engine)
+        """
+        self.tute = tute
+        self.keys = get_zobrist_keys(tute.num_players)
+        self._info_sets = hasattr(tute, 'known_locations')
+        self.reset()
+        tute.listeners.append(self._update)
+
+    def reset(self):
+        """Hash the locations of all cards from scratch.
+        """
+        tute = self.tute
+        self._locations = [
+            int(tute.get_location(card)) for card in range(tute.num_cards)
+        ]
+        self._shown = [card in tute.shown for card in range(tute.num_cards)]
+        self._hash = 0
+        for card, location in enumerate(self._locations):
+            self._hash ^= self.keys.locations[card][location]
+            if self._shown[card]:
+                self._hash ^= self.keys.shown[card]
+
+        if self._info_sets:
+            self._known_locations = tute.known_locations.tolist()
+            self._info_hashes = []
+            for known_locations in self._known_locations:
+                info_hash = 0
+                for card, location in enumerate(known_locations):
+                    info_hash ^= self.keys.locations[card][location]
+                self._info_hashes.append(info_hash)
+
+    def close(self):
+        """Stop hashing the game.
+        """
+        self.tute.listeners.remove(self._update)
+
+    def _update(self, card: int):
+        """Update hashes when card has moved or been shown.
+
+        Args:
+            card (int): id of card
+        """
+        card = int(card)
+        keys = self.keys.locations[card]
+        location = int(self.tute.get_location(card))
+        if location != self._locations[card]:
+            self._hash ^= keys[self._locations[card]] ^ keys[location]
+            self._locations[card] = location
+        shown = card in self.tute.shown
+        if shown != self._shown[card]:
+            self._hash ^= self.keys.shown[card]
+            self._shown[card] = shown
+
+        if self._info_sets:
+            for player, known_locations in enumerate(
+                    self.tute.known_locations[:, card].tolist()):
+                previous = self._known_locations[player][card]
+                if known_locations != previous:
+                    self._info_hashes[player] ^= keys[previous] ^ keys[
+                        known_locations]
+                    self._known_locations[player][card] = known_locations
+
+    def _public_hash(self) -> int:
+        """Hash the suit of the trick and the trump suit.
+
+        Returns:
+            int: hash
+        """
+        tute = self.tute
+        return self.keys.suits[len(Tute.suits) if tute.suit is None else int(
+            tute.suit)] ^ self.keys.trump_suits[int(tute.trump_suit)]
+
+    def hash(self) -> int:
+        """Hash the state of the game.
+
+        Returns:
+            int: 64-bit hash
+        """
+        tute = self.tute
+        value = self._hash ^ self._public_hash()
+        for suit, player in tute.cantes.items():
+            value ^= self.keys.cantes[int(suit)][int(player)]
+        current_player = getattr(tute, 'current_player', None)
+        if current_player is not None:
+            value ^= self.keys.players[current_player]
+        return value
+
+    def info_hash(self, player: int) -> int:
+        """Hash the information set of a player, which is what
+        TuteGame.get_state reveals to them.
+
+        Args:
+            player (int): number of player
+
+        Returns:
+            int: 64-bit hash
+        """
+        assert self._info_sets, 'game does not know what each player knows'
+        return (self._info_hashes[player] ^ self._public_hash()
+                ^ self.keys.players[player])